@@ -0,0 +1,241 @@
+"""
+拍卖并发出价压力测试
+
+多个线程同时向少量拍卖出价（每个线程读取当前出价后加价，制造大量"同时读到同一个当前出价"
+的竞争），另有一个线程持续读取各拍卖的 current_bid。结束后检查：
+    - 观察线程看到的 current_bid 从不回退；
+    - 每场拍卖被接受的出价序号从 1 连续递增，金额随序号严格递增且满足最小加价；
+    - current_bid、total_bids、领先者与竞价簿中的最后一次出价一致。
+任何一项不满足时以非零状态退出。
+
+出价分别经过 Flask 测试客户端（完整的 place_bid 路由）和直接调用竞价簿（锁分段 + BidBook）
+两种方式执行，报告各自的吞吐量。
+
+用法（在 cfish-backend 目录下）：
+    python benchmarks/auction_stress.py
+    python benchmarks/auction_stress.py --auctions 50 --threads 32 --bids 2000 --output report.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SEED = 20240501
+STARTING_PRICE = 100
+MIN_INCREMENT = 1
+
+
+def build_app():
+    """只注册拍卖蓝图的应用"""
+    from flask import Flask
+    from src.routes.auction_management import auction_management_bp
+
+    app = Flask(__name__)
+    app.register_blueprint(auction_management_bp, url_prefix='/api')
+    return app
+
+
+def create_auctions(client, count):
+    ids = []
+    for i in range(count):
+        response = client.post('/api/auctions', json={
+            'seller_address': f'stress_seller_{i}',
+            'nft_id': f'stress_nft_{i}',
+            'type': 'english',
+            'starting_price': STARTING_PRICE,
+            'duration_hours': 24,
+            'min_bid_increment': MIN_INCREMENT,
+            'auto_extend': True
+        })
+        ids.append(response.get_json()['data']['auction']['id'])
+    return ids
+
+
+def http_bidder(app, auction_ids, bids, seed, counters):
+    """经过 place_bid 路由出价：先读当前出价，再加一个随机增量"""
+    from src.routes.auction_management import auctions
+
+    rng = random.Random(seed)
+    client = app.test_client()
+    accepted = rejected = 0
+    for _ in range(bids):
+        auction_id = rng.choice(auction_ids)
+        amount = auctions[auction_id]['pricing']['current_bid'] + rng.randint(MIN_INCREMENT, 5)
+        response = client.post(f'/api/auctions/{auction_id}/bid', json={
+            'bidder_address': f'bidder_{rng.randint(1, 200)}',
+            'bid_amount': amount
+        })
+        if response.status_code == 200:
+            accepted += 1
+        else:
+            rejected += 1
+    with counters['lock']:
+        counters['accepted'] += accepted
+        counters['rejected'] += rejected
+
+
+def engine_bidder(auction_ids, bids, seed, counters):
+    """直接在锁内调用竞价簿出价，测量不含 HTTP 开销的吞吐量"""
+    from src.routes.auction_management import auctions, get_bid_book
+    from src.services.bid_book import BidError, bid_locks
+
+    rng = random.Random(seed)
+    accepted = rejected = 0
+    for _ in range(bids):
+        auction_id = rng.choice(auction_ids)
+        auction = auctions[auction_id]
+        amount = auction['pricing']['current_bid'] + rng.randint(MIN_INCREMENT, 5)
+        bid = {
+            'id': str(uuid.uuid4()),
+            'auction_id': auction_id,
+            'bidder_address': f'bidder_{rng.randint(1, 200)}',
+            'bid_amount': amount,
+            'timestamp': datetime.now().isoformat()
+        }
+        with bid_locks(auction_id):
+            book = get_bid_book(auction)
+            try:
+                book.place(bid)
+            except BidError:
+                rejected += 1
+                continue
+            auction['pricing']['current_bid'] = book.current_bid
+            auction['participation']['total_bids'] += 1
+        accepted += 1
+    with counters['lock']:
+        counters['accepted'] += accepted
+        counters['rejected'] += rejected
+
+
+def observer(auction_ids, stop, violations):
+    """不断读取 current_bid，记录任何回退"""
+    from src.routes.auction_management import auctions
+
+    last = {auction_id: auctions[auction_id]['pricing']['current_bid'] for auction_id in auction_ids}
+    samples = 0
+    while not stop.is_set():
+        for auction_id in auction_ids:
+            current = auctions[auction_id]['pricing']['current_bid']
+            if current < last[auction_id]:
+                violations.append(f'{auction_id}: current_bid went from {last[auction_id]} to {current}')
+            last[auction_id] = current
+            samples += 1
+        time.sleep(0)
+    return samples
+
+
+def check_books(auction_ids, initial_bids):
+    """检查竞价簿与拍卖数据的一致性，返回违规描述列表"""
+    from src.routes.auction_management import auctions, auction_books
+
+    violations = []
+    for auction_id in auction_ids:
+        auction = auctions[auction_id]
+        book = auction_books.get(auction_id)
+        bids = book.bids if book else []
+        previous = initial_bids[auction_id]
+        for expected, bid in enumerate(bids, start=1):
+            if bid['sequence'] != expected:
+                violations.append(f"{auction_id}: sequence {bid['sequence']} at position {expected}")
+                break
+            if bid['bid_amount'] < previous + MIN_INCREMENT:
+                violations.append(f"{auction_id}: bid {bid['sequence']} of {bid['bid_amount']} after {previous}")
+                break
+            previous = bid['bid_amount']
+        if auction['pricing']['current_bid'] != previous:
+            violations.append(f"{auction_id}: current_bid {auction['pricing']['current_bid']} != last bid {previous}")
+        if book and auction['participation']['total_bids'] != len(bids):
+            violations.append(f"{auction_id}: total_bids {auction['participation']['total_bids']} != {len(bids)}")
+        if bids and book.leader != bids[-1]['bidder_address']:
+            violations.append(f"{auction_id}: leader {book.leader} is not the last bidder")
+        if book and sum(p['total_bids'] for p in book.participants.values()) != len(bids):
+            violations.append(f"{auction_id}: participant bid counts do not add up")
+    return violations
+
+
+def run_phase(name, target, auction_ids, threads, bids):
+    from src.routes.auction_management import auctions
+
+    initial_bids = {auction_id: auctions[auction_id]['pricing']['current_bid'] for auction_id in auction_ids}
+    counters = {'lock': threading.Lock(), 'accepted': 0, 'rejected': 0}
+    stop = threading.Event()
+    violations = []
+    samples = []
+    watcher = threading.Thread(target=lambda: samples.append(observer(auction_ids, stop, violations)))
+    watcher.start()
+
+    workers = [threading.Thread(target=target, args=(auction_ids, bids, SEED + i, counters)) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    watcher.join()
+
+    violations.extend(check_books(auction_ids, initial_bids))
+    attempts = counters['accepted'] + counters['rejected']
+    return {
+        'phase': name,
+        'threads': threads,
+        'attempts': attempts,
+        'accepted': counters['accepted'],
+        'rejected': counters['rejected'],
+        'seconds': round(elapsed, 3),
+        'attempts_per_second': round(attempts / elapsed, 1),
+        'accepted_per_second': round(counters['accepted'] / elapsed, 1),
+        'observer_samples': samples[0] if samples else 0,
+        'violations': violations[:20],
+        'violation_count': len(violations)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent auction bidding stress test')
+    parser.add_argument('--auctions', type=int, default=20, help='参与出价的拍卖数量，越少竞争越激烈')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--bids', type=int, default=1000, help='每个线程的出价次数')
+    parser.add_argument('--output', help='报告写入的文件，默认输出到标准输出')
+    args = parser.parse_args()
+
+    # 缩短线程切换间隔，让读取 - 校验 - 写入更容易被打断
+    sys.setswitchinterval(1e-5)
+    app = build_app()
+    client = app.test_client()
+
+    http_ids = create_auctions(client, args.auctions)
+    engine_ids = create_auctions(client, args.auctions)
+    phases = [
+        run_phase('http', lambda ids, bids, seed, counters: http_bidder(app, ids, bids, seed, counters),
+                  http_ids, args.threads, args.bids),
+        run_phase('engine', engine_bidder, engine_ids, args.threads, args.bids * 10),
+    ]
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'seed': SEED,
+        'auctions': args.auctions,
+        'phases': phases,
+        'passed': all(phase['violation_count'] == 0 for phase in phases)
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if not report['passed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,428 @@
+"""
+搜索性能与召回基准测试
+
+生成确定性的NFT语料（字段与 generate_mock_nft 的输出一致），写入临时 SQLite 数据库并建立
+各内存索引，然后用 Flask 测试客户端按固定的查询负载调用
+/api/search、/api/search/advanced、/api/search/suggestions，
+输出各类查询的 p50/p95/p99 延迟、吞吐量、峰值内存，以及与暴力扫描结果对比得到的 recall@k。
+
+每个语料规模在单独的子进程中运行，峰值内存互不影响。结果以 JSON 输出，便于跟踪回归。
+
+用法（在 cfish-backend 目录下）：
+    python benchmarks/search_benchmark.py                          # 10k / 100k / 1M
+    python benchmarks/search_benchmark.py --sizes 10000 --rounds 5 --output report.json
+    python benchmarks/search_benchmark.py --cache                  # 保留查询结果缓存
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+SEED = 20240501
+TOP_K = 10
+INSERT_BATCH = 5000
+# 综合搜索并发负载的客户端线程数
+LOAD_CLIENTS = 8
+
+CATEGORIES = ['Art', 'Gaming', 'Music', 'Photography', 'Sports', 'Collectibles']
+CURRENCIES = ['SOL', 'CFISH']
+RARITIES = ['Common', 'Uncommon', 'Rare', 'Epic', 'Legendary']
+TAGS = ['art', 'digital', 'unique', 'collectible', 'rare', 'trending']
+ADJECTIVES = ['Golden', 'Silver', 'Neon', 'Cosmic', 'Pixel', 'Ancient', 'Electric', 'Crystal',
+              'Shadow', 'Lunar', 'Solar', 'Mystic', 'Cyber', 'Frozen', 'Crimson', 'Emerald']
+NOUNS = ['Dragon', 'Phoenix', 'Tiger', 'Wolf', 'Samurai', 'Robot', 'Galaxy', 'Ocean',
+         'Forest', 'Castle', 'Knight', 'Wizard', 'Panda', 'Koi', 'Lotus', 'Comet']
+CREATOR_PREFIXES = ['Crypto', 'Digital', 'Pixel', 'Neon', 'Block', 'Meta', 'Chain', 'Astro', 'Vapor', 'Glitch']
+CREATOR_SUFFIXES = ['Artist', 'Master', 'Creator', 'Forge', 'Studio', 'Smith', 'Lab', 'Works', 'Dreamer', 'Maker']
+
+# 固定查询负载：分组 -> 查询；typo 组同时给出正确拼写，用正确拼写的暴力扫描结果计算召回
+WORKLOAD = {
+    'search_exact': ['dragon', 'golden dragon', 'cosmic samurai', 'cryptoartist', 'photography', 'neon koi'],
+    'search_all': ['dragon', 'pixel forge', 'crystal lotus'],
+    'search_typo': [('dragn', 'dragon'), ('goldn dragon', 'golden dragon'), ('cryptoartst', 'cryptoartist'),
+                    ('phoneix', 'phoenix'), ('samuri', 'samurai')],
+    'advanced_filtered': [
+        {'query': 'dragon', 'filters': {'category': 'Art', 'currency': 'CFISH', 'max_price': 10}, 'sort_by': 'price_low_high'},
+        {'query': '', 'filters': {'rarity': 'Legendary', 'is_for_sale': True, 'min_price': 20, 'max_price': 40}, 'sort_by': 'price_low_high'},
+        {'query': 'neon', 'filters': {'category': 'Gaming', 'rarity': 'Epic'}, 'sort_by': 'relevance'},
+        {'query': 'wizard castle', 'filters': {'currency': 'SOL', 'min_price': 5}, 'sort_by': 'price_high_low'},
+    ],
+    'suggestions': ['dra', 'gol', 'neo', 'cry', 'pix', 'sam', 'pho', 'cosmic s'],
+}
+
+
+# ---- 语料 ----
+
+def creator_pool():
+    names = [f'{prefix}{suffix}' for prefix in CREATOR_PREFIXES for suffix in CREATOR_SUFFIXES]
+    return [{'name': name, 'avatar': f'/avatars/{name.lower()}.png', 'verified': i % 3 != 0}
+            for i, name in enumerate(names)]
+
+
+def generate_corpus(size, seed=SEED):
+    """确定性地生成 size 条与 generate_mock_nft 输出同构的NFT"""
+    rng = random.Random(seed)
+    creators = creator_pool()
+    now = datetime(2025, 1, 1)
+    for nft_id in range(1, size + 1):
+        adjective, noun = rng.choice(ADJECTIVES), rng.choice(NOUNS)
+        creator = rng.choice(creators)
+        yield {
+            'id': nft_id,
+            'name': f'{adjective} {noun} #{nft_id}',
+            'description': f'A {adjective.lower()} {noun.lower()} piece by {creator["name"]}. '
+                           f'NFT #{nft_id} represents creativity and innovation in the blockchain space.',
+            'image': f'/nft-images/nft_{nft_id}.jpg',
+            'price': round(rng.uniform(0.1, 50.0), 2),
+            'currency': rng.choice(CURRENCIES),
+            'category': rng.choice(CATEGORIES),
+            'collection_id': nft_id // 100 + 1,
+            'creator': creator,
+            'owner': rng.choice(creators),
+            'commission': round(rng.uniform(2.5, 15.0), 1),
+            'rarity': rng.choice(RARITIES),
+            'likes': rng.randint(0, 1000),
+            'views': rng.randint(100, 10000),
+            'created_at': (now - timedelta(days=rng.randint(1, 365))).isoformat(),
+            'attributes': [
+                {'trait_type': 'Background', 'value': rng.choice(['Blue', 'Red', 'Green', 'Purple'])},
+                {'trait_type': 'Style', 'value': rng.choice(['Abstract', 'Realistic', 'Digital', 'Hand-drawn'])},
+                {'trait_type': 'Rarity Score', 'value': rng.randint(1, 100)}
+            ],
+            'tags': rng.sample(TAGS, k=rng.randint(2, 4)),
+            'is_for_sale': rng.random() < 0.5,
+            'auction_end_time': None,
+            'last_sale': None
+        }
+
+
+# ---- 应用与索引 ----
+
+def build_app(db_path):
+    """只注册搜索蓝图的应用，数据库指向临时文件"""
+    from flask import Flask
+    from src.models.user import db
+    from src.models.nft import NFT  # noqa: F401  注册表结构
+    from src.models.provenance import ProvenanceEvent  # noqa: F401
+    from src.routes.search import search_bp
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.register_blueprint(search_bp, url_prefix='/api')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def load_corpus(app, size):
+    """写入数据库并建立索引，同时收集暴力扫描所需的列"""
+    from src.models.user import db
+    from src.models.nft import NFT
+    from src.routes.collection import get_collection_catalog
+    from src.services.autocomplete import autocomplete
+    from src.services.listing_engine import listing_engine
+    from src.services.search_index import nft_index, nft_fields, tokenize
+
+    oracle = {
+        'ids': np.empty(size, dtype=np.int64),
+        'price': np.empty(size),
+        'likes': np.empty(size, dtype=np.int64),
+        'currency': np.empty(size, dtype=object),
+        'category': np.empty(size, dtype=object),
+        'rarity': np.empty(size, dtype=object),
+        'is_for_sale': np.empty(size, dtype=bool),
+        'tokens': [],
+    }
+    started = time.perf_counter()
+    with app.app_context():
+        batch = []
+        for i, nft in enumerate(generate_corpus(size)):
+            fields = nft_fields(nft)
+            listing_engine.upsert(nft)
+            nft_index.add(nft['id'], fields)
+            autocomplete.put('nft', nft['name'], nft['likes'], nft_id=nft['id'])
+            autocomplete.bump('creator', nft['creator']['name'], nft['likes'], verified=nft['creator']['verified'])
+
+            oracle['ids'][i] = nft['id']
+            oracle['price'][i] = nft['price']
+            oracle['likes'][i] = nft['likes']
+            oracle['currency'][i] = nft['currency']
+            oracle['category'][i] = nft['category']
+            oracle['rarity'][i] = nft['rarity']
+            oracle['is_for_sale'][i] = nft['is_for_sale']
+            oracle['tokens'].append(' %s ' % ' '.join(set(tokenize(list(map(str, fields.values()))))))
+
+            row = dict(nft, created_at=datetime.fromisoformat(nft['created_at']), history_seq=0)
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH:
+                db.session.execute(NFT.__table__.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(NFT.__table__.insert(), batch)
+        db.session.commit()
+        random.seed(SEED)
+        get_collection_catalog()
+        autocomplete.rebuild()
+    return oracle, time.perf_counter() - started
+
+
+# ---- 暴力扫描 ----
+
+def oracle_matches(oracle, query, filters=None):
+    """暴力扫描：满足筛选条件且包含全部查询词的下标"""
+    from src.services.search_index import tokenize
+
+    filters = filters or {}
+    mask = np.ones(len(oracle['ids']), dtype=bool)
+    for field in ('category', 'currency', 'rarity'):
+        if filters.get(field):
+            mask &= oracle[field] == filters[field]
+    if filters.get('is_for_sale') is not None:
+        mask &= oracle['is_for_sale'] == bool(filters['is_for_sale'])
+    if filters.get('min_price'):
+        mask &= oracle['price'] >= float(filters['min_price'])
+    if filters.get('max_price'):
+        mask &= oracle['price'] <= float(filters['max_price'])
+    terms = [f' {term} ' for term in dict.fromkeys(tokenize(query))]
+    candidates = np.flatnonzero(mask)
+    if not terms:
+        return candidates
+    tokens = oracle['tokens']
+    return np.array([i for i in candidates if all(term in tokens[i] for term in terms)], dtype=np.int64)
+
+
+def oracle_sorted(oracle, matches, sort_by, k):
+    """按高级搜索的字段排序方式取前 k 个ID"""
+    ids, price = oracle['ids'][matches], oracle['price'][matches]
+    if sort_by == 'price_low_high':
+        order = np.lexsort((ids, price))
+    else:
+        order = np.lexsort((-ids, -price))
+    return ids[order[:k]].tolist()
+
+
+def oracle_suggestions(prefix, k):
+    """暴力扫描联想登记表：某个单词以 prefix 开头的条目，按热度取前 k 个"""
+    from src.services.autocomplete import autocomplete, normalize, _WORD_START
+
+    prefix = normalize(prefix)
+    entries = autocomplete._snapshot[0]
+    hits = [entry for entry in entries
+            if entry is not None and any(entry[0].startswith(prefix, m.start()) for m in _WORD_START.finditer(entry[0]))]
+    hits.sort(key=lambda entry: (-entry[1], entry[0]))
+    return [entry[3] for entry in hits[:k]]
+
+
+def recall(returned, relevant, k):
+    relevant = set(relevant)
+    if not relevant:
+        return 1.0 if not returned else 0.0
+    return len(set(returned[:k]) & relevant) / min(k, len(relevant))
+
+
+# ---- 负载 ----
+
+def build_requests(oracle):
+    """展开查询负载：[(分组, 方法, URL, JSON, 期望结果函数)]"""
+    requests = []
+    for query in WORKLOAD['search_exact']:
+        relevant = oracle['ids'][oracle_matches(oracle, query)].tolist()
+        requests.append(('search_exact', 'get', f'/api/search?q={query}&type=nfts&limit={TOP_K}', None,
+                         lambda data, relevant=relevant: recall([i['id'] for i in data['results']['nfts']['items']], relevant, TOP_K)))
+    for query in WORKLOAD['search_all']:
+        relevant = oracle['ids'][oracle_matches(oracle, query)].tolist()
+        requests.append(('search_all', 'get', f'/api/search?q={query}&type=all', None,
+                         lambda data, relevant=relevant: recall([i['id'] for i in data['results']['nfts']['items']], relevant, 5)))
+    for typo, correct in WORKLOAD['search_typo']:
+        relevant = oracle['ids'][oracle_matches(oracle, correct)].tolist()
+        requests.append(('search_typo', 'get', f'/api/search?q={typo}&type=nfts&fuzzy=true&limit={TOP_K}', None,
+                         lambda data, relevant=relevant: recall([i['id'] for i in data['results']['nfts']['items']], relevant, TOP_K)))
+    for body in WORKLOAD['advanced_filtered']:
+        body = dict(body, limit=TOP_K)
+        matches = oracle_matches(oracle, body['query'], body['filters'])
+        if body['sort_by'] == 'relevance':
+            relevant = oracle['ids'][matches].tolist()
+        else:
+            relevant = oracle_sorted(oracle, matches, body['sort_by'], TOP_K)
+        requests.append(('advanced_filtered', 'post', '/api/search/advanced', body,
+                         lambda data, relevant=relevant: recall([i['id'] for i in data['results']], relevant, TOP_K)))
+    for prefix in WORKLOAD['suggestions']:
+        relevant = oracle_suggestions(prefix, TOP_K)
+        requests.append(('suggestions', 'get', f'/api/search/suggestions?q={prefix}&limit={TOP_K}', None,
+                         lambda data, relevant=relevant: recall([s['text'] for s in data['suggestions']], relevant, TOP_K)))
+    return requests
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def measure_federated(app, rounds):
+    """综合搜索：三个数据源依次执行与并发执行的耗时对比，以及多个客户端同时请求时的超时比例
+
+    数据源是受 GIL 限制的 Python/NumPy 计算，这里测的是真实负载下的加速，而不是人为 sleep 的数据源。
+    """
+    from src.routes.search import federated_search, search_nfts, search_collections, search_users, SOURCE_DEADLINES
+
+    # 对比耗时时不设截止时间，两种方式都跑完全部数据源
+    unlimited = {name: 60.0 for name in SOURCE_DEADLINES}
+    sequential, concurrent = [], []
+    with app.test_request_context():
+        for _ in range(rounds):
+            for query in WORKLOAD['search_all']:
+                sources = {
+                    'nfts': lambda query=query: search_nfts(query, None, 0, 5),
+                    'collections': lambda query=query: search_collections(query, None, 0, 3),
+                    'users': lambda query=query: search_users(query, 0, 3)
+                }
+                begin = time.perf_counter()
+                for source in sources.values():
+                    source()
+                sequential.append(time.perf_counter() - begin)
+                begin = time.perf_counter()
+                federated_search(sources, unlimited)
+                concurrent.append(time.perf_counter() - begin)
+
+    # 并发负载：每个客户端依次发送 type=all 请求，使用默认截止时间
+    latencies, partial = [], []
+    lock = threading.Lock()
+
+    def client_loop():
+        client = app.test_client()
+        for _ in range(rounds):
+            for query in WORKLOAD['search_all']:
+                begin = time.perf_counter()
+                data = client.get(f'/api/search?q={query}&type=all').get_json()['data']
+                with lock:
+                    latencies.append(time.perf_counter() - begin)
+                    partial.append(data['partial'])
+
+    clients = [threading.Thread(target=client_loop) for _ in range(LOAD_CLIENTS)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+
+    return {
+        'sequential_p50_ms': percentile_ms(sequential, 50),
+        'concurrent_p50_ms': percentile_ms(concurrent, 50),
+        'speedup': round(float(np.median(sequential) / np.median(concurrent)), 2),
+        'load': {
+            'clients': LOAD_CLIENTS,
+            'requests': len(latencies),
+            'p50_ms': percentile_ms(latencies, 50),
+            'p95_ms': percentile_ms(latencies, 95),
+            'partial_rate': round(sum(partial) / len(partial), 4)
+        }
+    }
+
+
+def run_size(size, rounds, keep_cache):
+    """在当前进程中跑一个语料规模，返回报告字典"""
+    from src.services.query_cache import search_cache
+
+    if not keep_cache:
+        search_cache.max_entries = 0
+
+    with tempfile.TemporaryDirectory() as workdir:
+        app = build_app(os.path.join(workdir, 'bench.db'))
+        oracle, build_seconds = load_corpus(app, size)
+        client = app.test_client()
+        requests = build_requests(oracle)
+
+        latencies = {group: [] for group in WORKLOAD}
+        recalls = {group: [] for group in WORKLOAD}
+        errors = 0
+        started = time.perf_counter()
+        for round_index in range(rounds):
+            for group, method, url, body, check in requests:
+                begin = time.perf_counter()
+                response = getattr(client, method)(url, json=body)
+                latencies[group].append(time.perf_counter() - begin)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                if round_index == 0:
+                    recalls[group].append(check(response.get_json()['data']))
+        elapsed = time.perf_counter() - started
+        federated = measure_federated(app, rounds)
+
+    all_samples = [sample for samples in latencies.values() for sample in samples]
+    return {
+        'documents': size,
+        'index_build_seconds': round(build_seconds, 2),
+        'requests': len(all_samples),
+        'errors': errors,
+        'throughput_rps': round(len(all_samples) / elapsed, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'latency_ms': {
+            group: {
+                'p50': percentile_ms(samples, 50),
+                'p95': percentile_ms(samples, 95),
+                'p99': percentile_ms(samples, 99),
+                'mean': round(float(np.mean(samples)) * 1000, 3)
+            }
+            for group, samples in dict(latencies, overall=all_samples).items()
+        },
+        f'recall_at_{TOP_K}': {
+            group: round(float(np.mean(values)), 4) for group, values in recalls.items() if values
+        },
+        'federated': federated
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search latency and relevance benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--rounds', type=int, default=20, help='每个查询重复的次数')
+    parser.add_argument('--cache', action='store_true', help='保留查询结果缓存（默认关闭以测量索引本身）')
+    parser.add_argument('--output', help='报告写入的文件，默认输出到标准输出')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_size(args.worker, args.rounds, args.cache)))
+        return
+
+    results = []
+    for size in args.sizes:
+        command = [sys.executable, os.path.abspath(__file__), '--worker', str(size), '--rounds', str(args.rounds)]
+        if args.cache:
+            command.append('--cache')
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+        print(f'{size} documents done', file=sys.stderr)
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'seed': SEED,
+        'rounds': args.rounds,
+        'cache_enabled': args.cache,
+        'top_k': TOP_K,
+        'results': results
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
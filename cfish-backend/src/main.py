@@ -7,7 +7,7 @@ from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
 from src.routes.user import user_bp
-from src.routes.nft import nft_bp
+from src.routes.nft import nft_bp, init_nft_catalog
 from src.routes.collection import collection_bp
 from src.routes.wallet import wallet_bp
 from src.routes.profile import profile_bp
@@ -23,6 +23,7 @@ from src.routes.activity_management import activity_management_bp
 from src.routes.intent_pool import intent_pool_bp
 from src.routes.auction_management import auction_management_bp
 from src.routes.dispute_resolution import dispute_resolution_bp
+from src.routes.stream import stream_bp
 
 from src.routes.notification import notification_bp
 
@@ -51,6 +52,7 @@ app.register_blueprint(activity_management_bp, url_prefix='/api')
 app.register_blueprint(intent_pool_bp, url_prefix='/api')
 app.register_blueprint(auction_management_bp, url_prefix='/api')
 app.register_blueprint(dispute_resolution_bp, url_prefix='/api')
+app.register_blueprint(stream_bp, url_prefix='/api')
 
 # uncomment if you need to use database
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
@@ -58,6 +60,7 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 with app.app_context():
     db.create_all()
+    init_nft_catalog()
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
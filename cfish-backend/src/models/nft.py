@@ -0,0 +1,59 @@
+from src.models.user import db
+
+class NFT(db.Model):
+    __tablename__ = 'nft'
+    __table_args__ = (
+        # 列表页的两条主要访问路径：按货币+分类+价格筛选排序、按货币+创建时间排序
+        db.Index('ix_nft_currency_category_price', 'currency', 'category', 'price'),
+        db.Index('ix_nft_currency_created_at', 'currency', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False)
+    description = db.Column(db.Text, nullable=False, default='')
+    image = db.Column(db.String(255), nullable=False, default='')
+    price = db.Column(db.Float, nullable=False)
+    currency = db.Column(db.String(10), nullable=False)
+    category = db.Column(db.String(40), nullable=False)
+    collection_id = db.Column(db.Integer, index=True)
+    creator = db.Column(db.JSON, nullable=False)
+    owner = db.Column(db.JSON, nullable=False)
+    commission = db.Column(db.Float, nullable=False, default=0.0)
+    rarity = db.Column(db.String(20), nullable=False)
+    likes = db.Column(db.Integer, nullable=False, default=0)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False)
+    attributes = db.Column(db.JSON, nullable=False, default=list)
+    tags = db.Column(db.JSON, nullable=False, default=list)
+    is_for_sale = db.Column(db.Boolean, nullable=False, default=False)
+    auction_end_time = db.Column(db.DateTime)
+    # 溯源事件存放在 provenance_event 表中，这里只保留事件计数和最近一次成交的摘要
+    history_seq = db.Column(db.Integer, nullable=False, default=0)
+    last_sale = db.Column(db.JSON)
+
+    def __repr__(self):
+        return f'<NFT {self.id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'image': self.image,
+            'price': self.price,
+            'currency': self.currency,
+            'category': self.category,
+            'collection_id': self.collection_id,
+            'creator': self.creator,
+            'owner': self.owner,
+            'commission': self.commission,
+            'rarity': self.rarity,
+            'likes': self.likes,
+            'views': self.views,
+            'created_at': self.created_at.isoformat(),
+            'attributes': self.attributes,
+            'tags': self.tags,
+            'is_for_sale': self.is_for_sale,
+            'auction_end_time': self.auction_end_time.isoformat() if self.auction_end_time else None,
+            'last_sale': self.last_sale
+        }
@@ -0,0 +1,53 @@
+from src.models.user import db
+
+class ProvenanceEvent(db.Model):
+    """NFT溯源记录：只追加，按 (nft_id, seq) 顺序存放铸造、挂单、成交、转移事件"""
+    __tablename__ = 'provenance_event'
+
+    EVENT_TYPES = ('mint', 'listing', 'sale', 'transfer')
+
+    nft_id = db.Column(db.Integer, db.ForeignKey('nft.id'), primary_key=True)
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    event_type = db.Column(db.String(20), nullable=False)
+    price = db.Column(db.Float)
+    currency = db.Column(db.String(10))
+    from_address = db.Column(db.String(120))
+    to_address = db.Column(db.String(120))
+    timestamp = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<ProvenanceEvent {self.nft_id}#{self.seq} {self.event_type}>'
+
+    @classmethod
+    def append(cls, nft, event_type, timestamp, price=None, currency=None, from_address=None, to_address=None):
+        """为 nft 追加一条事件（不提交），序号取自NFT上的计数器，成交时同时更新 last_sale"""
+        nft.history_seq = (nft.history_seq or 0) + 1
+        event = cls(
+            nft_id=nft.id,
+            seq=nft.history_seq,
+            event_type=event_type,
+            price=price,
+            currency=currency,
+            from_address=from_address,
+            to_address=to_address,
+            timestamp=timestamp
+        )
+        if event_type == 'sale':
+            nft.last_sale = {
+                'price': price,
+                'currency': currency,
+                'timestamp': timestamp.isoformat()
+            }
+        db.session.add(event)
+        return event
+
+    def to_dict(self):
+        return {
+            'seq': self.seq,
+            'type': self.event_type,
+            'price': self.price,
+            'currency': self.currency,
+            'from': self.from_address,
+            'to': self.to_address,
+            'timestamp': self.timestamp.isoformat()
+        }
@@ -7,16 +7,235 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
 import uuid
 import random
+import time
+from src.services.pagination import paginate
+from src.services.trait_index import trait_index, parse_trait_filters
+from src.services.bid_book import BidBook, BidError, bid_locks
+from src.services.auction_scheduler import auction_scheduler
+from src.services.event_bus import event_bus
+from src.services.dutch_pricing import dutch_index
 
 auction_management_bp = Blueprint('auction_management', __name__)
 
 # 模拟数据存储
 auctions = {}             # 拍卖数据
-auction_bids = {}         # 竞价记录
-auction_participants = {} # 拍卖参与者
+auction_books = {}        # 拍卖ID -> 竞价簿
+auction_bids = {}         # 竞价记录（竞价簿中的出价列表）
+auction_participants = {} # 拍卖参与者（竞价簿中按地址索引的参与者）
+auction_times = {}        # 拍卖ID -> [开始时间戳, 结束时间戳]，出价和排序时不再解析 ISO 字符串
 auction_analytics = {}    # 拍卖分析数据
 user_auction_history = {} # 用户拍卖历史
 
+# 荷兰式拍卖默认每小时降价一次
+DUTCH_STEP_SECONDS = 3600
+
+def get_bid_book(auction):
+    """获取拍卖的竞价簿，首次出价时以当前出价创建；调用方需持有该拍卖的锁"""
+    auction_id = auction['id']
+    book = auction_books.get(auction_id)
+    if book is None:
+        book = auction_books[auction_id] = BidBook(
+            auction['pricing']['current_bid'], auction['settings']['min_bid_increment']
+        )
+        auction_bids[auction_id] = book.bids
+        auction_participants[auction_id] = book.participants
+    return book
+
+def publish_auction(auction, event, **extra):
+    """向 auction:<ID> 主题推送拍卖的最新状态；调用方持有该拍卖的锁，推送顺序与出价序号一致"""
+    event_bus.publish(f"auction:{auction['id']}", event, {
+        "auction_id": auction['id'],
+        "status": auction['status'],
+        "current_bid": auction['pricing']['current_bid'],
+        "end_time": auction['timing']['end_time'],
+        **extra
+    })
+
+def notify_wallet(address, event, auction, **extra):
+    """向 notifications:<钱包地址> 主题推送与拍卖相关的通知"""
+    event_bus.publish(f"notifications:{address}", event, {
+        "auction_id": auction['id'],
+        "title": auction['title'],
+        "current_bid": auction['pricing']['current_bid'],
+        "currency": auction['pricing']['currency'],
+        **extra
+    })
+
+def register_auction(auction):
+    """缓存拍卖的起止时间，并在调度器中安排开始和结束事件"""
+    auction_id = auction['id']
+    start_ts = datetime.fromisoformat(auction['timing']['start_time']).timestamp()
+    end_ts = datetime.fromisoformat(auction['timing']['end_time']).timestamp()
+    auction_times[auction_id] = [start_ts, end_ts]
+    pricing = auction['pricing']
+    if auction['type'] == 'dutch' and auction['status'] in ('upcoming', 'active'):
+        dutch_index.add(auction_id, pricing['starting_price'], pricing['dutch_decrement'] or 0,
+                        pricing['dutch_step_seconds'] or DUTCH_STEP_SECONDS, pricing['dutch_floor_price'] or 0, start_ts)
+    if auction['status'] == 'upcoming':
+        auction_scheduler.schedule(auction_id, 'start', start_ts)
+    if auction['status'] in ('upcoming', 'active'):
+        auction_scheduler.schedule(auction_id, 'end', end_ts)
+    auction_scheduler.start()
+
+def with_dutch_price(auction, now):
+    """进行中的荷兰式拍卖按公式即时计算当前价格，返回带该价格的副本
+
+    共享的拍卖数据只在持有 bid_locks 的出价路径中写入，读取路径不修改。
+    """
+    if auction['type'] == 'dutch' and auction['status'] == 'active':
+        price = dutch_index.price(auction['id'], now)
+        if price is not None:
+            return {**auction, 'pricing': {**auction['pricing'], 'current_bid': price}}
+    return auction
+
+def start_auction(auction_id):
+    """调度器在开始时间调用：upcoming -> active"""
+    with bid_locks(auction_id):
+        auction = auctions.get(auction_id)
+        if auction and auction['status'] == 'upcoming':
+            auction['status'] = 'active'
+            publish_auction(auction, 'started')
+
+def end_auction(auction_id):
+    """调度器在结束时间（或一口价成交后）调用：结束拍卖并结算"""
+    with bid_locks(auction_id):
+        auction = auctions.get(auction_id)
+        if auction is None or auction['status'] == 'cancelled' or 'settlement' in auction:
+            return
+        
+        dutch_index.remove(auction_id)
+        
+        # 确定成交者：有出价且达到保留价时由最高出价者成交
+        book = auction_books.get(auction_id)
+        pricing = auction['pricing']
+        reserve_met = pricing['reserve_price'] is None or pricing['current_bid'] >= pricing['reserve_price']
+        winner = book.leader if book and reserve_met else None
+        if not book or book.leader is None:
+            outcome = 'no_bids'
+        elif not reserve_met:
+            outcome = 'reserve_not_met'
+        elif auction['type'] == 'dutch':
+            outcome = 'dutch_accepted'
+        elif pricing['buy_now_price'] is not None and pricing['current_bid'] >= pricing['buy_now_price']:
+            outcome = 'buy_now'
+        else:
+            outcome = 'highest_bid'
+        
+        auction['status'] = 'ended'
+        auction['timing']['time_remaining'] = 0
+        auction['settlement'] = {
+            "outcome": outcome,
+            "winner": winner,
+            "final_price": pricing['current_bid'] if winner else None,
+            "reserve_met": reserve_met,
+            "settled_at": datetime.now().isoformat()
+        }
+        publish_auction(auction, 'settled', settlement=auction['settlement'])
+        notify_wallet(auction['seller']['address'], 'auction_settled', auction, settlement=auction['settlement'])
+        if winner:
+            notify_wallet(winner, 'auction_won', auction, final_price=pricing['current_bid'])
+
+auction_scheduler.on('start', start_auction)
+auction_scheduler.on('end', end_auction)
+
+def generate_mock_auctions():
+    """首次访问时生成模拟拍卖数据"""
+    if auctions:
+        return
+    
+    auction_types = [
+        {"type": "english", "name": "英式拍卖", "description": "价高者得，公开竞价"},
+        {"type": "dutch", "name": "荷兰式拍卖", "description": "价格递减，先到先得"},
+        {"type": "sealed_bid", "name": "密封竞价", "description": "秘密出价，最高价获胜"},
+        {"type": "reserve", "name": "保留价拍卖", "description": "设定最低成交价"}
+    ]
+    
+    categories = ['Art', 'Gaming', 'Music', 'Sports', 'Collectibles', 'Utility', 'Photography']
+    currencies = ['SOL', 'CFISH']
+    
+    for i in range(80):
+        auction_type_info = random.choice(auction_types)
+        auction_id = f"auction_{i+1}"
+        
+        start_time = datetime.now() + timedelta(hours=random.randint(-48, 72))
+        duration_hours = random.randint(6, 168)  # 6小时到7天
+        end_time = start_time + timedelta(hours=duration_hours)
+        
+        current_time = datetime.now()
+        if start_time > current_time:
+            status_val = "upcoming"
+        elif end_time > current_time:
+            status_val = "active"
+        else:
+            status_val = "ended"
+        
+        starting_price = random.randint(10, 1000)
+        current_bid = starting_price + random.randint(0, 5000) if status_val != "upcoming" else starting_price
+        
+        auctions[auction_id] = {
+            "id": auction_id,
+            "title": f"Auction: {random.choice(['Rare', 'Epic', 'Legendary', 'Unique'])} NFT #{i+1}",
+            "description": f"High-quality NFT from {random.choice(categories)} collection",
+            "type": auction_type_info["type"],
+            "type_name": auction_type_info["name"],
+            "status": status_val,
+            "nft": {
+                "id": f"nft_{i+1}",
+                "name": f"NFT #{i+1}",
+                "collection": random.choice(categories),
+                "image": f"https://picsum.photos/500/500?random={i+300}",
+                "rarity": random.choice(['Common', 'Rare', 'Epic', 'Legendary']),
+                "traits": [
+                    {"trait_type": "Background", "value": random.choice(['Blue', 'Red', 'Green', 'Purple'])},
+                    {"trait_type": "Eyes", "value": random.choice(['Normal', 'Laser', 'Glowing'])},
+                    {"trait_type": "Mouth", "value": random.choice(['Smile', 'Frown', 'Open'])}
+                ]
+            },
+            "seller": {
+                "address": f"seller_{random.randint(1, 50)}",
+                "username": f"Seller{random.randint(1, 50)}",
+                "reputation": random.randint(70, 100),
+                "verified": random.choice([True, False])
+            },
+            "pricing": {
+                "currency": random.choice(currencies),
+                "starting_price": starting_price,
+                "current_bid": current_bid,
+                "reserve_price": starting_price + random.randint(100, 1000) if auction_type_info["type"] == "reserve" else None,
+                "buy_now_price": current_bid + random.randint(500, 2000) if random.choice([True, False]) else None,
+                "price_step": random.randint(5, 50),
+                "dutch_decrement": random.randint(10, 100) if auction_type_info["type"] == "dutch" else None,
+                "dutch_step_seconds": DUTCH_STEP_SECONDS if auction_type_info["type"] == "dutch" else None,
+                "dutch_floor_price": max(1, starting_price // 5) if auction_type_info["type"] == "dutch" else None
+            },
+            "timing": {
+                "created_at": (start_time - timedelta(hours=random.randint(1, 24))).isoformat(),
+                "start_time": start_time.isoformat(),
+                "end_time": end_time.isoformat(),
+                "time_remaining": max(0, (end_time - current_time).total_seconds()) if status_val == "active" else 0,
+                "auto_extend": random.choice([True, False]),
+                "extend_duration": 300  # 5分钟
+            },
+            "participation": {
+                "total_bids": random.randint(0, 100),
+                "unique_bidders": random.randint(0, 50),
+                "view_count": random.randint(10, 1000),
+                "watch_count": random.randint(0, 200)
+            },
+            "settings": {
+                "min_bid_increment": random.randint(5, 50),
+                "max_bid_increment": random.randint(100, 500),
+                "bid_deposit_required": random.choice([True, False]),
+                "deposit_amount": random.randint(50, 200),
+                "whitelist_only": random.choice([True, False]),
+                "kyc_required": random.choice([True, False])
+            },
+            "featured": random.choice([True, False]),
+            "tags": random.sample(['热门', '稀有', '艺术', '游戏', '收藏', '投资'], random.randint(2, 4))
+        }
+        trait_index('auctions').add(auction_id, auctions[auction_id]['nft']['traits'])
+        register_auction(auctions[auction_id])
+
 @auction_management_bp.route('/auctions', methods=['GET'])
 def get_auctions():
     """获取拍卖列表"""
@@ -30,97 +249,11 @@ def get_auctions():
         sort_by = request.args.get('sort_by', 'end_time')  # end_time, current_bid, start_time
         limit = int(request.args.get('limit', 20))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
+        traits = parse_trait_filters(request.args.get('traits'))  # 例如 Background:Blue,Eyes:Laser
         
         # 生成模拟拍卖数据
-        if not auctions:
-            auction_types = [
-                {"type": "english", "name": "英式拍卖", "description": "价高者得，公开竞价"},
-                {"type": "dutch", "name": "荷兰式拍卖", "description": "价格递减，先到先得"},
-                {"type": "sealed_bid", "name": "密封竞价", "description": "秘密出价，最高价获胜"},
-                {"type": "reserve", "name": "保留价拍卖", "description": "设定最低成交价"}
-            ]
-            
-            categories = ['Art', 'Gaming', 'Music', 'Sports', 'Collectibles', 'Utility', 'Photography']
-            currencies = ['SOL', 'CFISH']
-            
-            for i in range(80):
-                auction_type_info = random.choice(auction_types)
-                auction_id = f"auction_{i+1}"
-                
-                start_time = datetime.now() + timedelta(hours=random.randint(-48, 72))
-                duration_hours = random.randint(6, 168)  # 6小时到7天
-                end_time = start_time + timedelta(hours=duration_hours)
-                
-                current_time = datetime.now()
-                if start_time > current_time:
-                    status_val = "upcoming"
-                elif end_time > current_time:
-                    status_val = "active"
-                else:
-                    status_val = "ended"
-                
-                starting_price = random.randint(10, 1000)
-                current_bid = starting_price + random.randint(0, 5000) if status_val != "upcoming" else starting_price
-                
-                auctions[auction_id] = {
-                    "id": auction_id,
-                    "title": f"Auction: {random.choice(['Rare', 'Epic', 'Legendary', 'Unique'])} NFT #{i+1}",
-                    "description": f"High-quality NFT from {random.choice(categories)} collection",
-                    "type": auction_type_info["type"],
-                    "type_name": auction_type_info["name"],
-                    "status": status_val,
-                    "nft": {
-                        "id": f"nft_{i+1}",
-                        "name": f"NFT #{i+1}",
-                        "collection": random.choice(categories),
-                        "image": f"https://picsum.photos/500/500?random={i+300}",
-                        "rarity": random.choice(['Common', 'Rare', 'Epic', 'Legendary']),
-                        "traits": [
-                            {"trait_type": "Background", "value": random.choice(['Blue', 'Red', 'Green', 'Purple'])},
-                            {"trait_type": "Eyes", "value": random.choice(['Normal', 'Laser', 'Glowing'])},
-                            {"trait_type": "Mouth", "value": random.choice(['Smile', 'Frown', 'Open'])}
-                        ]
-                    },
-                    "seller": {
-                        "address": f"seller_{random.randint(1, 50)}",
-                        "username": f"Seller{random.randint(1, 50)}",
-                        "reputation": random.randint(70, 100),
-                        "verified": random.choice([True, False])
-                    },
-                    "pricing": {
-                        "currency": random.choice(currencies),
-                        "starting_price": starting_price,
-                        "current_bid": current_bid,
-                        "reserve_price": starting_price + random.randint(100, 1000) if auction_type_info["type"] == "reserve" else None,
-                        "buy_now_price": current_bid + random.randint(500, 2000) if random.choice([True, False]) else None,
-                        "price_step": random.randint(5, 50),
-                        "dutch_decrement": random.randint(10, 100) if auction_type_info["type"] == "dutch" else None
-                    },
-                    "timing": {
-                        "created_at": (start_time - timedelta(hours=random.randint(1, 24))).isoformat(),
-                        "start_time": start_time.isoformat(),
-                        "end_time": end_time.isoformat(),
-                        "time_remaining": max(0, (end_time - current_time).total_seconds()) if status_val == "active" else 0,
-                        "auto_extend": random.choice([True, False]),
-                        "extend_duration": 300  # 5分钟
-                    },
-                    "participation": {
-                        "total_bids": random.randint(0, 100),
-                        "unique_bidders": random.randint(0, 50),
-                        "view_count": random.randint(10, 1000),
-                        "watch_count": random.randint(0, 200)
-                    },
-                    "settings": {
-                        "min_bid_increment": random.randint(5, 50),
-                        "max_bid_increment": random.randint(100, 500),
-                        "bid_deposit_required": random.choice([True, False]),
-                        "deposit_amount": random.randint(50, 200),
-                        "whitelist_only": random.choice([True, False]),
-                        "kyc_required": random.choice([True, False])
-                    },
-                    "featured": random.choice([True, False]),
-                    "tags": random.sample(['热门', '稀有', '艺术', '游戏', '收藏', '投资'], random.randint(2, 4))
-                }
+        generate_mock_auctions()
         
         # 筛选拍卖
         filtered_auctions = list(auctions.values())
@@ -137,26 +270,39 @@ def get_auctions():
         if currency != 'all':
             filtered_auctions = [a for a in filtered_auctions if a['pricing']['currency'] == currency]
         
+        # 荷兰式拍卖的价格随时间下降，价格筛选和排序前按公式计算
+        now = time.time()
+        filtered_auctions = [with_dutch_price(a, now) for a in filtered_auctions]
+        
         if price_min is not None:
             filtered_auctions = [a for a in filtered_auctions if a['pricing']['current_bid'] >= price_min]
         
         if price_max is not None:
             filtered_auctions = [a for a in filtered_auctions if a['pricing']['current_bid'] <= price_max]
         
-        # 排序
+        if traits:
+            index = trait_index('auctions')
+            matched = set(index.ids(index.match(traits)))
+            filtered_auctions = [a for a in filtered_auctions if a['id'] in matched]
+        
+        # 排序：Featured拍卖优先，排序键以拍卖ID结尾保证游标位置唯一
         if sort_by == 'end_time':
-            filtered_auctions.sort(key=lambda x: x['timing']['end_time'])
+            sort_key = lambda x: (not x['featured'], x['timing']['end_time'], x['id'])
         elif sort_by == 'current_bid':
-            filtered_auctions.sort(key=lambda x: x['pricing']['current_bid'], reverse=True)
+            sort_key = lambda x: (not x['featured'], -x['pricing']['current_bid'], x['id'])
         elif sort_by == 'start_time':
-            filtered_auctions.sort(key=lambda x: x['timing']['start_time'], reverse=True)
-        
-        # Featured拍卖优先
-        filtered_auctions.sort(key=lambda x: not x['featured'])
+            sort_key = lambda x: (not x['featured'], -auction_times[x['id']][0], x['id'])
+        else:
+            sort_key = lambda x: (not x['featured'], x['id'])
         
         # 分页
         total = len(filtered_auctions)
-        paginated_auctions = filtered_auctions[offset:offset + limit]
+        try:
+            paginated_auctions, next_cursor = paginate(
+                filtered_auctions, sort_key, limit, offset=offset, cursor=cursor, sort_by=sort_by
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
         
         return jsonify({
             "success": True,
@@ -166,7 +312,66 @@ def get_auctions():
                     "total": total,
                     "limit": limit,
                     "offset": offset,
-                    "has_more": offset + limit < total
+                    "has_more": next_cursor is not None,
+                    "next_cursor": next_cursor
+                }
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@auction_management_bp.route('/auctions/dutch', methods=['GET'])
+def get_dutch_auctions():
+    """获取当前价格不高于 max_price 的进行中荷兰式拍卖，按当前价格从低到高排序"""
+    try:
+        max_price = request.args.get('max_price', type=float)
+        currency = request.args.get('currency', 'all')
+        limit = int(request.args.get('limit', 20))
+        offset = int(request.args.get('offset', 0))
+        
+        if max_price is None:
+            return jsonify({"success": False, "error": "max_price is required"}), 400
+        
+        generate_mock_auctions()
+        
+        # 价格阈值索引只返回已降到 max_price 以下的拍卖，不逐场计算价格
+        now = time.time()
+        matched = []
+        for auction_id, price in dutch_index.at_or_below(max_price, now):
+            auction = auctions.get(auction_id)
+            if auction is None or auction['status'] != 'active' or now >= auction_times[auction_id][1]:
+                continue
+            if currency != 'all' and auction['pricing']['currency'] != currency:
+                continue
+            matched.append((price, auction_id))
+        matched.sort()
+        
+        page = []
+        for price, auction_id in matched[offset:offset + limit]:
+            auction = auctions[auction_id]
+            pricing = auction['pricing']
+            step = pricing['dutch_step_seconds'] or DUTCH_STEP_SECONDS
+            start_ts = auction_times[auction_id][0]
+            at_floor = not pricing['dutch_decrement'] or price <= (pricing['dutch_floor_price'] or 0)
+            page.append({
+                **auction,
+                "pricing": {**pricing, "current_bid": price},
+                "next_price_drop_at": None if at_floor else datetime.fromtimestamp(
+                    start_ts + ((now - start_ts) // step + 1) * step
+                ).isoformat()
+            })
+        
+        return jsonify({
+            "success": True,
+            "data": {
+                "auctions": page,
+                "max_price": max_price,
+                "pagination": {
+                    "total": len(matched),
+                    "limit": limit,
+                    "offset": offset,
+                    "has_more": offset + limit < len(matched)
                 }
             }
         })
@@ -183,33 +388,39 @@ def get_auction_detail(auction_id):
         
         auction = auctions[auction_id]
         
-        # 获取竞价历史
-        bids = auction_bids.get(auction_id, [])
-        
-        # 获取参与者信息
-        participants = auction_participants.get(auction_id, [])
-        
-        # 计算实时统计
-        current_time = datetime.now()
-        end_time = datetime.fromisoformat(auction['timing']['end_time'])
-        time_remaining = max(0, (end_time - current_time).total_seconds())
-        
-        # 更新实时信息
-        auction['timing']['time_remaining'] = time_remaining
-        if time_remaining == 0 and auction['status'] == 'active':
-            auction['status'] = 'ended'
+        # 获取竞价历史和参与者信息，持锁读取保证快照一致
+        with bid_locks(auction_id):
+            bids = auction_bids.get(auction_id, [])
+            recent_bids = bids[-20:]  # 最近20个竞价
+            bid_count = len(bids)
+            book = auction_books.get(auction_id)
+            participants = [dict(p) for p in auction_participants.get(auction_id, {}).values()]
+            book_stats = {
+                "average_bid_increment": book.average_increment() if book else 0,
+                "leading_bidder": book.leader if book else None,
+                "second_price": book.second_price if book else None,
+                "last_sequence": book.sequence if book else 0
+            }
+            
+            # 计算实时统计；状态由调度器准时更新，这里不再改写
+            now = time.time()
+            start_ts, end_ts = auction_times[auction_id]
+            auction = with_dutch_price(auction, now)
+            time_remaining = max(0, end_ts - now) if auction['status'] == 'active' else 0
+            # 剩余时间只写进响应副本，不改动共享的拍卖数据
+            auction = {**auction, 'timing': {**auction['timing'], 'time_remaining': time_remaining}}
         
         return jsonify({
             "success": True,
             "data": {
                 **auction,
-                "bids": bids[-20:],  # 最近20个竞价
+                "bids": recent_bids,
                 "participants": participants,
                 "real_time_stats": {
                     "time_remaining": time_remaining,
                     "is_ending_soon": time_remaining < 3600,  # 1小时内结束
-                    "bid_frequency": len(bids) / max(1, (current_time - datetime.fromisoformat(auction['timing']['start_time'])).total_seconds() / 3600),
-                    "average_bid_increment": sum(b.get('increment', 0) for b in bids) / max(1, len(bids))
+                    "bid_frequency": bid_count / max(1, (now - start_ts) / 3600),
+                    **book_stats
                 }
             }
         })
@@ -261,7 +472,9 @@ def create_auction():
                 "reserve_price": data.get('reserve_price'),
                 "buy_now_price": data.get('buy_now_price'),
                 "price_step": data.get('price_step', 10),
-                "dutch_decrement": data.get('dutch_decrement')
+                "dutch_decrement": data.get('dutch_decrement'),
+                "dutch_step_seconds": data.get('dutch_step_seconds', DUTCH_STEP_SECONDS),
+                "dutch_floor_price": data.get('dutch_floor_price', data.get('reserve_price') or 0)
             },
             "timing": {
                 "created_at": datetime.now().isoformat(),
@@ -290,6 +503,8 @@ def create_auction():
         }
         
         auctions[auction_id] = auction
+        trait_index('auctions').add(auction_id, auction['nft']['traits'])
+        register_auction(auction)
         
         return jsonify({
             "success": True,
@@ -313,86 +528,69 @@ def place_bid(auction_id):
         
         auction = auctions[auction_id]
         
-        # 验证拍卖状态
-        if auction['status'] != 'active':
-            return jsonify({"success": False, "error": "Auction is not active"}), 400
-        
         # 验证必需字段
         required_fields = ['bidder_address', 'bid_amount']
         for field in required_fields:
             if field not in data:
                 return jsonify({"success": False, "error": f"Missing required field: {field}"}), 400
         
-        bid_amount = data['bid_amount']
-        current_bid = auction['pricing']['current_bid']
-        min_increment = auction['settings']['min_bid_increment']
-        
-        # 验证出价金额
-        if bid_amount <= current_bid:
-            return jsonify({"success": False, "error": "Bid must be higher than current bid"}), 400
-        
-        if bid_amount < current_bid + min_increment:
-            return jsonify({"success": False, "error": f"Minimum bid increment is {min_increment}"}), 400
-        
-        # 创建竞价记录
-        bid_id = str(uuid.uuid4())
-        bid = {
-            "id": bid_id,
-            "auction_id": auction_id,
-            "bidder_address": data['bidder_address'],
-            "bid_amount": bid_amount,
-            "increment": bid_amount - current_bid,
-            "timestamp": datetime.now().isoformat(),
-            "status": "active",
-            "transaction_hash": f"tx_{random.randint(100000, 999999)}",
-            "gas_fee": random.randint(1, 10) / 1000  # SOL gas fee
-        }
-        
-        # 保存竞价记录
-        if auction_id not in auction_bids:
-            auction_bids[auction_id] = []
-        auction_bids[auction_id].append(bid)
-        
-        # 更新拍卖信息
-        auction['pricing']['current_bid'] = bid_amount
-        auction['participation']['total_bids'] += 1
-        
-        # 更新参与者信息
-        if auction_id not in auction_participants:
-            auction_participants[auction_id] = []
-        
-        participants = auction_participants[auction_id]
-        bidder_exists = any(p['address'] == data['bidder_address'] for p in participants)
-        
-        if not bidder_exists:
-            participants.append({
-                "address": data['bidder_address'],
-                "username": data.get('bidder_username', ''),
-                "first_bid_at": datetime.now().isoformat(),
-                "total_bids": 1,
-                "highest_bid": bid_amount,
-                "is_leading": True
-            })
-            auction['participation']['unique_bidders'] += 1
-        else:
-            for p in participants:
-                if p['address'] == data['bidder_address']:
-                    p['total_bids'] += 1
-                    p['highest_bid'] = max(p['highest_bid'], bid_amount)
-                    p['is_leading'] = True
-                else:
-                    p['is_leading'] = False
-        
-        # 自动延时功能
-        if auction['timing']['auto_extend']:
-            end_time = datetime.fromisoformat(auction['timing']['end_time'])
-            current_time = datetime.now()
-            time_remaining = (end_time - current_time).total_seconds()
+        # 同一场拍卖的状态校验、出价和延时在该拍卖的锁内串行执行
+        with bid_locks(auction_id):
+            # 验证拍卖状态；已到结束时间但调度器尚未处理的拍卖同样拒绝
+            now = time.time()
+            if auction['status'] != 'active' or now >= auction_times[auction_id][1]:
+                return jsonify({"success": False, "error": "Auction is not active"}), 400
             
-            if time_remaining < auction['timing']['extend_duration']:
-                new_end_time = current_time + timedelta(seconds=auction['timing']['extend_duration'])
-                auction['timing']['end_time'] = new_end_time.isoformat()
-                auction['timing']['time_remaining'] = auction['timing']['extend_duration']
+            # 出价校验与写入由竞价簿完成，领先者和参与者按地址增量更新
+            book = get_bid_book(auction)
+            bid = {
+                "id": str(uuid.uuid4()),
+                "auction_id": auction_id,
+                "bidder_address": data['bidder_address'],
+                "bid_amount": data['bid_amount'],
+                "timestamp": datetime.now().isoformat(),
+                "status": "active",
+                "transaction_hash": f"tx_{random.randint(100000, 999999)}",
+                "gas_fee": random.randint(1, 10) / 1000  # SOL gas fee
+            }
+            previous_leader = book.leader
+            # 荷兰式拍卖：不低于当前价格的第一个出价直接成交
+            is_dutch = auction['type'] == 'dutch'
+            minimum = dutch_index.price(auction_id, now) if is_dutch else None
+            try:
+                is_new_bidder = book.place(bid, data.get('bidder_username', ''), minimum=minimum)
+            except BidError as e:
+                return jsonify({"success": False, "error": str(e)}), 400
+            
+            # 更新拍卖信息
+            auction['pricing']['current_bid'] = book.current_bid
+            auction['participation']['total_bids'] += 1
+            if is_new_bidder:
+                auction['participation']['unique_bidders'] += 1
+            
+            # 一口价或荷兰式拍卖成交：立即停止接受出价，结算交给调度器
+            buy_now_price = auction['pricing']['buy_now_price']
+            if is_dutch or (buy_now_price is not None and book.current_bid >= buy_now_price):
+                auction['status'] = 'ended'
+                auction['timing']['end_time'] = datetime.fromtimestamp(now).isoformat()
+                auction_times[auction_id][1] = now
+                auction_scheduler.schedule(auction_id, 'end', now)
+            
+            # 自动延时功能：结束前出价时把结束事件改期
+            elif auction['timing']['auto_extend']:
+                extend_duration = auction['timing']['extend_duration']
+                if auction_times[auction_id][1] - now < extend_duration:
+                    new_end_ts = now + extend_duration
+                    auction_times[auction_id][1] = new_end_ts
+                    auction['timing']['end_time'] = datetime.fromtimestamp(new_end_ts).isoformat()
+                    auction['timing']['time_remaining'] = extend_duration
+                    auction_scheduler.schedule(auction_id, 'end', new_end_ts)
+            
+            # 推送出价，并通知被超过的原领先者
+            publish_auction(auction, 'bid', bid=bid, leading_bidder=book.leader,
+                            second_price=book.second_price, sequence=book.sequence)
+            if previous_leader is not None and previous_leader != book.leader:
+                notify_wallet(previous_leader, 'outbid', auction, leading_bid=bid['bid_amount'])
         
         return jsonify({
             "success": True,
@@ -416,14 +614,11 @@ def get_auction_bids(auction_id):
         limit = int(request.args.get('limit', 50))
         offset = int(request.args.get('offset', 0))
         
-        bids = auction_bids.get(auction_id, [])
-        
-        # 按时间倒序排列
-        bids.sort(key=lambda x: x['timestamp'], reverse=True)
+        book = auction_books.get(auction_id)
         
-        # 分页
-        total = len(bids)
-        paginated_bids = bids[offset:offset + limit]
+        # 出价按时间顺序追加，倒序分页只需切片
+        total = len(book.bids) if book else 0
+        paginated_bids = book.latest(limit, offset) if book else []
         
         return jsonify({
             "success": True,
@@ -484,19 +679,24 @@ def cancel_auction(auction_id):
         if auction['seller']['address'] != seller_address:
             return jsonify({"success": False, "error": "Unauthorized"}), 403
         
-        # 验证状态
-        if auction['status'] not in ['upcoming', 'active']:
-            return jsonify({"success": False, "error": "Cannot cancel ended auction"}), 400
-        
-        # 检查是否有竞价
-        bids = auction_bids.get(auction_id, [])
-        if bids:
-            return jsonify({"success": False, "error": "Cannot cancel auction with existing bids"}), 400
-        
-        # 取消拍卖
-        auction['status'] = 'cancelled'
-        auction['cancelled_at'] = datetime.now().isoformat()
-        auction['cancellation_reason'] = data.get('reason', 'Cancelled by seller')
+        # 状态检查与取消在拍卖的锁内进行，不会与出价或调度事件交错
+        with bid_locks(auction_id):
+            # 验证状态
+            if auction['status'] not in ['upcoming', 'active']:
+                return jsonify({"success": False, "error": "Cannot cancel ended auction"}), 400
+            
+            # 检查是否有竞价
+            bids = auction_bids.get(auction_id, [])
+            if bids:
+                return jsonify({"success": False, "error": "Cannot cancel auction with existing bids"}), 400
+            
+            # 取消拍卖
+            auction['status'] = 'cancelled'
+            auction['cancelled_at'] = datetime.now().isoformat()
+            auction['cancellation_reason'] = data.get('reason', 'Cancelled by seller')
+            auction_scheduler.cancel(auction_id, 'start', 'end')
+            dutch_index.remove(auction_id)
+            publish_auction(auction, 'cancelled', reason=auction['cancellation_reason'])
         
         return jsonify({
             "success": True,
@@ -532,18 +732,17 @@ def get_user_auctions(user_address):
         
         if role in ['all', 'bidder']:
             # 作为竞拍者的拍卖
-            for auction_id, participants in auction_participants.items():
-                for participant in participants:
-                    if participant['address'] == user_address:
-                        auction = auctions[auction_id]
-                        user_auctions.append({
-                            **auction,
-                            "user_role": "bidder",
-                            "user_status": "leading" if participant['is_leading'] else "outbid",
-                            "user_highest_bid": participant['highest_bid'],
-                            "user_total_bids": participant['total_bids']
-                        })
-                        break
+            for auction_id, participants in list(auction_participants.items()):
+                participant = participants.get(user_address)
+                if participant:
+                    auction = auctions[auction_id]
+                    user_auctions.append({
+                        **auction,
+                        "user_role": "bidder",
+                        "user_status": "leading" if participant['is_leading'] else "outbid",
+                        "user_highest_bid": participant['highest_bid'],
+                        "user_total_bids": participant['total_bids']
+                    })
         
         # 筛选状态
         if status != 'all':
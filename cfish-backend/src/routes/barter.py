@@ -7,6 +7,7 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
 import uuid
 import random
+from src.services.pagination import paginate, KeysetIndex
 
 barter_bp = Blueprint('barter', __name__)
 
@@ -15,6 +16,8 @@ barter_requests = {}  # 易货请求
 barter_matches = {}   # 匹配结果
 barter_history = {}   # 交易历史
 user_preferences = {} # 用户偏好
+# 易货请求按创建时间排序，排序键以请求ID结尾保证游标位置唯一
+request_order = KeysetIndex(barter_requests, lambda x: (x['created_at'], x['id']))
 
 @barter_bp.route('/requests', methods=['GET'])
 def get_barter_requests():
@@ -25,6 +28,7 @@ def get_barter_requests():
         category = request.args.get('category')
         limit = int(request.args.get('limit', 20))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
         
         # 生成模拟数据
         if not barter_requests:
@@ -60,6 +64,7 @@ def get_barter_requests():
                     "auto_match": random.choice([True, False]),
                     "negotiable": random.choice([True, False])
                 }
+                request_order.add(barter_requests[request_id])
         
         # 筛选数据
         filtered_requests = list(barter_requests.values())
@@ -75,9 +80,15 @@ def get_barter_requests():
                                if any(nft['collection'].lower().find(category.lower()) != -1 
                                      for nft in [r['offered_nft']] + r['desired_nfts'])]
         
-        # 分页
+        # 分页：最新创建的在前
         total = len(filtered_requests)
-        paginated_requests = filtered_requests[offset:offset + limit]
+        try:
+            paginated_requests, next_cursor = paginate(
+                filtered_requests, request_order.key, limit, offset=offset, cursor=cursor,
+                sort_by='created_at', reverse=True, index=request_order
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
         
         return jsonify({
             "success": True,
@@ -87,7 +98,8 @@ def get_barter_requests():
                     "total": total,
                     "limit": limit,
                     "offset": offset,
-                    "has_more": offset + limit < total
+                    "has_more": next_cursor is not None,
+                    "next_cursor": next_cursor
                 }
             }
         })
@@ -126,6 +138,7 @@ def create_barter_request():
         }
         
         barter_requests[request_id] = barter_request
+        request_order.add(barter_requests[request_id])
         
         # 如果启用自动匹配，立即寻找匹配
         if barter_request['auto_match']:
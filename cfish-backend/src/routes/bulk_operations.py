@@ -5,14 +5,80 @@
 
 from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
+import itertools
+import logging
+import threading
+import time
 import uuid
 import random
+from src.services.pagination import paginate, KeysetIndex
+from src.services.streaming import wants_ndjson, ndjson_response
+from src.services.event_bus import event_bus
 
 bulk_operations_bp = Blueprint('bulk_operations', __name__)
+logger = logging.getLogger(__name__)
 
 # 模拟数据存储
 bulk_jobs = {}  # 批量任务
 operation_history = {}  # 操作历史
+# 任务列表按创建时间排序，排序键以任务ID结尾保证游标位置唯一
+job_order = KeysetIndex(bulk_jobs, lambda x: (x['created_at'], x['id']))
+
+# 处理中任务的进度推进间隔（秒）
+JOB_TICK_SECONDS = 1
+job_runner = None
+# 后台线程与请求线程都会修改任务状态，检查和修改状态需持有此锁
+job_lock = threading.Lock()
+
+def publish_job(job, event):
+    """向 job:<任务ID> 主题推送任务进度"""
+    event_bus.publish(f"job:{job['id']}", event, {
+        "job_id": job['id'],
+        "status": job['status'],
+        "processed_items": job['processed_items'],
+        "total_items": job['total_items'],
+        "successful_items": job['successful_items'],
+        "failed_items": job['failed_items'],
+        "progress_percentage": job['progress_percentage'],
+        "completed_at": job['completed_at']
+    })
+
+def advance_job(job):
+    """模拟处理进度，进度有变化时推送；在锁内重新检查状态，避免覆盖刚被取消或重置的任务"""
+    with job_lock:
+        if job['status'] != 'processing':
+            return
+        processed = min(job['total_items'], job['processed_items'] + random.randint(0, 3))
+        if processed == job['processed_items'] and processed < job['total_items']:
+            return
+        job['processed_items'] = processed
+        job['progress_percentage'] = int((processed / job['total_items']) * 100) if job['total_items'] else 100
+        
+        if job['processed_items'] >= job['total_items']:
+            job['status'] = 'completed'
+            job['completed_at'] = datetime.now().isoformat()
+            job['successful_items'] = job['total_items'] - len(job['errors'])
+            job['failed_items'] = len(job['errors'])
+            publish_job(job, 'completed')
+        else:
+            publish_job(job, 'progress')
+
+def run_jobs():
+    """后台线程：定时推进所有处理中的任务，客户端通过推送获取进度，不需要轮询"""
+    while True:
+        time.sleep(JOB_TICK_SECONDS)
+        for job in list(bulk_jobs.values()):
+            try:
+                advance_job(job)
+            except Exception:
+                # 单个任务处理失败不影响其他任务，也不能让线程退出
+                logger.exception('Bulk job %s failed to advance', job.get('id'))
+
+def start_job_runner():
+    global job_runner
+    if job_runner is None:
+        job_runner = threading.Thread(target=run_jobs, name='bulk-jobs', daemon=True)
+        job_runner.start()
 
 @bulk_operations_bp.route('/jobs', methods=['GET'])
 def get_bulk_jobs():
@@ -23,6 +89,7 @@ def get_bulk_jobs():
         operation_type = request.args.get('operation_type')
         limit = int(request.args.get('limit', 20))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
         
         # 生成模拟数据
         if not bulk_jobs:
@@ -55,6 +122,8 @@ def get_bulk_jobs():
                         {"item_id": f"nft_{random.randint(1, 1000)}", "error": "NFT not owned"}
                     ]
                 }
+                job_order.add(bulk_jobs[job_id])
+            start_job_runner()
         
         # 筛选数据
         filtered_jobs = list(bulk_jobs.values())
@@ -68,9 +137,15 @@ def get_bulk_jobs():
         if operation_type:
             filtered_jobs = [j for j in filtered_jobs if j['operation_type'] == operation_type]
         
-        # 分页
+        # 分页：最新创建的在前
         total = len(filtered_jobs)
-        paginated_jobs = filtered_jobs[offset:offset + limit]
+        try:
+            paginated_jobs, next_cursor = paginate(
+                filtered_jobs, job_order.key, limit, offset=offset, cursor=cursor,
+                sort_by='created_at', reverse=True, index=job_order
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
         
         return jsonify({
             "success": True,
@@ -80,7 +155,8 @@ def get_bulk_jobs():
                     "total": total,
                     "limit": limit,
                     "offset": offset,
-                    "has_more": offset + limit < total
+                    "has_more": next_cursor is not None,
+                    "next_cursor": next_cursor
                 }
             }
         })
@@ -109,6 +185,8 @@ def create_bulk_job():
         
         # 验证NFT所有权（模拟）
         nft_ids = data['nft_ids']
+        if not nft_ids:
+            return jsonify({"success": False, "error": "nft_ids must not be empty"}), 400
         if len(nft_ids) > 100:
             return jsonify({"success": False, "error": "Maximum 100 NFTs per batch operation"}), 400
         
@@ -139,6 +217,7 @@ def create_bulk_job():
         }
         
         bulk_jobs[job_id] = bulk_job
+        job_order.add(bulk_jobs[job_id])
         
         return jsonify({
             "success": True,
@@ -160,17 +239,7 @@ def get_bulk_job(job_id):
         
         job = bulk_jobs[job_id]
         
-        # 模拟进度更新
-        if job['status'] == 'processing':
-            job['processed_items'] = min(job['total_items'], job['processed_items'] + random.randint(0, 3))
-            job['progress_percentage'] = int((job['processed_items'] / job['total_items']) * 100)
-            
-            if job['processed_items'] >= job['total_items']:
-                job['status'] = 'completed'
-                job['completed_at'] = datetime.now().isoformat()
-                job['successful_items'] = job['total_items'] - len(job['errors'])
-                job['failed_items'] = len(job['errors'])
-        
+        # 进度由后台线程推进并推送，这里只读取
         return jsonify({
             "success": True,
             "data": job
@@ -188,12 +257,15 @@ def start_bulk_job(job_id):
         
         job = bulk_jobs[job_id]
         
-        if job['status'] != 'pending':
-            return jsonify({"success": False, "error": f"Job cannot be started. Current status: {job['status']}"}), 400
-        
-        # 更新任务状态
-        job['status'] = 'processing'
-        job['started_at'] = datetime.now().isoformat()
+        with job_lock:
+            if job['status'] != 'pending':
+                return jsonify({"success": False, "error": f"Job cannot be started. Current status: {job['status']}"}), 400
+            
+            # 更新任务状态
+            job['status'] = 'processing'
+            job['started_at'] = datetime.now().isoformat()
+            publish_job(job, 'started')
+        start_job_runner()
         
         # 模拟开始处理
         return jsonify({
@@ -216,12 +288,14 @@ def cancel_bulk_job(job_id):
         
         job = bulk_jobs[job_id]
         
-        if job['status'] not in ['pending', 'processing']:
-            return jsonify({"success": False, "error": f"Job cannot be cancelled. Current status: {job['status']}"}), 400
-        
-        # 更新任务状态
-        job['status'] = 'cancelled'
-        job['completed_at'] = datetime.now().isoformat()
+        with job_lock:
+            if job['status'] not in ['pending', 'processing']:
+                return jsonify({"success": False, "error": f"Job cannot be cancelled. Current status: {job['status']}"}), 400
+            
+            # 更新任务状态
+            job['status'] = 'cancelled'
+            job['completed_at'] = datetime.now().isoformat()
+            publish_job(job, 'cancelled')
         
         return jsonify({
             "success": True,
@@ -243,18 +317,20 @@ def retry_bulk_job(job_id):
         
         job = bulk_jobs[job_id]
         
-        if job['status'] != 'failed':
-            return jsonify({"success": False, "error": f"Job cannot be retried. Current status: {job['status']}"}), 400
-        
-        # 重置任务状态
-        job['status'] = 'pending'
-        job['processed_items'] = 0
-        job['successful_items'] = 0
-        job['failed_items'] = 0
-        job['progress_percentage'] = 0
-        job['started_at'] = None
-        job['completed_at'] = None
-        job['errors'] = []
+        with job_lock:
+            if job['status'] != 'failed':
+                return jsonify({"success": False, "error": f"Job cannot be retried. Current status: {job['status']}"}), 400
+            
+            # 重置任务状态
+            job['status'] = 'pending'
+            job['processed_items'] = 0
+            job['successful_items'] = 0
+            job['failed_items'] = 0
+            job['progress_percentage'] = 0
+            job['started_at'] = None
+            job['completed_at'] = None
+            job['errors'] = []
+            publish_job(job, 'reset')
         
         return jsonify({
             "success": True,
@@ -434,13 +510,20 @@ def get_operation_history():
                 }
         
         # 筛选数据
-        filtered_history = list(operation_history.values())
-        
-        if user_address:
-            filtered_history = [h for h in filtered_history if h['user_address'] == user_address]
-        
-        if operation_type:
-            filtered_history = [h for h in filtered_history if h['operation_type'] == operation_type]
+        filtered_history = [
+            h for h in operation_history.values()
+            if (not user_address or h['user_address'] == user_address)
+            and (not operation_type or h['operation_type'] == operation_type)
+        ]
+        
+        # NDJSON 格式逐行流式返回，未指定 limit 时返回 offset 之后的全部记录
+        if wants_ndjson():
+            stream_limit = request.args.get('limit', type=int)
+            end = None if stream_limit is None else offset + stream_limit
+            return ndjson_response(
+                itertools.islice(filtered_history, offset, end),
+                headers={'X-Total-Count': str(len(filtered_history))}
+            )
         
         # 分页
         total = len(filtered_history)
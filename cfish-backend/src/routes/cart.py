@@ -39,6 +39,14 @@ def get_cart(user_address):
     end_idx = start_idx + limit
     paginated_items = cart_items[start_idx:end_idx]
     
+    # 当前页的NFT一次批量读取，目录中的NFT刷新为最新信息和可售状态
+    from src.routes.nft import nft_loader
+    rows = nft_loader().load_many([item['nft_id'] for item in paginated_items])
+    for item, row in zip(paginated_items, rows):
+        if row is not None:
+            item['nft'] = row.to_dict()
+            item['is_available'] = row.is_for_sale
+    
     # 计算总价
     total_sol = sum(item['price_at_time'] for item in cart_items if item['currency_at_time'] == 'SOL' and item['is_available'])
     total_cfish = sum(item['price_at_time'] for item in cart_items if item['currency_at_time'] == 'CFISH' and item['is_available'])
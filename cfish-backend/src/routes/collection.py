@@ -1,9 +1,28 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime, timedelta
 import random
+from src.models.user import db
+from src.models.nft import NFT
+from src.models.provenance import ProvenanceEvent
+from src.services.pagination import decode_cursor, encode_cursor
+from src.services.collection_stats import collection_stats, INDEXED_FIELDS
+from src.services.price_history import price_history, RANGES
+from src.services.response_cache import detail_cache
+from src.services.trait_index import trait_index, parse_trait_filters
+from src.services.autocomplete import autocomplete
 
 collection_bp = Blueprint('collection', __name__)
 
+# 合集目录（首次访问时生成，之后各接口共享同一份数据）
+TOTAL_COLLECTIONS = 500
+collections = {}
+
+COLLECTION_CATEGORIES = ['Art', 'Gaming', 'Music', 'Photography', 'Sports', 'Collectibles']
+# 由统计引擎实时维护的字段
+STATS_FIELDS = ['floor_price', 'volume_24h', 'volume_7d', 'volume_total', 'items', 'owners', 'listed']
+# 合集详情中最近动态的条数
+RECENT_ACTIVITY_LIMIT = 10
+
 def generate_mock_collection(collection_id=None):
     if collection_id is None:
         collection_id = random.randint(1, 1000)
@@ -30,7 +49,7 @@ def generate_mock_collection(collection_id=None):
         'owners': random.randint(50, 5000),
         'listed': random.randint(10, 1000),
         'created_at': (datetime.now() - timedelta(days=random.randint(30, 365))).isoformat(),
-        'category': random.choice(['Art', 'Gaming', 'Music', 'Photography', 'Sports', 'Collectibles']),
+        'category': random.choice(COLLECTION_CATEGORIES),
         'blockchain': 'Solana',
         'royalty': round(random.uniform(2.5, 10.0), 1),
         'verified': random.choice([True, False]),
@@ -46,50 +65,82 @@ def generate_mock_collection(collection_id=None):
         }
     }
 
+def get_collection_catalog():
+    """获取合集目录，首次调用时生成"""
+    if not collections:
+        for i in range(1, TOTAL_COLLECTIONS + 1):
+            collections[i] = generate_mock_collection(i)
+            collection_stats.register_collection(i, collections[i]['category'], collections[i]['name'])
+            autocomplete.put('collection', collections[i]['name'], collection_stats.snapshot(i)['volume_total'], collection_id=i)
+    return collections
+
+def with_stats(collection):
+    """返回合集的副本，统计字段替换为统计引擎中的实时数据"""
+    stats = collection_stats.snapshot(collection['id'])
+    collection = dict(collection)
+    collection.update({field: stats[field] for field in STATS_FIELDS})
+    collection['stats'] = dict(
+        collection['stats'],
+        avg_price=round(stats['volume_total'] / stats['sales'], 2) if stats['sales'] else 0.0,
+        market_cap=round((stats['floor_price'] or 0.0) * stats['items'], 2)
+    )
+    return collection
+
 @collection_bp.route('/collections', methods=['GET'])
 def get_collections():
     """获取合集列表"""
     page = int(request.args.get('page', 1))
     limit = int(request.args.get('limit', 20))
+    cursor = request.args.get('cursor')
     sort_by = request.args.get('sort_by', 'volume_24h')
     order = request.args.get('order', 'desc')
     category = request.args.get('category')
     search = request.args.get('search')
     
-    # 生成模拟数据
-    total_collections = 500
-    collections = []
+    catalog = get_collection_catalog()
+    if sort_by not in INDEXED_FIELDS:
+        sort_by, order = 'volume_24h', 'desc'
+    sort_tag = f'{sort_by}_{order}'
     
-    for i in range((page - 1) * limit, min(page * limit, total_collections)):
-        collection = generate_mock_collection(i + 1)
-        
-        # 应用筛选条件
-        if category and collection['category'].lower() != category.lower():
-            continue
-        if search and search.lower() not in collection['name'].lower():
-            continue
-            
-        collections.append(collection)
-    
-    # 排序
-    if sort_by == 'volume_24h':
-        collections.sort(key=lambda x: x['volume_24h'], reverse=(order == 'desc'))
-    elif sort_by == 'floor_price':
-        collections.sort(key=lambda x: x['floor_price'], reverse=(order == 'desc'))
-    elif sort_by == 'items':
-        collections.sort(key=lambda x: x['items'], reverse=(order == 'desc'))
-    elif sort_by == 'name':
-        collections.sort(key=lambda x: x['name'], reverse=(order == 'desc'))
+    # 分类筛选直接使用分类索引，名称搜索在读取索引时逐条检查
+    if category:
+        category = next((c for c in COLLECTION_CATEGORIES if c.lower() == category.lower()), category)
+    predicate = None
+    if search:
+        predicate = lambda collection_id: search.lower() in catalog[collection_id]['name'].lower()
+        total_collections = sum(
+            1 for c in catalog.values()
+            if (not category or c['category'] == category) and predicate(c['id'])
+        )
+    else:
+        total_collections = collection_stats.count(category)
+    
+    try:
+        after = decode_cursor(cursor, sort_tag) if cursor else None
+        collection_ids, next_key = collection_stats.page(
+            sort_by, descending=order == 'desc', category=category,
+            offset=0 if cursor else (page - 1) * limit, limit=limit,
+            after=after, predicate=predicate
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e) if isinstance(e, ValueError) else 'Invalid cursor'
+        }), 400
+    
+    paginated_collections = [with_stats(catalog[collection_id]) for collection_id in collection_ids]
+    next_cursor = encode_cursor(sort_tag, next_key) if next_key else None
     
     return jsonify({
         'success': True,
         'data': {
-            'collections': collections[:limit],
+            'collections': paginated_collections,
             'pagination': {
                 'page': page,
                 'limit': limit,
                 'total': total_collections,
-                'pages': (total_collections + limit - 1) // limit
+                'pages': (total_collections + limit - 1) // limit,
+                'next_cursor': next_cursor
             }
         }
     })
@@ -97,32 +148,76 @@ def get_collections():
 @collection_bp.route('/collections/<int:collection_id>', methods=['GET'])
 def get_collection_detail(collection_id):
     """获取合集详情"""
-    collection = generate_mock_collection(collection_id)
+    range_name = request.args.get('range', '30d')
+    
+    if range_name not in RANGES:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid range'
+        }), 400
+    
+    # 不在目录中的合集是随机生成的模拟数据，不缓存
+    if collection_id not in get_collection_catalog():
+        return jsonify({
+            'success': True,
+            'data': build_collection_detail(collection_id, range_name)
+        })
+    
+    # 成交量窗口过期会改变统计版本，价格历史的时间窗口随桶滚动，二者都计入缓存变体
+    variant = f'{range_name}:{price_history.bucket(range_name)}:{collection_stats.version(collection_id)}'
+    return detail_cache.respond(
+        'collection', collection_id,
+        lambda: build_collection_detail(collection_id, range_name), variant
+    )
+
+def build_collection_detail(collection_id, range_name):
+    """组装合集详情（目录中的合集由详情缓存按版本缓存）"""
+    catalog = get_collection_catalog()
+    collection = with_stats(catalog[collection_id]) if collection_id in catalog else generate_mock_collection(collection_id)
     
-    # 添加更多详细信息
+    # 最近动态取自目录中该合集NFT的溯源记录
+    recent = (
+        db.session.query(ProvenanceEvent, NFT.name)
+        .join(NFT, NFT.id == ProvenanceEvent.nft_id)
+        .filter(NFT.collection_id == collection_id)
+        .order_by(ProvenanceEvent.timestamp.desc())
+        .limit(RECENT_ACTIVITY_LIMIT)
+    )
     collection.update({
         'activity': [
             {
-                'type': random.choice(['sale', 'listing', 'offer', 'transfer']),
-                'nft_name': f'NFT #{random.randint(1, 1000)}',
-                'price': round(random.uniform(0.1, 10.0), 2),
-                'from': random.choice(['User1', 'User2', 'User3']),
-                'to': random.choice(['Buyer1', 'Buyer2', 'Buyer3']),
-                'timestamp': (datetime.now() - timedelta(hours=random.randint(1, 72))).isoformat()
-            } for _ in range(10)
+                'type': event.event_type,
+                'nft_name': nft_name,
+                'price': event.price,
+                'from': event.from_address,
+                'to': event.to_address,
+                'timestamp': event.timestamp.isoformat()
+            } for event, nft_name in recent
         ],
-        'price_history': [
-            {
-                'date': (datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d'),
-                'floor_price': round(random.uniform(0.5, 5.0), 2),
-                'volume': round(random.uniform(10, 500), 2)
-            } for i in range(30, 0, -1)
-        ]
+        'price_history': price_history.query(collection_id, range_name)
     })
+    return collection
+
+@collection_bp.route('/collections/<int:collection_id>/price-history', methods=['GET'])
+def get_collection_price_history(collection_id):
+    """获取合集地板价和成交额的 OHLC 历史"""
+    range_name = request.args.get('range', '30d')
+    
+    try:
+        history = price_history.query(collection_id, range_name)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     
     return jsonify({
         'success': True,
-        'data': collection
+        'data': {
+            'collection_id': collection_id,
+            'range': range_name,
+            'points': history
+        }
     })
 
 @collection_bp.route('/collections/featured', methods=['GET'])
@@ -145,18 +240,21 @@ def get_featured_collections():
 @collection_bp.route('/collections/trending', methods=['GET'])
 def get_trending_collections():
     """获取热门合集"""
+    from src.services.ranking import ranking_service
+    
     limit = int(request.args.get('limit', 10))
     
+    # 读取后台物化好的合集热门榜（已按热门度排序）
+    catalog = get_collection_catalog()
     trending_collections = []
-    for i in range(limit):
-        collection = generate_mock_collection(random.randint(1, 500))
-        collection['trending_score'] = random.randint(80, 100)
+    for collection_id, score in ranking_service.top('collections', limit):
+        if collection_id not in catalog:
+            continue
+        collection = with_stats(catalog[collection_id])
+        collection['trending_score'] = round(score, 2)
         collection['volume_change'] = round(random.uniform(10, 200), 2)
         trending_collections.append(collection)
     
-    # 按热门度排序
-    trending_collections.sort(key=lambda x: x['trending_score'], reverse=True)
-    
     return jsonify({
         'success': True,
         'data': trending_collections
@@ -165,33 +263,54 @@ def get_trending_collections():
 @collection_bp.route('/collections/<int:collection_id>/nfts', methods=['GET'])
 def get_collection_nfts(collection_id):
     """获取合集中的NFT"""
-    from src.routes.nft import generate_mock_nft
+    from src.routes.nft import load_nfts, load_nfts_or_mock
+    from src.services.listing_engine import listing_engine
     
     page = int(request.args.get('page', 1))
     limit = int(request.args.get('limit', 20))
     sort_by = request.args.get('sort_by', 'price')
     order = request.args.get('order', 'desc')
+    traits = parse_trait_filters(request.args.get('traits'))  # 例如 Background:Blue,Background:Red,Style:Abstract
     
-    # 生成合集中的NFT
-    total_nfts = random.randint(100, 1000)
-    nfts = []
-    
-    for i in range((page - 1) * limit, min(page * limit, total_nfts)):
-        nft = generate_mock_nft(collection_id * 1000 + i + 1)
-        nft['collection_id'] = collection_id
-        nfts.append(nft)
+    index = trait_index(('collection', collection_id), create=False)
+    trait_counts = None
     
-    # 排序
-    if sort_by == 'price':
-        nfts.sort(key=lambda x: x['price'], reverse=(order == 'desc'))
-    elif sort_by == 'rarity':
-        rarity_order = {'Common': 1, 'Uncommon': 2, 'Rare': 3, 'Epic': 4, 'Legendary': 5}
-        nfts.sort(key=lambda x: rarity_order.get(x['rarity'], 0), reverse=(order == 'desc'))
+    if index is not None:
+        # 目录中的合集：特征筛选为位图运算，稀有度排序读取预先算好的统计稀有度排名
+        matched = index.match(traits)
+        total_nfts = matched.bit_count()
+        offset = (page - 1) * limit
+        if sort_by == 'rarity':
+            nft_ids = index.ranked(matched, offset, limit, rarest_first=(order == 'desc'))
+        else:
+            nft_ids, _, _ = listing_engine.query(
+                {'ids': index.ids(matched)}, sort_by='price', order=order,
+                limit=limit, offset=offset, cfish_first=False
+            )
+        nfts = load_nfts(nft_ids)
+        for nft in nfts:
+            nft['rarity_score'], nft['rarity_rank'] = index.rarity(nft['id'])
+        trait_counts = index.counts(matched)
+    else:
+        # 不在目录中的合集仍返回模拟数据
+        total_nfts = random.randint(100, 1000)
+        nft_ids = [collection_id * 1000 + i + 1 for i in range((page - 1) * limit, min(page * limit, total_nfts))]
+        nfts = load_nfts_or_mock(nft_ids)
+        for nft in nfts:
+            nft['collection_id'] = collection_id
+        
+        # 排序
+        if sort_by == 'price':
+            nfts.sort(key=lambda x: x['price'], reverse=(order == 'desc'))
+        elif sort_by == 'rarity':
+            rarity_order = {'Common': 1, 'Uncommon': 2, 'Rare': 3, 'Epic': 4, 'Legendary': 5}
+            nfts.sort(key=lambda x: rarity_order.get(x['rarity'], 0), reverse=(order == 'desc'))
     
     return jsonify({
         'success': True,
         'data': {
             'nfts': nfts[:limit],
+            'trait_counts': trait_counts,
             'pagination': {
                 'page': page,
                 'limit': limit,
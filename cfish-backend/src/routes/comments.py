@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime, timedelta
 import random
+from src.services.response_cache import detail_cache
 
 comments_bp = Blueprint('comments', __name__)
 
@@ -147,6 +148,8 @@ def add_comment(nft_id):
         if parent_comment:
             parent_comment['replies_count'] += 1
     
+    detail_cache.invalidate('nft', nft_id)
+    
     return jsonify({
         'success': True,
         'data': {
@@ -241,6 +244,8 @@ def delete_comment(comment_id):
             'error': 'Comment not found'
         }), 404
     
+    detail_cache.invalidate('nft', nft_id)
+    
     return jsonify({
         'success': True,
         'data': {
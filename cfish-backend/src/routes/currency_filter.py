@@ -36,7 +36,8 @@ def get_supported_currencies():
 @currency_filter_bp.route('/nfts/by-currency/<currency_code>', methods=['GET'])
 def get_nfts_by_currency(currency_code):
     """根据货币类型获取NFT列表"""
-    from src.routes.nft import generate_mock_nft
+    from src.routes.nft import load_nfts
+    from src.services.listing_engine import listing_engine
     
     page = int(request.args.get('page', 1))
     limit = int(request.args.get('limit', 20))
@@ -50,34 +51,17 @@ def get_nfts_by_currency(currency_code):
             'error': 'Unsupported currency type'
         }), 400
     
-    # 生成指定货币的NFT数据
-    total_nfts = random.randint(100, 500)
-    nfts = []
-    
-    for i in range((page - 1) * limit, min(page * limit, total_nfts)):
-        nft = generate_mock_nft(i + 1)
-        nft['currency'] = currency_code.upper()  # 强制设置为指定货币
-        
-        # 根据货币类型调整价格范围
-        if currency_code.upper() == 'SOL':
-            nft['price'] = round(random.uniform(0.1, 50.0), 2)
-        else:  # CFISH
-            nft['price'] = round(random.uniform(100, 50000), 2)
-        
-        nfts.append(nft)
-    
-    # 排序
-    if sort_by == 'price':
-        nfts.sort(key=lambda x: x['price'], reverse=(order == 'desc'))
-    elif sort_by == 'commission':
-        nfts.sort(key=lambda x: x['commission'], reverse=(order == 'desc'))
-    elif sort_by == 'likes':
-        nfts.sort(key=lambda x: x['likes'], reverse=(order == 'desc'))
+    # 货币筛选和排序由列式索引完成，只读取当前页的NFT
+    page_ids, total_nfts, _ = listing_engine.query(
+        {'currency': currency_code.upper()}, sort_by=sort_by, order=order,
+        limit=limit, offset=(page - 1) * limit, cfish_first=False
+    )
+    nfts = load_nfts(page_ids)
     
     return jsonify({
         'success': True,
         'data': {
-            'nfts': nfts[:limit],
+            'nfts': nfts,
             'currency': currency_code.upper(),
             'pagination': {
                 'page': page,
@@ -7,6 +7,7 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
 import uuid
 import random
+from src.services.pagination import paginate, KeysetIndex
 
 dispute_resolution_bp = Blueprint('dispute_resolution', __name__)
 
@@ -17,6 +18,10 @@ dispute_messages = {}     # 争议沟通记录
 mediators = {}           # 调解员信息
 dispute_analytics = {}   # 争议分析数据
 
+# 争议列表排序：优先级高的在前，然后按创建时间，排序键以争议ID结尾保证游标位置唯一
+PRIORITY_ORDER = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
+dispute_order = KeysetIndex(disputes, lambda x: (-PRIORITY_ORDER.get(x['priority'], 0), x['created_at'], x['id']))
+
 @dispute_resolution_bp.route('/disputes', methods=['GET'])
 def get_disputes():
     """获取争议列表"""
@@ -27,6 +32,7 @@ def get_disputes():
         user_address = request.args.get('user_address')  # 筛选特定用户的争议
         limit = int(request.args.get('limit', 20))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
         
         # 生成模拟争议数据
         if not disputes:
@@ -106,6 +112,7 @@ def get_disputes():
                     },
                     "tags": random.sample(['urgent', 'complex', 'fraud_suspected', 'high_value', 'repeat_offender'], random.randint(0, 3))
                 }
+                dispute_order.add(disputes[dispute_id])
         
         # 筛选争议
         filtered_disputes = list(disputes.values())
@@ -124,13 +131,15 @@ def get_disputes():
                                if (d['parties']['complainant']['address'] == user_address or 
                                    d['parties']['respondent']['address'] == user_address)]
         
-        # 排序：优先级高的在前，然后按创建时间排序
-        priority_order = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
-        filtered_disputes.sort(key=lambda x: (-priority_order.get(x['priority'], 0), x['created_at']))
-        
-        # 分页
+        # 分页：优先级高的在前，然后按创建时间排序
         total = len(filtered_disputes)
-        paginated_disputes = filtered_disputes[offset:offset + limit]
+        try:
+            paginated_disputes, next_cursor = paginate(
+                filtered_disputes, dispute_order.key, limit, offset=offset, cursor=cursor,
+                sort_by='priority', index=dispute_order
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
         
         return jsonify({
             "success": True,
@@ -140,7 +149,8 @@ def get_disputes():
                     "total": total,
                     "limit": limit,
                     "offset": offset,
-                    "has_more": offset + limit < total
+                    "has_more": next_cursor is not None,
+                    "next_cursor": next_cursor
                 }
             }
         })
@@ -275,6 +285,7 @@ def create_dispute():
         }
         
         disputes[dispute_id] = dispute
+        dispute_order.add(disputes[dispute_id])
         
         # 自动分配调解员（高优先级争议）
         if dispute['priority'] in ['high', 'critical']:
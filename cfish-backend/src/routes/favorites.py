@@ -1,6 +1,9 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime
 import random
+from src.services.ranking import ranking_service
+from src.services.response_cache import detail_cache
+from src.services.streaming import wants_ndjson, ndjson_response
 
 favorites_bp = Blueprint('favorites', __name__)
 
@@ -8,6 +11,28 @@ favorites_bp = Blueprint('favorites', __name__)
 user_favorites = {}
 nft_like_counts = {}
 
+def ensure_like_count(nft_id):
+    """初始化点赞计数，目录中的NFT以目录中的点赞数为准"""
+    from src.models.nft import NFT
+    from src.models.user import db
+    
+    if nft_id not in nft_like_counts:
+        nft = db.session.get(NFT, nft_id)
+        nft_like_counts[nft_id] = nft.likes if nft is not None else random.randint(50, 1000)
+    return nft_like_counts[nft_id]
+
+def apply_like(nft_id, delta):
+    """更新点赞计数，并同步到NFT目录和点赞排行榜"""
+    from src.routes.nft import adjust_nft_likes
+    
+    likes = adjust_nft_likes(nft_id, delta)
+    if likes is None:
+        likes = max(0, nft_like_counts.get(nft_id, 0) + delta)
+    nft_like_counts[nft_id] = likes
+    ranking_service.record('like', nft_id, amount=delta)
+    detail_cache.invalidate('nft', nft_id)
+    return likes
+
 @favorites_bp.route('/nfts/<int:nft_id>/like', methods=['POST'])
 def like_nft(nft_id):
     """点赞/取消点赞NFT"""
@@ -23,20 +48,19 @@ def like_nft(nft_id):
     if user_address not in user_favorites:
         user_favorites[user_address] = set()
     
-    if nft_id not in nft_like_counts:
-        nft_like_counts[nft_id] = random.randint(50, 1000)
+    ensure_like_count(nft_id)
     
     is_liked = nft_id in user_favorites[user_address]
     
     if is_liked:
         # 取消点赞
         user_favorites[user_address].remove(nft_id)
-        nft_like_counts[nft_id] = max(0, nft_like_counts[nft_id] - 1)
+        apply_like(nft_id, -1)
         action = 'unliked'
     else:
         # 点赞
         user_favorites[user_address].add(nft_id)
-        nft_like_counts[nft_id] += 1
+        apply_like(nft_id, 1)
         action = 'liked'
     
     return jsonify({
@@ -61,8 +85,7 @@ def get_like_status(nft_id):
             'error': 'User address is required'
         }), 400
     
-    if nft_id not in nft_like_counts:
-        nft_like_counts[nft_id] = random.randint(50, 1000)
+    ensure_like_count(nft_id)
     
     is_liked = user_address in user_favorites and nft_id in user_favorites[user_address]
     
@@ -102,12 +125,11 @@ def get_user_favorites(user_address):
             }
         })
     
-    # 生成收藏的NFT数据
-    from src.routes.nft import generate_mock_nft
+    # 批量读取收藏的NFT数据
+    from src.routes.nft import load_nfts_or_mock
     favorites = []
     
-    for nft_id in favorite_nft_ids:
-        nft = generate_mock_nft(nft_id)
+    for nft in load_nfts_or_mock(favorite_nft_ids):
         favorite_item = {
             'nft': nft,
             'liked_at': datetime.now().isoformat(),
@@ -181,14 +203,13 @@ def batch_like_nfts(user_address):
     results = []
     
     for nft_id in nft_ids:
-        if nft_id not in nft_like_counts:
-            nft_like_counts[nft_id] = random.randint(50, 1000)
+        ensure_like_count(nft_id)
         
         is_currently_liked = nft_id in user_favorites[user_address]
         
         if action == 'like' and not is_currently_liked:
             user_favorites[user_address].add(nft_id)
-            nft_like_counts[nft_id] += 1
+            apply_like(nft_id, 1)
             results.append({
                 'nft_id': nft_id,
                 'action': 'liked',
@@ -196,7 +217,7 @@ def batch_like_nfts(user_address):
             })
         elif action == 'unlike' and is_currently_liked:
             user_favorites[user_address].remove(nft_id)
-            nft_like_counts[nft_id] = max(0, nft_like_counts[nft_id] - 1)
+            apply_like(nft_id, -1)
             results.append({
                 'nft_id': nft_id,
                 'action': 'unliked',
@@ -234,8 +255,7 @@ def clear_favorites(user_address):
     
     # 减少对应NFT的点赞数
     for nft_id in user_favorites[user_address]:
-        if nft_id in nft_like_counts:
-            nft_like_counts[nft_id] = max(0, nft_like_counts[nft_id] - 1)
+        apply_like(nft_id, -1)
     
     user_favorites[user_address] = set()
     
@@ -252,23 +272,15 @@ def get_trending_likes():
     """获取点赞趋势NFT"""
     limit = int(request.args.get('limit', 10))
     
-    # 生成热门点赞NFT
-    trending_nfts = []
-    for i in range(limit):
-        nft_id = random.randint(1, 1000)
-        if nft_id not in nft_like_counts:
-            nft_like_counts[nft_id] = random.randint(100, 2000)
-        
-        from src.routes.nft import generate_mock_nft
-        nft = generate_mock_nft(nft_id)
-        nft['likes'] = nft_like_counts[nft_id]
-        nft['like_growth_24h'] = random.randint(10, 200)
-        nft['like_growth_percentage'] = round(random.uniform(5, 50), 2)
-        
-        trending_nfts.append(nft)
+    # 读取后台物化好的点赞榜（点赞分数按24小时半衰期衰减）
+    from src.routes.nft import load_nfts
+    ranked = dict(ranking_service.top('likes', limit))
+    trending_nfts = load_nfts(list(ranked))
     
-    # 按点赞数排序
-    trending_nfts.sort(key=lambda x: x['likes'], reverse=True)
+    for nft in trending_nfts:
+        nft['likes'] = nft_like_counts.get(nft['id'], nft['likes'])
+        nft['like_growth_24h'] = round(ranked[nft['id']])
+        nft['like_growth_percentage'] = round(ranked[nft['id']] / max(1, nft['likes']) * 100, 2)
     
     return jsonify({
         'success': True,
@@ -286,24 +298,28 @@ def export_favorites(user_address):
     
     favorite_nft_ids = list(user_favorites[user_address])
     
-    # 生成导出数据
-    from src.routes.nft import generate_mock_nft
-    export_data = []
+    # 批量读取导出数据
+    from src.routes.nft import iter_nfts
+    
+    def export_rows():
+        for nft in iter_nfts(favorite_nft_ids, mock_missing=True):
+            yield {
+                'nft_id': nft['id'],
+                'name': nft['name'],
+                'creator': nft['creator']['name'],
+                'price': nft['price'],
+                'currency': nft['currency'],
+                'category': nft['category'],
+                'rarity': nft['rarity'],
+                'likes': nft_like_counts.get(nft['id'], 0),
+                'export_date': datetime.now().isoformat()
+            }
+    
+    # NDJSON 格式逐行流式导出
+    if wants_ndjson():
+        return ndjson_response(export_rows(), headers={'X-Total-Count': str(len(favorite_nft_ids))})
     
-    for nft_id in favorite_nft_ids:
-        nft = generate_mock_nft(nft_id)
-        export_item = {
-            'nft_id': nft_id,
-            'name': nft['name'],
-            'creator': nft['creator']['name'],
-            'price': nft['price'],
-            'currency': nft['currency'],
-            'category': nft['category'],
-            'rarity': nft['rarity'],
-            'likes': nft_like_counts.get(nft_id, 0),
-            'export_date': datetime.now().isoformat()
-        }
-        export_data.append(export_item)
+    export_data = list(export_rows())
     
     return jsonify({
         'success': True,
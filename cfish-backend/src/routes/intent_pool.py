@@ -7,6 +7,7 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
 import uuid
 import random
+from src.services.pagination import paginate, KeysetIndex
 
 intent_pool_bp = Blueprint('intent_pool', __name__)
 
@@ -16,6 +17,8 @@ intent_matches = {}       # 意图匹配
 intent_responses = {}     # 意图响应
 user_intent_history = {}  # 用户意图历史
 intent_analytics = {}     # 意图分析数据
+# 意图列表排序：优先级分数高的在前，然后按创建时间，排序键以意图ID结尾保证游标位置唯一
+intent_order = KeysetIndex(intents, lambda x: (-x['matching_criteria']['priority_score'], x['created_at'], x['id']))
 
 @intent_pool_bp.route('/intents', methods=['GET'])
 def get_intents():
@@ -29,6 +32,7 @@ def get_intents():
         currency = request.args.get('currency', 'all')  # all, SOL, CFISH
         limit = int(request.args.get('limit', 20))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
         
         # 生成模拟意图数据
         if not intents:
@@ -84,6 +88,7 @@ def get_intents():
                     "response_count": random.randint(0, 50),
                     "tags": random.sample(['urgent', 'flexible', 'premium', 'bulk', 'rare'], random.randint(1, 3))
                 }
+                intent_order.add(intents[intent_id])
         
         # 筛选意图
         filtered_intents = list(intents.values())
@@ -108,12 +113,15 @@ def get_intents():
             filtered_intents = [i for i in filtered_intents 
                               if i['offer']['amount'] and i['offer']['amount'] <= price_max]
         
-        # 排序：优先级分数高的在前，然后按创建时间排序
-        filtered_intents.sort(key=lambda x: (-x['matching_criteria']['priority_score'], x['created_at']))
-        
-        # 分页
+        # 分页：优先级分数高的在前，然后按创建时间排序
         total = len(filtered_intents)
-        paginated_intents = filtered_intents[offset:offset + limit]
+        try:
+            paginated_intents, next_cursor = paginate(
+                filtered_intents, intent_order.key, limit, offset=offset, cursor=cursor,
+                sort_by='priority', index=intent_order
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
         
         return jsonify({
             "success": True,
@@ -123,7 +131,8 @@ def get_intents():
                     "total": total,
                     "limit": limit,
                     "offset": offset,
-                    "has_more": offset + limit < total
+                    "has_more": next_cursor is not None,
+                    "next_cursor": next_cursor
                 }
             }
         })
@@ -222,6 +231,7 @@ def create_intent():
         }
         
         intents[intent_id] = intent
+        intent_order.add(intents[intent_id])
         
         # 立即尝试匹配
         if intent['matching_criteria']['auto_match']:
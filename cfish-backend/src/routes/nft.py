@@ -1,15 +1,36 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime, timedelta
 import random
+from src.models.user import db
+from src.models.nft import NFT
+from src.models.provenance import ProvenanceEvent
+from src.services.listing_engine import listing_engine
+from src.services.pagination import decode_cursor, encode_cursor
+from src.services.ranking import ranking_service
+from src.services.collection_stats import collection_stats
+from src.services.price_history import price_history
+from src.services.response_cache import detail_cache
+from src.services.batch_loader import get_loader
+from src.services.trait_index import trait_index
+from src.services.search_index import nft_index, nft_fields
+from src.services.autocomplete import autocomplete
 
 nft_bp = Blueprint('nft', __name__)
 
+# 目录中的NFT数量（首次启动时写入数据库）
+CATALOG_SIZE = 1000
+NFT_CATEGORIES = ['Art', 'Gaming', 'Music', 'Photography', 'Sports', 'Collectibles']
+# IN 查询每批的ID数量，避免超出 SQLite 的参数上限
+ID_BATCH_SIZE = 500
+# /nfts/batch 单次最多查询的ID数量
+BATCH_GET_LIMIT = 100
+
 # 模拟NFT数据
 def generate_mock_nft(nft_id=None):
     if nft_id is None:
         nft_id = random.randint(1, 10000)
     
-    categories = ['Art', 'Gaming', 'Music', 'Photography', 'Sports', 'Collectibles']
+    categories = NFT_CATEGORIES
     creators = [
         {'name': 'CryptoArtist', 'avatar': '/avatars/artist1.png', 'verified': True},
         {'name': 'DigitalMaster', 'avatar': '/avatars/artist2.png', 'verified': True},
@@ -40,29 +61,160 @@ def generate_mock_nft(nft_id=None):
         'tags': random.sample(['art', 'digital', 'unique', 'collectible', 'rare', 'trending'], k=random.randint(2, 4)),
         'is_for_sale': random.choice([True, False]),
         'auction_end_time': (datetime.now() + timedelta(days=random.randint(1, 7))).isoformat() if random.choice([True, False]) else None,
-        'transaction_history': [
-            {
-                'type': 'mint',
-                'price': 0,
-                'from': None,
-                'to': random.choice(creators)['name'],
-                'timestamp': (datetime.now() - timedelta(days=random.randint(30, 365))).isoformat()
-            },
-            {
-                'type': 'sale',
-                'price': round(random.uniform(0.1, 10.0), 2),
-                'from': random.choice(creators)['name'],
-                'to': random.choice(creators)['name'],
-                'timestamp': (datetime.now() - timedelta(days=random.randint(1, 30))).isoformat()
-            }
-        ]
+        'last_sale': {
+            'price': round(random.uniform(0.1, 10.0), 2),
+            'currency': random.choice(['SOL', 'CFISH']),
+            'timestamp': (datetime.now() - timedelta(days=random.randint(1, 30))).isoformat()
+        }
     }
 
+def seed_nft_catalog(total=CATALOG_SIZE):
+    """首次启动时将模拟NFT写入目录表"""
+    if db.session.query(NFT.id).first() is not None:
+        return
+    
+    for i in range(1, total + 1):
+        nft = generate_mock_nft(i)
+        row = NFT(
+            id=nft['id'],
+            name=nft['name'],
+            description=nft['description'],
+            image=nft['image'],
+            price=nft['price'],
+            currency=nft['currency'],
+            category=nft['category'],
+            collection_id=nft['id'] // 100 + 1,
+            creator=nft['creator'],
+            owner=nft['owner'],
+            commission=nft['commission'],
+            rarity=nft['rarity'],
+            likes=nft['likes'],
+            views=nft['views'],
+            created_at=datetime.fromisoformat(nft['created_at']),
+            attributes=nft['attributes'],
+            tags=nft['tags'],
+            is_for_sale=nft['is_for_sale'],
+            auction_end_time=datetime.fromisoformat(nft['auction_end_time']) if nft['auction_end_time'] else None
+        )
+        db.session.add(row)
+        
+        # 溯源记录：铸造给创作者，之后一次成交转给当前持有人
+        sale = nft['last_sale']
+        sale_time = datetime.fromisoformat(sale['timestamp'])
+        mint_time = min(row.created_at, sale_time - timedelta(days=1))
+        ProvenanceEvent.append(row, 'mint', mint_time, price=0, to_address=row.creator['name'])
+        ProvenanceEvent.append(row, 'sale', sale_time, price=sale['price'], currency=sale['currency'],
+                               from_address=row.creator['name'], to_address=row.owner['name'])
+        if row.is_for_sale:
+            ProvenanceEvent.append(row, 'listing', sale_time + timedelta(hours=1), price=row.price,
+                                   currency=row.currency, from_address=row.owner['name'])
+    db.session.commit()
+
+def init_nft_catalog():
+    """初始化NFT目录并加载内存索引"""
+    seed_nft_catalog()
+    nfts = [nft.to_dict() for nft in NFT.query.yield_per(ID_BATCH_SIZE)]
+    listing_engine.load(nfts)
+    
+    # 以目录中已有的点赞和浏览作为排行榜的初始热度（点赞榜只统计启动后的点赞）
+    for nft in nfts:
+        ranking_service.register(nft['id'], nft['collection_id'])
+        ranking_service.record('like', nft['id'], amount=nft['likes'], seed=True)
+        ranking_service.record('view', nft['id'], amount=nft['views'], seed=True)
+    ranking_service.start()
+    
+    # 用目录中的持有人、在售挂单和溯源记录中的历史成交初始化合集统计
+    collection_of = {}
+    for nft in nfts:
+        collection_of[nft['id']] = nft['collection_id']
+        collection_stats.record_mint(nft['id'], nft['collection_id'], nft['owner']['name'])
+        trait_index(('collection', nft['collection_id'])).add(nft['id'], nft['attributes'])
+        nft_index.add(nft['id'], nft_fields(nft))
+    sales = ProvenanceEvent.query.filter_by(event_type='sale').order_by(ProvenanceEvent.timestamp)
+    for event in sales.yield_per(ID_BATCH_SIZE):
+        at = event.timestamp.timestamp()
+        collection_stats.record_sale(event.nft_id, event.price, at=at)
+        price_history.record(collection_of[event.nft_id], volume=event.price, at=at)
+    for nft in nfts:
+        if nft['is_for_sale']:
+            collection_stats.record_listing(nft['id'], nft['price'])
+    for collection_id in {nft['collection_id'] for nft in nfts}:
+        record_price_point(collection_id)
+    
+    # 搜索联想：NFT名称按点赞数、创作者按作品点赞总数计热度，合集目录在生成时登记
+    from src.routes.collection import get_collection_catalog
+    
+    for nft in nfts:
+        autocomplete.put('nft', nft['name'], nft['likes'], nft_id=nft['id'])
+        autocomplete.bump('creator', nft['creator']['name'], nft['likes'], verified=nft['creator']['verified'])
+    get_collection_catalog()
+    autocomplete.start()
+
+def record_price_point(collection_id, volume=0.0):
+    """把合集当前的地板价和本次成交额写入价格历史"""
+    floor = collection_stats.snapshot(collection_id)['floor_price']
+    price_history.record(collection_id, floor=floor, volume=volume)
+
+def load_nft(nft_id):
+    """从目录读取NFT，不在目录中的ID回退到模拟数据"""
+    nft = db.session.get(NFT, nft_id)
+    if nft is None:
+        return generate_mock_nft(nft_id)
+    return nft.to_dict()
+
+def fetch_nft_rows(nft_ids):
+    """按主键分批查询目录中的NFT，返回 {id: NFT}"""
+    rows = {}
+    for i in range(0, len(nft_ids), ID_BATCH_SIZE):
+        batch = nft_ids[i:i + ID_BATCH_SIZE]
+        rows.update((nft.id, nft) for nft in NFT.query.filter(NFT.id.in_(batch)))
+    return rows
+
+def nft_loader():
+    """当前请求共享的NFT批量加载器"""
+    return get_loader('nft', fetch_nft_rows)
+
+def load_nfts(nft_ids):
+    """按给定顺序批量读取目录中的NFT，不在目录中的ID跳过"""
+    rows = nft_loader().load_many(nft_ids)
+    return [row.to_dict() for row in rows if row is not None]
+
+def load_nfts_or_mock(nft_ids):
+    """按给定顺序批量读取NFT，不在目录中的ID回退到模拟数据"""
+    rows = nft_loader().load_many(nft_ids)
+    return [row.to_dict() if row is not None else generate_mock_nft(nft_id) for nft_id, row in zip(nft_ids, rows)]
+
+def iter_nfts(nft_ids, mock_missing=False):
+    """按给定顺序逐批读取NFT并逐个产出字典，不经过请求内缓存，供流式导出使用
+
+    不在目录中的ID跳过，mock_missing 为 True 时回退到模拟数据。
+    """
+    for i in range(0, len(nft_ids), ID_BATCH_SIZE):
+        batch = [int(nft_id) for nft_id in nft_ids[i:i + ID_BATCH_SIZE]]
+        rows = fetch_nft_rows(batch)
+        for nft_id in batch:
+            row = rows.get(nft_id)
+            if row is not None:
+                yield row.to_dict()
+            elif mock_missing:
+                yield generate_mock_nft(nft_id)
+
+def adjust_nft_likes(nft_id, delta):
+    """增减目录中NFT的点赞数，同步更新列式索引；不在目录中时返回 None"""
+    nft = db.session.get(NFT, nft_id)
+    if nft is None:
+        return None
+    nft.likes = max(0, nft.likes + delta)
+    db.session.commit()
+    listing_engine.update(nft_id, likes=nft.likes)
+    return nft.likes
+
 @nft_bp.route('/nfts', methods=['GET'])
 def get_nfts():
     """获取NFT列表"""
     page = int(request.args.get('page', 1))
     limit = int(request.args.get('limit', 20))
+    cursor = request.args.get('cursor')
     category = request.args.get('category')
     sort_by = request.args.get('sort_by', 'created_at')
     order = request.args.get('order', 'desc')
@@ -71,58 +223,191 @@ def get_nfts():
     max_price = request.args.get('max_price', type=float)
     currency = request.args.get('currency')  # 新增货币筛选参数
     
-    # 生成模拟数据
-    total_nfts = 1000
-    nfts = []
+    filters = {
+        'search': search,
+        'min_price': min_price,
+        'max_price': max_price,
+        'currency': currency.upper() if currency else None
+    }
+    if category:
+        # 统一成目录中的写法
+        filters['category'] = next((c for c in NFT_CATEGORIES if c.lower() == category.lower()), category)
     
-    for i in range((page - 1) * limit, min(page * limit, total_nfts)):
-        nft = generate_mock_nft(i + 1)
-        
-        # 应用筛选条件
-        if category and nft['category'].lower() != category.lower():
-            continue
-        if search and search.lower() not in nft['name'].lower():
-            continue
-        if min_price and nft['price'] < min_price:
-            continue
-        if max_price and nft['price'] > max_price:
-            continue
-        if currency and nft['currency'].lower() != currency.lower():
-            continue
-            
-        nfts.append(nft)
-    
-    # 排序 - CFISH付款的NFT优先展示
-    if sort_by == 'price':
-        # 先按货币类型排序（CFISH优先），再按价格排序
-        nfts.sort(key=lambda x: (x['currency'] != 'CFISH', x['price']), reverse=(order == 'desc'))
-    elif sort_by == 'commission':
-        nfts.sort(key=lambda x: (x['currency'] != 'CFISH', x['commission']), reverse=(order == 'desc'))
-    elif sort_by == 'likes':
-        nfts.sort(key=lambda x: (x['currency'] != 'CFISH', x['likes']), reverse=(order == 'desc'))
-    elif sort_by == 'created_at':
-        nfts.sort(key=lambda x: (x['currency'] != 'CFISH', x['created_at']), reverse=(order == 'desc'))
+    # 排序 - CFISH付款的NFT优先展示，未知排序字段按创建时间倒序
+    if sort_by not in ('price', 'commission', 'likes', 'created_at'):
+        sort_by, order = 'created_at', 'desc'
+    order = 'desc' if order == 'desc' else 'asc'
+    cursor_sort = f'{sort_by}_{order}'
+    
+    # 游标记录上一页最后一条的 (货币, 排序键, ID)，从该货币段继续查找
+    try:
+        after = decode_cursor(cursor, cursor_sort) if cursor else None
+        page_ids, total_nfts, next_key = listing_engine.query(
+            filters, sort_by=sort_by, order=order, limit=limit,
+            offset=(page - 1) * limit, after=after
+        )
+    except (ValueError, TypeError):
+        return jsonify({
+            'success': False,
+            'error': 'Invalid cursor'
+        }), 400
+    
+    next_cursor = encode_cursor(cursor_sort, next_key) if next_key else None
+    if cursor:
+        pagination = {
+            'limit': limit,
+            'cursor': cursor,
+            'total': total_nfts,
+            'next_cursor': next_cursor
+        }
     else:
-        # 默认排序：CFISH付款优先，然后按创建时间
-        nfts.sort(key=lambda x: (x['currency'] != 'CFISH', x['created_at']), reverse=True)
+        pagination = {
+            'page': page,
+            'limit': limit,
+            'total': total_nfts,
+            'pages': (total_nfts + limit - 1) // limit,
+            'next_cursor': next_cursor
+        }
     
     return jsonify({
         'success': True,
         'data': {
-            'nfts': nfts[:limit],
-            'pagination': {
-                'page': page,
-                'limit': limit,
-                'total': total_nfts,
-                'pages': (total_nfts + limit - 1) // limit
-            }
+            'nfts': load_nfts(page_ids),
+            'pagination': pagination
+        }
+    })
+
+@nft_bp.route('/nfts', methods=['POST'])
+def mint_nft():
+    """铸造NFT"""
+    from src.routes.search import index_user
+    
+    data = request.get_json()
+    
+    required_fields = ['name', 'price', 'creator', 'collection_id']
+    for field in required_fields:
+        if field not in data:
+            return jsonify({
+                'success': False,
+                'error': f'Missing required field: {field}'
+            }), 400
+    
+    if data['price'] <= 0:
+        return jsonify({
+            'success': False,
+            'error': 'Price must be greater than 0'
+        }), 400
+    
+    currency = data.get('currency', 'SOL').upper()
+    if currency not in ['SOL', 'CFISH']:
+        return jsonify({
+            'success': False,
+            'error': 'Unsupported currency type'
+        }), 400
+    
+    category = data.get('category', 'Art')
+    if category not in NFT_CATEGORIES:
+        return jsonify({
+            'success': False,
+            'error': 'Unsupported category'
+        }), 400
+    
+    creator = {'name': data['creator'], 'avatar': data.get('creator_avatar', ''), 'verified': False}
+    now = datetime.now()
+    nft = NFT(
+        name=data['name'],
+        description=data.get('description', ''),
+        image=data.get('image', ''),
+        price=round(float(data['price']), 2),
+        currency=currency,
+        category=category,
+        collection_id=data['collection_id'],
+        creator=creator,
+        owner=creator,
+        commission=data.get('commission', 0.0),
+        rarity=data.get('rarity', 'Common'),
+        likes=0,
+        views=0,
+        created_at=now,
+        attributes=data.get('attributes', []),
+        tags=data.get('tags', []),
+        is_for_sale=data.get('is_for_sale', False)
+    )
+    # ID 由数据库在插入时分配（自增主键），并发铸造不会拿到相同的ID
+    db.session.add(nft)
+    db.session.flush()
+    ProvenanceEvent.append(nft, 'mint', now, price=0, to_address=creator['name'])
+    if nft.is_for_sale:
+        ProvenanceEvent.append(nft, 'listing', now, price=nft.price, currency=nft.currency,
+                               from_address=creator['name'])
+    db.session.commit()
+    
+    # 同步各内存索引
+    payload = nft.to_dict()
+    listing_engine.upsert(payload)
+    ranking_service.register(nft.id, nft.collection_id)
+    collection_stats.record_mint(nft.id, nft.collection_id, creator['name'])
+    if nft.is_for_sale:
+        collection_stats.record_listing(nft.id, nft.price)
+    trait_index(('collection', nft.collection_id)).add(nft.id, nft.attributes)
+    nft_index.add(nft.id, nft_fields(payload))
+    index_user(creator['name'])
+    autocomplete.put('nft', nft.name, 0, nft_id=nft.id)
+    autocomplete.bump('creator', creator['name'], 0)
+    detail_cache.invalidate('collection', nft.collection_id)
+    
+    return jsonify({
+        'success': True,
+        'message': 'NFT minted successfully',
+        'data': payload
+    }), 201
+
+@nft_bp.route('/nfts/batch', methods=['GET'])
+def get_nfts_batch():
+    """按ID批量获取NFT"""
+    try:
+        nft_ids = [int(part) for part in request.args.get('ids', '').split(',') if part.strip()]
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'ids must be a comma-separated list of integers'
+        }), 400
+    
+    if not nft_ids:
+        return jsonify({
+            'success': False,
+            'error': 'ids is required'
+        }), 400
+    
+    if len(nft_ids) > BATCH_GET_LIMIT:
+        return jsonify({
+            'success': False,
+            'error': f'At most {BATCH_GET_LIMIT} ids per request'
+        }), 400
+    
+    # 去重后一次查询，结果按请求顺序返回
+    nft_ids = list(dict.fromkeys(nft_ids))
+    rows = nft_loader().load_many(nft_ids)
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'nfts': [row.to_dict() for row in rows if row is not None],
+            'missing': [nft_id for nft_id, row in zip(nft_ids, rows) if row is None]
         }
     })
 
 @nft_bp.route('/nfts/<int:nft_id>', methods=['GET'])
 def get_nft_detail(nft_id):
     """获取NFT详情"""
-    nft = generate_mock_nft(nft_id)
+    ranking_service.record('view', nft_id)
+    return detail_cache.respond('nft', nft_id, lambda: build_nft_detail(nft_id))
+
+def build_nft_detail(nft_id):
+    """组装NFT详情（结果由详情缓存按版本缓存）"""
+    from src.routes.comments import nft_comments
+    
+    nft = load_nft(nft_id)
     
     # 添加更多详细信息
     nft.update({
@@ -146,12 +431,64 @@ def get_nft_detail(nft_id):
                 'amount': round(random.uniform(0.1, nft['price'] * 0.8), 2),
                 'expires_at': (datetime.now() + timedelta(days=random.randint(1, 7))).isoformat()
             } for _ in range(random.randint(0, 3))
-        ]
+        ],
+        'comments_count': len(nft_comments.get(nft_id, []))
     })
+    return nft
+
+@nft_bp.route('/nfts/<int:nft_id>/history', methods=['GET'])
+def get_nft_history(nft_id):
+    """获取NFT溯源记录（按时间倒序分页）"""
+    page = int(request.args.get('page', 1))
+    limit = int(request.args.get('limit', 20))
+    cursor = request.args.get('cursor')
+    event_type = request.args.get('type')
+    
+    nft = db.session.get(NFT, nft_id)
+    if nft is None:
+        return jsonify({
+            'success': False,
+            'error': 'NFT not found'
+        }), 404
+    
+    query = ProvenanceEvent.query.filter_by(nft_id=nft_id)
+    if event_type:
+        query = query.filter_by(event_type=event_type)
+    total = query.count() if event_type else nft.history_seq
+    query = query.order_by(ProvenanceEvent.seq.desc())
+    
+    # 游标为上一页最后一条的序号，沿主键 (nft_id, seq) 继续向前读取
+    if cursor:
+        try:
+            last_seq, = decode_cursor(cursor, 'seq_desc')
+            query = query.filter(ProvenanceEvent.seq < int(last_seq))
+        except (ValueError, TypeError):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid cursor'
+            }), 400
+    else:
+        query = query.offset((page - 1) * limit)
+    events = query.limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor('seq_desc', [events[-1].seq])
     
     return jsonify({
         'success': True,
-        'data': nft
+        'data': {
+            'nft_id': nft_id,
+            'history': [event.to_dict() for event in events],
+            'pagination': {
+                'page': page,
+                'limit': limit,
+                'total': total,
+                'pages': (total + limit - 1) // limit,
+                'next_cursor': next_cursor
+            }
+        }
     })
 
 @nft_bp.route('/nfts/trending', methods=['GET'])
@@ -159,11 +496,11 @@ def get_trending_nfts():
     """获取热门NFT - CFISH付款优先展示"""
     limit = int(request.args.get('limit', 10))
     
-    nfts = []
-    for i in range(limit * 2):  # 生成更多数据以便筛选
-        nft = generate_mock_nft(i + 1)
-        nft['trending_score'] = random.uniform(70, 100)  # 热门度评分
-        nfts.append(nft)
+    # 读取后台物化好的热门榜，多取一些以便CFISH优先排序
+    ranked = dict(ranking_service.top('trending', limit * 2))
+    nfts = load_nfts(list(ranked))
+    for nft in nfts:
+        nft['trending_score'] = round(ranked[nft['id']], 2)  # 热门度评分
     
     # 按热门度和CFISH优先排序
     nfts.sort(key=lambda x: (x['currency'] != 'CFISH', -x['trending_score']))
@@ -181,11 +518,11 @@ def get_featured_nfts():
     """获取精选NFT - CFISH付款优先展示"""
     limit = int(request.args.get('limit', 8))
     
-    nfts = []
-    for i in range(limit * 2):  # 生成更多数据以便筛选
-        nft = generate_mock_nft(i + 1)
-        nft['featured_score'] = random.uniform(80, 100)  # 精选评分
-        nfts.append(nft)
+    # 读取后台物化好的精选榜，多取一些以便CFISH优先排序
+    ranked = dict(ranking_service.top('featured', limit * 2))
+    nfts = load_nfts(list(ranked))
+    for nft in nfts:
+        nft['featured_score'] = round(ranked[nft['id']], 2)  # 精选评分
     
     # 按精选评分和CFISH优先排序
     nfts.sort(key=lambda x: (x['currency'] != 'CFISH', -x['featured_score']))
@@ -201,12 +538,16 @@ def get_featured_nfts():
 @nft_bp.route('/nfts/<int:nft_id>/like', methods=['POST'])
 def like_nft(nft_id):
     """点赞NFT"""
+    likes = adjust_nft_likes(nft_id, 1)
+    ranking_service.record('like', nft_id)
+    detail_cache.invalidate('nft', nft_id)
+    
     return jsonify({
         'success': True,
         'message': 'NFT liked successfully',
         'data': {
             'nft_id': nft_id,
-            'likes': random.randint(1, 1000)
+            'likes': likes if likes is not None else random.randint(1, 1000)
         }
     })
 
@@ -215,6 +556,30 @@ def buy_nft(nft_id):
     """购买NFT"""
     data = request.get_json()
     
+    # 带 buyer_address 时在目录中成交：下架并转给买家，同步更新列式索引；
+    # 不带时保持原来的行为，只返回待处理的交易
+    buyer = data.get('buyer_address')
+    nft = db.session.get(NFT, nft_id) if buyer else None
+    if nft is not None:
+        if not nft.is_for_sale:
+            return jsonify({
+                'success': False,
+                'error': 'NFT is not for sale'
+            }), 400
+        seller = nft.owner['name']
+        nft.is_for_sale = False
+        nft.owner = {'name': buyer, 'avatar': '', 'verified': False}
+        ProvenanceEvent.append(nft, 'sale', datetime.now(), price=nft.price, currency=nft.currency,
+                               from_address=seller, to_address=buyer)
+        db.session.commit()
+        # 列式索引不存持有人，列表页的持有人从目录表读取；详情缓存在下面失效
+        listing_engine.update(nft_id, is_for_sale=False)
+        collection_stats.record_sale(nft_id, nft.price, buyer=buyer)
+        record_price_point(nft.collection_id, volume=nft.price)
+        detail_cache.invalidate('collection', nft.collection_id)
+    ranking_service.record('sale', nft_id)
+    detail_cache.invalidate('nft', nft_id)
+    
     return jsonify({
         'success': True,
         'message': 'Purchase initiated successfully',
@@ -227,10 +592,56 @@ def buy_nft(nft_id):
         }
     })
 
+@nft_bp.route('/nfts/<int:nft_id>/price', methods=['PUT'])
+def update_nft_price(nft_id):
+    """修改NFT挂单价格"""
+    data = request.get_json()
+    price = data.get('price')
+    currency = data.get('currency')
+    
+    if price is None or price <= 0:
+        return jsonify({
+            'success': False,
+            'error': 'Price must be greater than 0'
+        }), 400
+    
+    if currency and currency.upper() not in ['SOL', 'CFISH']:
+        return jsonify({
+            'success': False,
+            'error': 'Unsupported currency type'
+        }), 400
+    
+    nft = db.session.get(NFT, nft_id)
+    if nft is None:
+        return jsonify({
+            'success': False,
+            'error': 'NFT not found'
+        }), 404
+    
+    nft.price = round(float(price), 2)
+    nft.currency = currency.upper() if currency else nft.currency
+    nft.is_for_sale = True
+    ProvenanceEvent.append(nft, 'listing', datetime.now(), price=nft.price, currency=nft.currency,
+                           from_address=nft.owner['name'])
+    db.session.commit()
+    listing_engine.update(nft_id, price=nft.price, currency=nft.currency, is_for_sale=True)
+    collection_stats.record_listing(nft_id, nft.price)
+    record_price_point(nft.collection_id)
+    detail_cache.invalidate('nft', nft_id)
+    detail_cache.invalidate('collection', nft.collection_id)
+    
+    return jsonify({
+        'success': True,
+        'message': 'Price updated successfully',
+        'data': nft.to_dict()
+    })
+
 @nft_bp.route('/nfts/<int:nft_id>/bid', methods=['POST'])
 def bid_nft(nft_id):
     """对NFT出价"""
     data = request.get_json()
+    ranking_service.record('bid', nft_id)
+    detail_cache.invalidate('nft', nft_id)
     
     return jsonify({
         'success': True,
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime, timedelta
 import random
+from src.services.event_bus import event_bus
 
 notification_bp = Blueprint('notification', __name__)
 
@@ -249,18 +250,22 @@ def send_notification():
             }), 400
     
     notification_id = f'notif_{random.randint(100000, 999999)}'
+    notification = {
+        'notification_id': notification_id,
+        'recipient': data['recipient'],
+        'type': data['type'],
+        'title': data['title'],
+        'message': data['message'],
+        'sent_at': datetime.now().isoformat(),
+        'status': 'delivered'
+    }
+    
+    # 推送给订阅了该钱包通知的在线客户端
+    event_bus.publish(f"notifications:{data['recipient']}", 'notification', notification)
     
     return jsonify({
         'success': True,
         'message': 'Notification sent successfully',
-        'data': {
-            'notification_id': notification_id,
-            'recipient': data['recipient'],
-            'type': data['type'],
-            'title': data['title'],
-            'message': data['message'],
-            'sent_at': datetime.now().isoformat(),
-            'status': 'delivered'
-        }
+        'data': notification
     })
 
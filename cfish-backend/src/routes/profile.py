@@ -87,7 +87,7 @@ def update_user_profile(wallet_address):
 @profile_bp.route('/profile/<wallet_address>/nfts', methods=['GET'])
 def get_user_nfts(wallet_address):
     """获取用户的NFT"""
-    from src.routes.nft import generate_mock_nft
+    from src.routes.nft import load_nfts_or_mock
     
     page = int(request.args.get('page', 1))
     limit = int(request.args.get('limit', 20))
@@ -105,13 +105,13 @@ def get_user_nfts(wallet_address):
     else:
         total_nfts = random.randint(10, 150)
     
+    # 当前页的ID一次批量读取
+    nft_ids = [random.randint(1, 10000) for _ in range((page - 1) * limit, min(page * limit, total_nfts))]
     nfts = []
-    for i in range((page - 1) * limit, min(page * limit, total_nfts)):
-        nft = generate_mock_nft(random.randint(1, 10000))
-        
+    for nft in load_nfts_or_mock(nft_ids):
         # 根据类别添加特定信息
         if category == 'created':
-            nft['creator']['name'] = f'User_{wallet_address[-4:]}'
+            nft['creator'] = dict(nft['creator'], name=f'User_{wallet_address[-4:]}')
             nft['created_by_user'] = True
         elif category == 'owned':
             nft['owned_by_user'] = True
@@ -1,114 +1,291 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+import math
 import random
 import re
+import threading
+import time
+import numpy as np
+from src.services.search_index import nft_index, collection_index, user_index, tokenize, top_k_indices
+from src.services.autocomplete import autocomplete
+from src.services.listing_engine import listing_engine
+from src.services.query_cache import search_cache, cache_key, canonical_filters, normalize_query
+from src.services.heavy_hitters import trending_queries, WINDOWS
+from src.services.streaming import wants_ndjson, ndjson_response
+from src.services.query_language import QueryPlan, parse_query, filter_predicates
 
 search_bp = Blueprint('search', __name__)
 
 # 搜索历史存储
 user_search_history = {}
-popular_searches = {}
 
-def search_nfts(query, filters=None):
-    """搜索NFT"""
-    from src.routes.nft import generate_mock_nft
-    
-    # 生成搜索结果
-    results = []
-    total_nfts = 1000  # 假设总共有1000个NFT
-    
-    # 模拟搜索匹配
-    for i in range(1, min(101, total_nfts + 1)):  # 搜索前100个
-        nft = generate_mock_nft(i)
-        
-        # 简单的文本匹配逻辑
-        match_score = 0
-        query_lower = query.lower()
-        
-        if query_lower in nft['name'].lower():
-            match_score += 10
-        if query_lower in nft['description'].lower():
-            match_score += 5
-        if query_lower in nft['category'].lower():
-            match_score += 8
-        if any(query_lower in tag.lower() for tag in nft['tags']):
-            match_score += 6
-        if query_lower in nft['creator']['name'].lower():
-            match_score += 7
-        
-        # 应用筛选条件
-        if filters:
-            if filters.get('category') and nft['category'] != filters['category']:
-                continue
-            if filters.get('currency') and nft['currency'] != filters['currency']:
-                continue
-            if filters.get('min_price') and nft['price'] < float(filters['min_price']):
-                continue
-            if filters.get('max_price') and nft['price'] > float(filters['max_price']):
-                continue
-            if filters.get('rarity') and nft['rarity'] != filters['rarity']:
-                continue
-            if filters.get('is_for_sale') is not None and nft['is_for_sale'] != filters['is_for_sale']:
-                continue
-        
-        if match_score > 0:
-            nft['match_score'] = match_score
-            results.append(nft)
-    
-    # 按匹配分数和CFISH优先排序
-    results.sort(key=lambda x: (x['currency'] != 'CFISH', -x['match_score'], -x['likes']))
+# 搜索过的查询进入搜索联想前，最近一天（衰减后）需要达到的搜索次数
+MIN_SUGGESTION_SEARCHES = 3
+
+# 搜索联想的初始热门词
+POPULAR_TERMS = ["crypto art", "digital collectibles", "pixel art", "3d models", "music nfts",
+                 "gaming items", "profile pictures", "abstract art", "photography", "animation"]
+
+# 用户搜索索引中的用户名，下标 + 1 为用户ID
+DEFAULT_USERS = ["CryptoArtist", "DigitalMaster", "NFTCreator", "BlockchainArt", "ArtCollector"]
+known_users = []
+
+# NFT搜索排序：非CFISH的NFT主键加上该偏移，排在所有CFISH的NFT之后
+CURRENCY_SEGMENT = 1e9
+ID_SPAN = 1 << 31
+
+# 综合搜索各数据源的截止时间（秒）
+SOURCE_DEADLINES = {'nfts': 0.5, 'collections': 0.3, 'users': 0.2}
+
+# 综合搜索共享的固定大小线程池；每个提交的任务先占一个空位，没有空位时不排队
+SEARCH_WORKERS = 8
+search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix='search')
+search_slots = threading.BoundedSemaphore(SEARCH_WORKERS)
+
+class SearchCancelled(Exception):
+    """综合搜索中已超时的数据源被取消"""
+
+# 当前线程所执行数据源的 (取消标志, 截止时刻)，由 federated_search 设置
+_search_state = threading.local()
+
+def check_cancelled():
+    """数据源在各阶段之间调用：所属数据源被取消或已过截止时刻时抛出 SearchCancelled，尽早结束被放弃的工作"""
+    state = getattr(_search_state, 'source', None)
+    if state is None:
+        return
+    cancelled, deadline = state
+    if cancelled.is_set() or time.monotonic() >= deadline:
+        raise SearchCancelled()
+
+# 价格区间（同时用作价格分面的分桶）
+PRICE_RANGES = [
+    {'label': 'Under 1', 'min': 0, 'max': 1},
+    {'label': '1 - 10', 'min': 1, 'max': 10},
+    {'label': '10 - 50', 'min': 10, 'max': 50},
+    {'label': '50 - 100', 'min': 50, 'max': 100},
+    {'label': 'Over 100', 'min': 100, 'max': None}
+]
+PRICE_EDGES = [price_range['min'] for price_range in PRICE_RANGES[1:]]
+
+# 高级搜索支持的分面
+FACET_FIELDS = ['currency', 'category', 'rarity', 'is_for_sale', 'price']
+
+# 高级搜索排序方式 -> (排序字段, 方向, 是否CFISH优先)
+ADVANCED_SORTS = {
+    'price_low_high': ('price', 'asc', False),
+    'price_high_low': ('price', 'desc', False),
+    'newest': ('created_at', 'desc', False),
+    'most_liked': ('likes', 'desc', False),
+    'cfish_first': ('likes', 'desc', True)
+}
+
+def parse_bool(value):
+    """解析查询参数中的布尔值"""
+    if value is None or isinstance(value, bool):
+        return value
+    return str(value).lower() in ('true', '1', 'yes')
+
+def parse_price_filters(filters):
+    """把筛选条件中的 min_price / max_price 转换成数字，不是有限数字时抛出 ValueError"""
+    parsed = dict(filters)
+    for name in ('min_price', 'max_price'):
+        value = parsed.get(name)
+        if value is None or value == '':
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = None
+        if number is None or isinstance(value, bool) or not math.isfinite(number):
+            raise ValueError(f'{name} must be a number')
+        parsed[name] = number
+    return parsed
+
+def engine_filters(filters):
+    """把搜索筛选条件转换成列式索引的筛选参数"""
+    filters = filters or {}
+    return {
+        'category': filters.get('category'),
+        'currency': filters.get('currency'),
+        'rarity': filters.get('rarity'),
+        'is_for_sale': parse_bool(filters.get('is_for_sale')),
+        'min_price': float(filters['min_price']) if filters.get('min_price') else None,
+        'max_price': float(filters['max_price']) if filters.get('max_price') else None
+    }
+
+def query_predicates(query, filters=None):
+    """解析查询中的字段条件，与请求的筛选条件合并，返回 (关键词文本, 列条件列表)"""
+    parsed = parse_query(query)
+    return parsed.text, parsed.predicates + filter_predicates(**engine_filters(filters))
+
+def plan_nfts(query, filters=None, fuzzy=False):
+    """解析查询中的字段条件，与请求的筛选条件合并后生成执行计划"""
+    text, predicates = query_predicates(query, filters)
+    return QueryPlan(text, predicates, fuzzy)
+
+def cache_version(query, filters, columns=()):
+    """搜索结果缓存的版本号：增删挂单，或查询依赖的列（条件列、相关度分段的币种列和 columns）写入时变化
+
+    点赞数在相关度排序中只决定同分的先后，结果中的点赞、浏览数也只用于展示，
+    这些计数变化不使缓存失效，过期前允许略旧。
+    """
+    _, predicates = query_predicates(query, filters)
+    return listing_engine.version_of({predicate.field for predicate in predicates} | {'currency'} | set(columns))
+
+def match_nfts(query, filters=None, fuzzy=False):
+    """全文检索并应用筛选条件，返回 (nft_id 数组, 相关度数组, 列式索引行号数组)"""
+    return plan_nfts(query, filters, fuzzy).execute()
+
+def relevance_order(nft_ids, scores, positions, k):
+    """按相关度排序取前 k 个下标：CFISH优先，其次按相关度和点赞数排序"""
+    # 主键：CFISH段在前、相关度高的在前；次键：点赞多的在前，最后按ID
+    is_cfish = listing_engine.values('currency', positions) == 'CFISH'
+    likes = listing_engine.values('likes', positions).astype(np.int64)
+    primary = np.where(is_cfish, 0.0, CURRENCY_SEGMENT) - scores
+    secondary = -likes * ID_SPAN + nft_ids
+    return top_k_indices(primary, secondary, k)
+
+def load_scored(nft_ids, scores, page):
+    """读出 page 下标对应的NFT并附上相关度"""
+    from src.routes.nft import load_nfts
     
+    results = load_nfts(nft_ids[page].tolist())
+    for nft, score in zip(results, scores[page].tolist()):
+        nft['match_score'] = round(score, 2)
     return results
 
-def search_collections(query, filters=None):
-    """搜索合集"""
-    from src.routes.collection import generate_mock_collection
-    
+def search_nfts(query, filters=None, offset=0, limit=20, fuzzy=False):
+    """搜索NFT，返回 (当前页结果, 总数)"""
+    nft_ids, scores, positions = match_nfts(query, filters, fuzzy)
+    check_cancelled()
+    page = relevance_order(nft_ids, scores, positions, offset + limit)[offset:]
+    
+    check_cancelled()
+    return load_scored(nft_ids, scores, page), len(nft_ids)
+
+def index_collections():
+    """首次搜索时把合集目录写入倒排索引"""
+    from src.routes.collection import get_collection_catalog
+    
+    catalog = get_collection_catalog()
+    if not len(collection_index):
+        for collection in catalog.values():
+            collection_index.add(collection['id'], {
+                'name': collection['name'],
+                'creator': collection['creator']['name'],
+                'description': collection['description']
+            })
+    return catalog
+
+def search_collections(query, filters=None, offset=0, limit=20, fuzzy=False):
+    """搜索合集，返回 (当前页结果, 总数)"""
+    from src.routes.collection import with_stats
+    
+    catalog = index_collections()
+    # 字段条件只作用于NFT，合集只按关键词匹配
+    query = parse_query(query).text
+    ranked, total = collection_index.top_k(query, limit, offset, fuzzy, prefix=True)
+    check_cancelled()
     results = []
-    
-    for i in range(1, 51):  # 搜索50个合集
-        collection = generate_mock_collection(i)
-        
-        match_score = 0
-        query_lower = query.lower()
-        
-        if query_lower in collection['name'].lower():
-            match_score += 10
-        if query_lower in collection['description'].lower():
-            match_score += 5
-        if query_lower in collection['creator']['name'].lower():
-            match_score += 7
-        
-        if match_score > 0:
-            collection['match_score'] = match_score
-            results.append(collection)
-    
-    results.sort(key=lambda x: -x['match_score'])
-    return results
+    for collection_id, score in ranked:
+        collection = with_stats(catalog[collection_id])
+        collection['match_score'] = round(score, 2)
+        results.append(collection)
+    return results, total
+
+def index_user(username):
+    """把用户名加入用户搜索索引（已存在时忽略）"""
+    if username not in known_users:
+        known_users.append(username)
+        user_index.add(len(known_users), {'username': username})
+
+for username in DEFAULT_USERS:
+    index_user(username)
+for term in POPULAR_TERMS:
+    autocomplete.put('query', term)
 
-def search_users(query):
-    """搜索用户"""
+def search_users(query, offset=0, limit=20, fuzzy=False):
+    """搜索用户，返回 (当前页结果, 总数)"""
+    query = parse_query(query).text
+    ranked, total = user_index.top_k(query, limit, offset, fuzzy, prefix=True)
+    check_cancelled()
     users = []
-    usernames = ["CryptoArtist", "DigitalMaster", "NFTCreator", "BlockchainArt", "ArtCollector"]
-    
-    for i, username in enumerate(usernames):
-        if query.lower() in username.lower():
-            user = {
-                'id': i + 1,
-                'username': username,
-                'address': f"0x{''.join([random.choice('0123456789abcdef') for _ in range(40)])}",
-                'avatar': f"/avatars/artist{i+1}.png",
-                'verified': random.choice([True, False]),
-                'nft_count': random.randint(5, 100),
-                'followers': random.randint(100, 10000),
-                'following': random.randint(50, 1000),
-                'total_volume': round(random.uniform(10, 1000), 2),
-                'match_score': 10 if query.lower() == username.lower() else 5
+    for user_id, score in ranked:
+        username = known_users[user_id - 1]
+        users.append({
+            'id': user_id,
+            'username': username,
+            'address': f"0x{''.join([random.choice('0123456789abcdef') for _ in range(40)])}",
+            'avatar': f"/avatars/artist{user_id}.png",
+            'verified': random.choice([True, False]),
+            'nft_count': random.randint(5, 100),
+            'followers': random.randint(100, 10000),
+            'following': random.randint(50, 1000),
+            'total_volume': round(random.uniform(10, 1000), 2),
+            'match_score': round(score, 2)
+        })
+    return users, total
+
+def federated_search(sources, deadlines):
+    """在共享线程池中并发执行各数据源的搜索，返回 {'results': {...}, 'timed_out': [数据源], 'busy': [数据源]}
+
+    sources 为 {数据源: 返回 (结果列表, 总数) 的函数}，deadlines 为各数据源的截止时间（秒）。
+    结果按完成顺序合并；超过截止时间仍未完成的数据源不再等待，记入 timed_out。
+    线程池已满时数据源不排队等待，直接记入 busy，本次返回部分结果。
+    数据源在 check_cancelled() 处检查取消标志和截止时刻，超时后尽早退出并归还线程池的空位。
+    """
+    app = current_app._get_current_object()
+    started = time.monotonic()
+    cancelled = {name: threading.Event() for name in sources}
+    
+    def run(name, source):
+        _search_state.source = (cancelled[name], started + deadlines[name])
+        try:
+            with app.app_context():
+                return source()
+        finally:
+            _search_state.source = None
+            search_slots.release()
+    
+    pending = {}
+    busy = []
+    for name, source in sources.items():
+        if not search_slots.acquire(blocking=False):
+            busy.append(name)
+            continue
+        pending[search_executor.submit(run, name, source)] = name
+    
+    results = {}
+    timed_out = []
+    while pending:
+        # 已过截止时间仍未完成的数据源不再等待，通知其尽早退出，结果被丢弃
+        elapsed = time.monotonic() - started
+        for future, name in list(pending.items()):
+            if not future.done() and elapsed >= deadlines[name]:
+                cancelled[name].set()
+                timed_out.append(name)
+                del pending[future]
+        if not pending:
+            break
+        
+        # 等到任一数据源完成或最近的截止时间，完成的结果立即合并
+        timeout = min(deadlines[name] for name in pending.values()) - elapsed
+        done, _ = wait(pending, timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+        for future in done:
+            name = pending.pop(future)
+            try:
+                items, total = future.result()
+            except SearchCancelled:
+                # 在截止时刻前后自行退出的数据源
+                timed_out.append(name)
+                continue
+            results[name] = {
+                'items': items,
+                'total': total
             }
-            users.append(user)
     
-    users.sort(key=lambda x: -x['match_score'])
-    return users
+    return {'results': results, 'timed_out': timed_out, 'busy': busy}
 
 @search_bp.route('/search', methods=['GET'])
 def universal_search():
@@ -118,6 +295,13 @@ def universal_search():
     page = int(request.args.get('page', 1))
     limit = int(request.args.get('limit', 20))
     user_address = request.args.get('user_address')
+    fuzzy = parse_bool(request.args.get('fuzzy')) or False
+    explain = parse_bool(request.args.get('explain')) or False
+    timeout_ms = request.args.get('timeout_ms', type=int)
+    deadline = {
+        name: min(seconds, timeout_ms / 1000) if timeout_ms else seconds
+        for name, seconds in SOURCE_DEADLINES.items()
+    }
     
     if not query:
         return jsonify({
@@ -131,20 +315,6 @@ def universal_search():
             'error': 'Search query must be at least 2 characters'
         }), 400
     
-    # 记录搜索历史
-    if user_address:
-        if user_address not in user_search_history:
-            user_search_history[user_address] = []
-        
-        # 避免重复记录相同查询
-        if query not in user_search_history[user_address]:
-            user_search_history[user_address].insert(0, query)
-            # 只保留最近20次搜索
-            user_search_history[user_address] = user_search_history[user_address][:20]
-    
-    # 更新热门搜索
-    popular_searches[query] = popular_searches.get(query, 0) + 1
-    
     # 获取筛选条件
     filters = {
         'category': request.args.get('category'),
@@ -154,80 +324,93 @@ def universal_search():
         'rarity': request.args.get('rarity'),
         'is_for_sale': request.args.get('is_for_sale')
     }
-    filters = {k: v for k, v in filters.items() if v is not None}
     
-    results = {}
+    # 查询中可以带 category:Art price:<5 这样的字段条件；筛选条件中的价格必须是数字
+    try:
+        parse_query(query)
+        filters = canonical_filters(parse_price_filters(filters))
+    except ValueError as error:
+        return jsonify({
+            'success': False,
+            'error': str(error)
+        }), 400
     
-    if search_type in ['all', 'nfts']:
-        nft_results = search_nfts(query, filters)
-        if search_type == 'nfts':
-            # 分页
-            start_idx = (page - 1) * limit
-            end_idx = start_idx + limit
-            results['nfts'] = {
-                'items': nft_results[start_idx:end_idx],
-                'total': len(nft_results),
-                'pagination': {
-                    'page': page,
-                    'limit': limit,
-                    'pages': (len(nft_results) + limit - 1) // limit if nft_results else 1
-                }
-            }
-        else:
-            results['nfts'] = {
-                'items': nft_results[:5],  # 只显示前5个
-                'total': len(nft_results)
-            }
+    # 记录搜索历史
+    if user_address:
+        if user_address not in user_search_history:
+            user_search_history[user_address] = []
+        
+        # 避免重复记录相同查询
+        if query not in user_search_history[user_address]:
+            user_search_history[user_address].insert(0, query)
+            # 只保留最近20次搜索
+            user_search_history[user_address] = user_search_history[user_address][:20]
     
-    if search_type in ['all', 'collections']:
-        collection_results = search_collections(query, filters)
-        if search_type == 'collections':
-            start_idx = (page - 1) * limit
-            end_idx = start_idx + limit
-            results['collections'] = {
-                'items': collection_results[start_idx:end_idx],
-                'total': len(collection_results),
+    # 更新热门搜索：只统计去掉字段条件后的关键词文本，没有可检索词的查询（标点、停用词）不统计
+    keywords = normalize_query(parse_query(query).text)
+    if tokenize(keywords):
+        search_count, evicted = trending_queries.record(keywords)
+        # 被计数器替换出去的查询同时从搜索联想中移除
+        if evicted is not None:
+            autocomplete.remove('query', evicted)
+        # 一天内（衰减后）被搜索足够多次的查询才进入所有用户共享的搜索联想，个别用户的输入和拼写错误不会出现
+        if trending_queries.estimate(keywords, 'day') >= MIN_SUGGESTION_SEARCHES:
+            autocomplete.put('query', keywords, round(search_count))
+    
+    def run_search():
+        # 综合搜索时各类并发查询，每类只取前几条；单独搜索某类时在当前线程分页查询
+        if search_type == 'all':
+            return federated_search({
+                name: (lambda searcher=searcher, preview=preview: searcher(0, preview))
+                for name, (searcher, preview) in searchers.items()
+            }, deadline)
+        if search_type not in searchers:
+            return {'results': {}, 'timed_out': [], 'busy': []}
+        
+        searcher, _ = searchers[search_type]
+        items, total = searcher((page - 1) * limit, limit)
+        results = {
+            search_type: {
+                'items': items,
+                'total': total,
                 'pagination': {
                     'page': page,
                     'limit': limit,
-                    'pages': (len(collection_results) + limit - 1) // limit if collection_results else 1
+                    'pages': (total + limit - 1) // limit if total else 1
                 }
             }
-        else:
-            results['collections'] = {
-                'items': collection_results[:3],
-                'total': len(collection_results)
-            }
+        }
+        return {'results': results, 'timed_out': [], 'busy': []}
     
-    if search_type in ['all', 'users']:
-        user_results = search_users(query)
-        if search_type == 'users':
-            start_idx = (page - 1) * limit
-            end_idx = start_idx + limit
-            results['users'] = {
-                'items': user_results[start_idx:end_idx],
-                'total': len(user_results),
-                'pagination': {
-                    'page': page,
-                    'limit': limit,
-                    'pages': (len(user_results) + limit - 1) // limit if user_results else 1
-                }
-            }
-        else:
-            results['users'] = {
-                'items': user_results[:3],
-                'total': len(user_results)
-            }
+    searchers = {
+        'nfts': (lambda offset, limit: search_nfts(query, filters, offset, limit, fuzzy), 5),
+        'collections': (lambda offset, limit: search_collections(query, filters, offset, limit, fuzzy), 3),
+        'users': (lambda offset, limit: search_users(query, offset, limit, fuzzy), 3)
+    }
+    # 相同的规范化查询直接复用缓存结果，目录有写入时缓存自动失效；超时或线程池已满时的不完整结果不缓存
+    key = cache_key('universal', query, filters, type=search_type, page=page, limit=limit, fuzzy=fuzzy)
+    outcome = search_cache.get_or_compute(
+        key, run_search, version=cache_version(query, filters),
+        cache_if=lambda outcome: not outcome['timed_out'] and not outcome['busy']
+    )
+    
+    data = {
+        'query': query,
+        'search_type': search_type,
+        'fuzzy': fuzzy,
+        'results': outcome['results'],
+        'partial': bool(outcome['timed_out'] or outcome['busy']),
+        'timed_out_sources': outcome['timed_out'],
+        'busy_sources': outcome['busy'],
+        'search_time': datetime.now().isoformat(),
+        'applied_filters': filters
+    }
+    if explain:
+        data['plan'] = plan_nfts(query, filters, fuzzy).explain()
     
     return jsonify({
         'success': True,
-        'data': {
-            'query': query,
-            'search_type': search_type,
-            'results': results,
-            'search_time': datetime.now().isoformat(),
-            'applied_filters': filters
-        }
+        'data': data
     })
 
 @search_bp.route('/search/suggestions', methods=['GET'])
@@ -244,45 +427,17 @@ def get_search_suggestions():
             }
         })
     
-    # 生成搜索建议
+    # 从前缀树读取预先排好序的补全
     suggestions = []
-    
-    # 基于热门搜索的建议
-    popular_terms = ["crypto art", "digital collectibles", "pixel art", "3d models", "music nfts", 
-                    "gaming items", "profile pictures", "abstract art", "photography", "animation"]
-    
-    for term in popular_terms:
-        if query.lower() in term.lower():
-            suggestions.append({
-                'text': term,
-                'type': 'popular',
-                'search_count': random.randint(100, 5000)
-            })
-    
-    # 基于NFT名称的建议
-    nft_names = ["Amazing NFT", "Crypto Punk", "Bored Ape", "Cool Cat", "Doodle", 
-                "Azuki", "Clone X", "Moonbird", "Otherside", "Art Block"]
-    
-    for name in nft_names:
-        if query.lower() in name.lower():
-            suggestions.append({
-                'text': name,
-                'type': 'nft',
-                'match_type': 'name'
-            })
-    
-    # 基于创作者的建议
-    creators = ["CryptoArtist", "DigitalMaster", "NFTCreator", "BlockchainArt"]
-    for creator in creators:
-        if query.lower() in creator.lower():
-            suggestions.append({
-                'text': creator,
-                'type': 'creator',
-                'verified': True
-            })
-    
-    # 限制数量并排序
-    suggestions = suggestions[:limit]
+    for text, kind, weight, extra in autocomplete.suggest(query, limit):
+        if kind == 'query':
+            suggestions.append({'text': text, 'type': 'popular', 'search_count': weight})
+        elif kind == 'nft':
+            suggestions.append({'text': text, 'type': 'nft', 'match_type': 'name', 'nft_id': extra['nft_id']})
+        elif kind == 'collection':
+            suggestions.append({'text': text, 'type': 'collection', 'collection_id': extra['collection_id']})
+        else:
+            suggestions.append({'text': text, 'type': 'creator', 'verified': extra.get('verified', False)})
     
     return jsonify({
         'success': True,
@@ -331,22 +486,27 @@ def clear_search_history(user_address):
 def get_trending_searches():
     """获取热门搜索"""
     limit = int(request.args.get('limit', 10))
+    window = request.args.get('window', 'day')
     
-    # 排序热门搜索
-    trending = sorted(popular_searches.items(), key=lambda x: x[1], reverse=True)[:limit]
+    if window not in WINDOWS:
+        return jsonify({
+            'success': False,
+            'error': f"Invalid window, expected one of: {', '.join(WINDOWS)}"
+        }), 400
     
     trending_searches = [
         {
             'query': query,
-            'search_count': count,
-            'trend': 'up' if count > 50 else 'stable'
+            'search_count': round(count, 2),
+            'trend': trend
         }
-        for query, count in trending
+        for query, count, trend in trending_queries.top(window, limit)
     ]
     
     return jsonify({
         'success': True,
         'data': {
+            'window': window,
             'trending_searches': trending_searches,
             'updated_at': datetime.now().isoformat()
         }
@@ -367,13 +527,7 @@ def get_search_filters():
                 {'code': 'CFISH', 'name': 'CFish Token', 'has_fees': False}
             ],
             'rarities': ['Common', 'Uncommon', 'Rare', 'Epic', 'Legendary'],
-            'price_ranges': [
-                {'label': 'Under 1', 'min': 0, 'max': 1},
-                {'label': '1 - 10', 'min': 1, 'max': 10},
-                {'label': '10 - 50', 'min': 10, 'max': 50},
-                {'label': '50 - 100', 'min': 50, 'max': 100},
-                {'label': 'Over 100', 'min': 100, 'max': null}
-            ],
+            'price_ranges': PRICE_RANGES,
             'sort_options': [
                 {'value': 'relevance', 'label': 'Most Relevant'},
                 {'value': 'price_low_high', 'label': 'Price: Low to High'},
@@ -385,6 +539,34 @@ def get_search_filters():
         }
     })
 
+def stream_advanced_search(query, filters, sort_by):
+    """以 NDJSON 逐行返回高级搜索的全部结果，NFT按批从数据库读取"""
+    from src.routes.nft import iter_nfts, ID_BATCH_SIZE
+    
+    nft_ids, scores, positions = match_nfts(query, filters)
+    if sort_by in ADVANCED_SORTS:
+        field, order, cfish_first = ADVANCED_SORTS[sort_by]
+        ordered_ids, _, _ = listing_engine.query(
+            {'ids': nft_ids}, sort_by=field, order=order,
+            limit=len(nft_ids), cfish_first=cfish_first
+        )
+        rows = iter_nfts(ordered_ids)
+    else:
+        order = relevance_order(nft_ids, scores, positions, len(nft_ids))
+        ordered_ids, ordered_scores = nft_ids[order], scores[order]
+        
+        def scored_rows():
+            # 按批把相关度对应到读出的NFT上，内存只与批大小有关
+            for i in range(0, len(ordered_ids), ID_BATCH_SIZE):
+                batch_ids = ordered_ids[i:i + ID_BATCH_SIZE]
+                score_of = dict(zip(batch_ids.tolist(), ordered_scores[i:i + ID_BATCH_SIZE].tolist()))
+                for nft in iter_nfts(batch_ids):
+                    nft['match_score'] = round(score_of[nft['id']], 2)
+                    yield nft
+        rows = scored_rows()
+    
+    return ndjson_response(rows, headers={'X-Total-Count': str(len(nft_ids))})
+
 @search_bp.route('/search/advanced', methods=['POST'])
 def advanced_search():
     """高级搜索"""
@@ -395,6 +577,8 @@ def advanced_search():
     sort_by = data.get('sort_by', 'relevance')
     page = int(data.get('page', 1))
     limit = int(data.get('limit', 20))
+    facets = data.get('facets', FACET_FIELDS)
+    explain = parse_bool(data.get('explain')) or False
     
     if not query and not filters:
         return jsonify({
@@ -402,45 +586,103 @@ def advanced_search():
             'error': 'Query or filters are required'
         }), 400
     
-    # 执行高级搜索
-    nft_results = search_nfts(query or '', filters)
-    
-    # 高级排序
-    if sort_by == 'price_low_high':
-        nft_results.sort(key=lambda x: x['price'])
-    elif sort_by == 'price_high_low':
-        nft_results.sort(key=lambda x: x['price'], reverse=True)
-    elif sort_by == 'newest':
-        nft_results.sort(key=lambda x: x['created_at'], reverse=True)
-    elif sort_by == 'most_liked':
-        nft_results.sort(key=lambda x: x['likes'], reverse=True)
-    elif sort_by == 'cfish_first':
-        nft_results.sort(key=lambda x: (x['currency'] != 'CFISH', -x['likes']))
-    
-    # 分页
-    start_idx = (page - 1) * limit
-    end_idx = start_idx + limit
-    paginated_results = nft_results[start_idx:end_idx]
+    if not isinstance(facets, list) or any(facet not in FACET_FIELDS for facet in facets):
+        return jsonify({
+            'success': False,
+            'error': f"facets must be a list of: {', '.join(FACET_FIELDS)}"
+        }), 400
     
-    return jsonify({
-        'success': True,
-        'data': {
-            'query': query,
-            'filters': filters,
-            'sort_by': sort_by,
+    if not isinstance(filters, dict):
+        return jsonify({
+            'success': False,
+            'error': 'filters must be an object'
+        }), 400
+    
+    try:
+        parse_query(query)
+        filters = canonical_filters(parse_price_filters(filters))
+    except ValueError as error:
+        return jsonify({
+            'success': False,
+            'error': str(error)
+        }), 400
+    
+    # 执行高级搜索：按字段排序交给列式索引在命中集合上做 top-k，相关度排序复用同一次匹配的结果
+    from src.routes.nft import load_nfts
+    
+    # NDJSON 格式按排序方式流式返回全部结果，不分页也不缓存
+    if wants_ndjson(data):
+        return stream_advanced_search(query, filters, sort_by)
+    
+    def run_search():
+        start_idx = (page - 1) * limit
+        nft_ids, scores, positions = match_nfts(query, filters)
+        total = len(nft_ids)
+        if sort_by in ADVANCED_SORTS:
+            field, order, cfish_first = ADVANCED_SORTS[sort_by]
+            page_ids, _, _ = listing_engine.query(
+                {'ids': nft_ids}, sort_by=field, order=order,
+                limit=limit, offset=start_idx, cfish_first=cfish_first
+            )
+            paginated_results = load_nfts(page_ids)
+        else:
+            page_idx = relevance_order(nft_ids, scores, positions, start_idx + limit)[start_idx:]
+            paginated_results = load_scored(nft_ids, scores, page_idx)
+        
+        # 分面统计与摘要在命中行上一次算出，摘要所需的分面总是计算
+        counts = listing_engine.facets(
+            positions,
+            set(facets) | {'currency', 'is_for_sale'},
+            price_edges=PRICE_EDGES if 'price' in facets else None
+        )
+        stats = {facet: counts[facet] for facet in facets if facet != 'price'}
+        if 'price' in facets:
+            stats['price'] = [
+                dict(price_range, count=count)
+                for price_range, count in zip(PRICE_RANGES, counts['price'])
+            ]
+        return {
             'results': paginated_results,
             'pagination': {
                 'page': page,
                 'limit': limit,
-                'total': len(nft_results),
-                'pages': (len(nft_results) + limit - 1) // limit if nft_results else 1
+                'total': total,
+                'pages': (total + limit - 1) // limit if total else 1
             },
             'summary': {
-                'total_results': len(nft_results),
-                'cfish_count': len([r for r in nft_results if r['currency'] == 'CFISH']),
-                'sol_count': len([r for r in nft_results if r['currency'] == 'SOL']),
-                'for_sale_count': len([r for r in nft_results if r['is_for_sale']])
-            }
+                'total_results': total,
+                'cfish_count': counts['currency'].get('CFISH', 0),
+                'sol_count': counts['currency'].get('SOL', 0),
+                'for_sale_count': counts['is_for_sale']['true']
+            },
+            'stats': stats
+        }
+    
+    key = cache_key('advanced', query, filters, sort_by=sort_by, page=page, limit=limit, facets=sorted(facets))
+    # 分面和摘要统计的列、排序列也是依赖的列
+    columns = set(facets) | {'currency', 'is_for_sale'}
+    if sort_by in ADVANCED_SORTS:
+        columns.add(ADVANCED_SORTS[sort_by][0])
+    version = cache_version(query, filters, columns)
+    result = search_cache.get_or_compute(key, run_search, version=version)
+    if explain:
+        result = dict(result, plan=plan_nfts(query, filters).explain())
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'query': query,
+            'filters': filters,
+            'sort_by': sort_by,
+            **result
         }
     })
 
+
+@search_bp.route('/search/cache/stats', methods=['GET'])
+def get_search_cache_stats():
+    """获取搜索结果缓存的命中统计"""
+    return jsonify({
+        'success': True,
+        'data': dict(search_cache.stats(), catalog_version=listing_engine.version)
+    })
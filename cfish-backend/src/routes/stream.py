@@ -0,0 +1,78 @@
+"""
+实时推送 (Server-Sent Events) API 路由
+客户端用一个长连接订阅多个主题，替代轮询拍卖列表、通知和批量任务进度：
+    GET /api/stream?topics=auction:auction_1,notifications:0xabc,job:<任务ID>
+"""
+
+from flask import Blueprint, request, jsonify
+from src.services.event_bus import event_bus
+from src.services.streaming import sse_event, sse_response
+
+stream_bp = Blueprint('stream', __name__)
+
+# 支持的主题前缀
+TOPIC_PREFIXES = ('auction', 'notifications', 'job')
+# 单个连接最多订阅的主题数
+MAX_TOPICS = 50
+# 没有事件时发送心跳的间隔（秒），防止代理断开空闲连接
+HEARTBEAT_INTERVAL = 15
+# 断线后客户端重连的等待时间（毫秒）
+RETRY_MS = 3000
+
+def parse_topics(raw):
+    """解析逗号分隔的主题列表，格式错误时抛出 ValueError"""
+    topics = []
+    for topic in (raw or '').split(','):
+        topic = topic.strip()
+        if not topic:
+            continue
+        prefix, _, key = topic.partition(':')
+        if prefix not in TOPIC_PREFIXES or not key:
+            raise ValueError(f"Invalid topic: {topic}. Must be one of: {', '.join(p + ':<id>' for p in TOPIC_PREFIXES)}")
+        topics.append(topic)
+    if not topics:
+        raise ValueError('At least one topic is required')
+    if len(topics) > MAX_TOPICS:
+        raise ValueError(f'At most {MAX_TOPICS} topics per connection')
+    return topics
+
+@stream_bp.route('/stream', methods=['GET'])
+def stream_events():
+    """订阅主题并以 SSE 推送事件"""
+    try:
+        topics = parse_topics(request.args.get('topics'))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    
+    subscriber = event_bus.subscribe(topics)
+    
+    def events():
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            yield sse_event({'topics': sorted(subscriber.topics)}, event='subscribed')
+            while True:
+                message = subscriber.get(HEARTBEAT_INTERVAL)
+                if subscriber.dropped:
+                    # 积压超过上限，通知客户端后断开，客户端重连后重新拉取最新状态
+                    yield sse_event({'reason': 'slow_consumer'}, event='dropped')
+                    return
+                if message is None:
+                    yield ': heartbeat\n\n'
+                    continue
+                yield sse_event(
+                    {'topic': message['topic'], 'data': message['data'], 'time': message['time']},
+                    event=message['event'], event_id=message['id']
+                )
+        finally:
+            # 客户端断开时生成器被关闭，取消订阅
+            event_bus.unsubscribe(subscriber)
+    
+    return sse_response(events())
+
+@stream_bp.route('/stream/stats', methods=['GET'])
+def get_stream_stats():
+    """获取事件总线的订阅统计"""
+    return jsonify({
+        "success": True,
+        "data": event_bus.stats()
+    })
@@ -23,17 +23,17 @@ def get_wallet_balance(wallet_address):
 @wallet_bp.route('/wallet/nfts/<wallet_address>', methods=['GET'])
 def get_wallet_nfts(wallet_address):
     """获取钱包中的NFT"""
-    from src.routes.nft import generate_mock_nft
+    from src.routes.nft import load_nfts_or_mock
     
     page = int(request.args.get('page', 1))
     limit = int(request.args.get('limit', 20))
     
-    # 生成钱包中的NFT
+    # 生成钱包中的NFT，当前页的ID一次批量读取
     total_nfts = random.randint(5, 50)
+    nft_ids = [random.randint(1, 10000) for _ in range((page - 1) * limit, min(page * limit, total_nfts))]
     nfts = []
     
-    for i in range((page - 1) * limit, min(page * limit, total_nfts)):
-        nft = generate_mock_nft(random.randint(1, 10000))
+    for nft in load_nfts_or_mock(nft_ids):
         nft['owned_since'] = (datetime.now() - timedelta(days=random.randint(1, 365))).isoformat()
         nfts.append(nft)
     
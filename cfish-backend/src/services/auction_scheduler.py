@@ -0,0 +1,103 @@
+"""
+拍卖生命周期调度 (Auction Scheduler)
+以 (触发时间, 拍卖ID, 事件) 为条目的最小堆，后台线程睡眠到堆顶条目的触发时间再执行，
+拍卖在开始、结束的时刻准时转换状态，结算也在后台线程中完成，不占用请求。
+
+改期（如防狙击延时）不在堆中查找旧条目：每个条目带一个全局递增的代号，(拍卖, 事件) 只记录
+最新条目的代号，重新安排时压入新条目，旧条目出堆时代号不一致即被丢弃；取消只需删除记录。
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AuctionScheduler:
+    """按时间触发拍卖事件的最小堆调度器"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = []             # (触发时间, 代号, 拍卖ID, 事件)
+        self._generations = {}      # (拍卖ID, 事件) -> 最新条目的代号
+        self._handlers = {}         # 事件 -> handler(拍卖ID)
+        self._counter = itertools.count()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def on(self, event, handler):
+        """注册事件处理函数，在后台线程中以拍卖ID调用"""
+        self._handlers[event] = handler
+
+    def schedule(self, auction_id, event, due):
+        """安排（或改期）某场拍卖的事件，due 为 Unix 时间戳"""
+        with self._cond:
+            generation = next(self._counter)
+            self._generations[(auction_id, event)] = generation
+            heapq.heappush(self._heap, (due, generation, auction_id, event))
+            # 新条目成为堆顶时唤醒后台线程，重新计算睡眠时间
+            if self._heap[0][1] == generation:
+                self._cond.notify()
+
+    def cancel(self, auction_id, *events):
+        """取消某场拍卖的若干事件，堆中的旧条目出堆时丢弃"""
+        with self._cond:
+            for event in events:
+                self._generations.pop((auction_id, event), None)
+
+    def pending(self):
+        """仍然有效的条目数"""
+        with self._cond:
+            return len(self._generations)
+
+    def _pop_due(self, now):
+        """弹出所有到期且有效的条目，调用方需持有 self._cond"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, generation, auction_id, event = heapq.heappop(self._heap)
+            key = (auction_id, event)
+            if self._generations.get(key) == generation:
+                del self._generations[key]
+                due.append((auction_id, event))
+        return due
+
+    def run_due(self, now=None):
+        """执行所有到期的事件，返回执行的数量"""
+        with self._cond:
+            due = self._pop_due(time.time() if now is None else now)
+        for auction_id, event in due:
+            handler = self._handlers.get(event)
+            if handler is None:
+                continue
+            try:
+                handler(auction_id)
+            except Exception:
+                # 单个拍卖处理失败不影响其他拍卖
+                logger.exception('Auction %s failed to handle %s', auction_id, event)
+        return len(due)
+
+    def start(self):
+        """启动后台调度线程"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='auction-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                timeout = self._heap[0][0] - time.time() if self._heap else None
+                if timeout is None or timeout > 0:
+                    self._cond.wait(timeout)
+            self.run_due()
+
+
+auction_scheduler = AuctionScheduler()
@@ -0,0 +1,238 @@
+"""
+搜索联想 (Autocomplete)
+把NFT名称、合集名称、创作者和热门搜索词放进一棵前缀树，每个节点预先存好按热度排序的前 k 个补全，
+联想请求只需沿输入的前缀走到对应节点并读取列表，耗时与目录大小无关。
+
+除了整段文本，每个单词的起始位置也作为一个键插入，所以输入 "punk" 也能联想到 "Crypto Punk"。
+键只插入前 MAX_DEPTH 个字符，更长的前缀按截断后的前缀匹配后再过滤。
+
+树启动后，条目的新增和热度变化直接在树上原地更新：只沿该条目各单词起点的路径调整节点上的
+前 k 列表（节点列表整体替换，读取方不会看到改了一半的列表），搜索热度的每次累加不会引起重建。
+只有无法就地确定结果时（热度下降或删除使条目离开已满的前 k 列表，列表外可能有条目应当补上），
+才标记为脏，由后台线程合并一段时间内的修改后重建整棵树并整体替换引用。
+"""
+
+import re
+import threading
+from bisect import insort
+
+MAX_DEPTH = 24
+
+_WORD_START = re.compile(r'(?<![0-9a-z])[0-9a-z]|[一-鿿]')
+
+
+def normalize(text):
+    """转小写并合并空白"""
+    return ' '.join((text or '').lower().split())
+
+
+class _Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []
+
+
+def iter_paths(root, key, create=False, max_depth=MAX_DEPTH):
+    """键的各单词起点路径上的节点（去重），create 为 True 时补建缺少的节点"""
+    seen = set()
+    for match in _WORD_START.finditer(key):
+        node = root
+        for char in key[match.start():match.start() + max_depth]:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    break
+                child = node.children[char] = _Node()
+            node = child
+            if id(node) not in seen:
+                seen.add(id(node))
+                yield node
+
+
+def build_trie(entries, top_k, max_depth=MAX_DEPTH):
+    """用 [(键, 热度, ...)] 建树，节点上的 top 为条目下标列表，按热度从高到低"""
+    root = _Node()
+    order = sorted(range(len(entries)), key=lambda i: (-entries[i][1], entries[i][0]))
+    for index in order:
+        key = entries[index][0]
+        for match in _WORD_START.finditer(key):
+            node = root
+            for char in key[match.start():match.start() + max_depth]:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _Node()
+                node = child
+                # 按热度顺序插入，同一条目的多个起点会连续到达同一节点，只需与末尾比较去重
+                if len(node.top) < top_k and (not node.top or node.top[-1] != index):
+                    node.top.append(index)
+    return root
+
+
+class AutocompleteService:
+    """维护联想条目登记表和前缀树：树启动后原地更新，无法就地更新时由后台线程重建"""
+
+    def __init__(self, top_k=20, rebuild_delay=5):
+        self.top_k = top_k
+        self.rebuild_delay = rebuild_delay
+        self._lock = threading.Lock()
+        self._entries = {}          # (类型, 键) -> [展示文本, 热度, 附加字段]
+        # (条目列表, (类型, 键) -> 条目下标, 根节点)；条目为 (键, 热度, 类型, 展示文本, 附加字段)，已删除的为 None
+        self._snapshot = ([], {}, _Node())
+        self._live = False          # 树建好后写入才原地更新，之前只登记
+        self._touched = None        # 重建期间被修改的条目，建好后在新树上重放
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def put(self, kind, text, weight=0, **extra):
+        """登记或覆盖一个条目"""
+        key = normalize(text)
+        if not key:
+            return
+        with self._lock:
+            self._entries[(kind, key)] = [text, weight, extra]
+            self._changed((kind, key))
+
+    def bump(self, kind, text, amount=1, **extra):
+        """累加条目热度，条目不存在时创建"""
+        key = normalize(text)
+        if not key:
+            return
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None:
+                self._entries[(kind, key)] = [text, amount, extra]
+            else:
+                entry[1] += amount
+                entry[2].update(extra)
+            self._changed((kind, key))
+
+    def remove(self, kind, text):
+        with self._lock:
+            if self._entries.pop((kind, normalize(text)), None) is not None:
+                self._changed((kind, normalize(text)))
+
+    def _changed(self, entry_key):
+        """登记表中的条目有变化：树已建好时原地更新，否则留给重建；调用方需持有 self._lock"""
+        if not self._live:
+            self._dirty.set()
+            return
+        if self._touched is not None:
+            self._touched.add(entry_key)
+        if not self._apply(self._snapshot, entry_key):
+            self._dirty.set()
+
+    def _apply(self, snapshot, entry_key):
+        """把登记表中条目的当前状态同步到树上，返回结果是否精确（否则需要重建）"""
+        records, index_of, root = snapshot
+        index = index_of.get(entry_key)
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            return index is None or self._detach(records, index_of, root, entry_key)
+        text, weight, extra = entry
+        kind, key = entry_key
+        if index is None:
+            index = index_of[entry_key] = len(records)
+            records.append((key, weight, kind, text, dict(extra)))
+            return self._reorder(records, root, index, create=True)
+        previous = records[index][1]
+        records[index] = (key, weight, kind, text, dict(extra))
+        return self._reorder(records, root, index, create=False) or weight >= previous
+
+    def _reorder(self, records, root, index, create):
+        """按条目的新热度调整其路径上各节点的前 k 列表，返回结果是否精确"""
+        def rank(i):
+            return -records[i][1], records[i][0]
+
+        exact = True
+        for node in iter_paths(root, records[index][0], create):
+            listed = index in node.top
+            top = [i for i in node.top if i != index]
+            insort(top, index, key=rank)
+            if len(top) > self.top_k:
+                # 原本在列表中的条目被挤出，列表外未记录的条目可能比它靠前
+                if top.pop() == index and listed:
+                    exact = False
+            elif listed and len(node.top) >= self.top_k and top[-1] == index:
+                # 热度下降后排在已满列表的末尾，列表外的条目可能比它靠前
+                exact = False
+            node.top = top
+        return exact
+
+    def _detach(self, records, index_of, root, entry_key):
+        """从树上移除条目，返回结果是否精确（已满的列表少了一项需要重建补齐）"""
+        index = index_of.pop(entry_key)
+        exact = True
+        for node in iter_paths(root, records[index][0]):
+            if index in node.top:
+                exact = exact and len(node.top) < self.top_k
+                node.top = [i for i in node.top if i != index]
+        records[index] = None
+        return exact
+
+    def rebuild(self):
+        """按登记表重建前缀树，重建期间的修改在新树上重放后再替换引用"""
+        with self._lock:
+            entries = [(key, entry[1], kind, entry[0], dict(entry[2]))
+                       for (kind, key), entry in self._entries.items()]
+            self._touched = set()
+        root = build_trie(entries, self.top_k)
+        snapshot = (entries, {(kind, key): i for i, (key, _, kind, _, _) in enumerate(entries)}, root)
+        exact = True
+        with self._lock:
+            for entry_key in self._touched:
+                exact = self._apply(snapshot, entry_key) and exact
+            self._touched = None
+            self._snapshot = snapshot
+            self._live = True
+        if not exact:
+            self._dirty.set()
+
+    def suggest(self, prefix, limit=10):
+        """返回 [(展示文本, 类型, 热度, 附加字段)]，按热度从高到低"""
+        prefix = normalize(prefix)
+        entries, _, node = self._snapshot
+        for char in prefix[:MAX_DEPTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        results = []
+        for index in node.top:
+            entry = entries[index]
+            if entry is None:
+                continue
+            key, weight, kind, text, extra = entry
+            # 超过树深度的前缀需要再核对一次
+            if len(prefix) > MAX_DEPTH and not any(key.startswith(prefix, m.start()) for m in _WORD_START.finditer(key)):
+                continue
+            results.append((text, kind, weight, extra))
+            if len(results) >= limit:
+                break
+        return results
+
+    def start(self):
+        """立即建树并启动后台重建线程"""
+        if self._thread is not None:
+            return
+        self._dirty.clear()
+        self.rebuild()
+        self._thread = threading.Thread(target=self._run, name='autocomplete-rebuild', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._dirty.set()
+
+    def _run(self):
+        while True:
+            self._dirty.wait()
+            # 合并一段时间内的修改，避免每次写入都重建
+            if self._stop.wait(self.rebuild_delay):
+                return
+            self._dirty.clear()
+            self.rebuild()
+
+
+autocomplete = AutocompleteService()
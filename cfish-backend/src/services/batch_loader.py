@@ -0,0 +1,53 @@
+"""
+请求内批量加载器 (Batch Loader)
+同一个请求中需要的ID先登记，读取时去重后一次性交给 fetch 查询，
+结果缓存到请求结束，重复的ID不会再次查询，避免逐个ID查询的 N+1 问题。
+"""
+
+from flask import g, has_app_context
+
+
+class BatchLoader:
+    """收集ID并批量查询，fetch(ids) 返回 {id: 结果}"""
+
+    def __init__(self, fetch):
+        self._fetch = fetch
+        self._pending = []
+        self._pending_set = set()
+        self._cache = {}
+
+    def want(self, ids):
+        """登记稍后需要的ID"""
+        for key in ids:
+            if key not in self._cache and key not in self._pending_set:
+                self._pending.append(key)
+                self._pending_set.add(key)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = []
+        self._pending_set = set()
+        found = self._fetch(pending)
+        for key in pending:
+            self._cache[key] = found.get(key)
+
+    def load_many(self, ids):
+        """按给定顺序返回结果，查不到的ID对应 None"""
+        self.want(ids)
+        self._flush()
+        return [self._cache[key] for key in ids]
+
+    def load(self, key):
+        return self.load_many([key])[0]
+
+
+def get_loader(name, fetch):
+    """获取当前请求中名为 name 的加载器，不存在时创建；不在应用上下文中时返回新的加载器"""
+    if not has_app_context():
+        return BatchLoader(fetch)
+    loaders = g.setdefault('batch_loaders', {})
+    if name not in loaders:
+        loaders[name] = BatchLoader(fetch)
+    return loaders[name]
@@ -0,0 +1,109 @@
+"""
+竞价簿 (Bid Book)
+每场拍卖一份：出价按金额升序保存在列表中（有效出价必须高于当前出价，追加即保持有序，
+同时也是时间顺序），参与者按地址保存在字典中。领先者和次高价（领先者以外其他人的最高出价）
+随每次出价增量维护，出价校验和写入都是 O(1)，与拍卖的出价数、参与者数无关。
+
+并发：Flask 在多个线程中处理请求，同一场拍卖的"读取当前出价 - 校验 - 写入"必须串行。
+拍卖按ID哈希到固定数量的锁（锁分段），不同拍卖的出价大多落在不同的锁上并行执行，
+不需要全局锁，锁的数量也不随拍卖数量增长。每个被接受的出价分配一个单调递增的序号，
+序号顺序即出价生效的顺序，出价金额随序号严格递增。
+"""
+
+import threading
+
+# 锁分段的数量
+LOCK_STRIPES = 64
+
+
+class BidError(ValueError):
+    """出价不满足拍卖规则"""
+
+
+class LockStripes:
+    """按键哈希分配的一组锁，同一个键总是得到同一把锁"""
+
+    def __init__(self, count=LOCK_STRIPES):
+        self._locks = [threading.Lock() for _ in range(count)]
+
+    def __call__(self, key):
+        return self._locks[hash(key) % len(self._locks)]
+
+
+class BidBook:
+    """单场拍卖的出价簿"""
+
+    def __init__(self, current_bid, min_increment):
+        self.current_bid = current_bid
+        self.min_increment = min_increment
+        self.bids = []              # 按金额（即时间）升序
+        self.participants = {}      # 地址 -> 参与者信息
+        self.leader = None          # 领先者地址
+        self.second_price = None    # 领先者以外的最高出价
+        self.total_increment = 0
+        self.sequence = 0           # 最后一次被接受的出价的序号
+
+    def minimum_bid(self):
+        return self.current_bid + self.min_increment
+
+    def validate(self, amount, minimum=None):
+        """出价不合法时抛出 BidError；传入 minimum 时（如荷兰式拍卖的当前价格）只要求不低于它"""
+        if minimum is not None:
+            if amount < minimum:
+                raise BidError(f"Bid must be at least the current price {minimum}")
+            return
+        if amount <= self.current_bid:
+            raise BidError("Bid must be higher than current bid")
+        if amount < self.current_bid + self.min_increment:
+            raise BidError(f"Minimum bid increment is {self.min_increment}")
+
+    def place(self, bid, username='', minimum=None):
+        """校验并写入一次出价，返回出价者是否为新参与者
+
+        bid 需包含 bidder_address、bid_amount、timestamp，写入前补上 increment 和 sequence。
+        调用方需持有该拍卖的锁。
+        """
+        amount = bid['bid_amount']
+        self.validate(amount, minimum)
+        address = bid['bidder_address']
+
+        # 领先者易主时，原领先者的出价成为次高价，只需改两名参与者的领先状态
+        if self.leader is not None and self.leader != address:
+            self.second_price = self.current_bid
+            self.participants[self.leader]['is_leading'] = False
+
+        participant = self.participants.get(address)
+        is_new = participant is None
+        if is_new:
+            participant = self.participants[address] = {
+                "address": address,
+                "username": username,
+                "first_bid_at": bid['timestamp'],
+                "total_bids": 0,
+                "highest_bid": amount,
+                "is_leading": True
+            }
+        participant['total_bids'] += 1
+        participant['highest_bid'] = amount
+        participant['is_leading'] = True
+
+        self.sequence += 1
+        bid['sequence'] = self.sequence
+        bid['increment'] = amount - self.current_bid
+        self.total_increment += bid['increment']
+        self.bids.append(bid)
+        self.leader = address
+        self.current_bid = amount
+        return is_new
+
+    def latest(self, limit, offset=0):
+        """按时间倒序返回第 offset 条起的 limit 条出价"""
+        end = max(0, len(self.bids) - offset)
+        return self.bids[max(0, end - limit):end][::-1]
+
+    def average_increment(self):
+        return self.total_increment / max(1, len(self.bids))
+
+
+# 拍卖ID -> 锁，出价和读取竞价簿快照时持有
+bid_locks = LockStripes()
@@ -0,0 +1,275 @@
+"""
+合集统计引擎 (Collection Stats Engine)
+由成交、挂单、转移事件增量维护合集的地板价、成交量、持有人数和挂单数：
+成交量按分钟分桶滚动累计，地板价用每个合集一个的最小堆（惰性删除），
+各排序字段维护有序索引，合集列表分页只需读取索引中的一段。
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, deque
+from itertools import chain
+
+WINDOW_24H = 24 * 60     # 分钟
+WINDOW_7D = 7 * 24 * 60
+
+# 可排序的字段（name 为静态字段，其余由事件维护）
+INDEXED_FIELDS = ['volume_24h', 'volume_7d', 'volume_total', 'floor_price', 'owners', 'listed', 'items', 'name']
+
+
+class RollingVolume:
+    """按分钟分桶的滚动窗口成交量"""
+
+    def __init__(self, window_minutes):
+        self.window = window_minutes
+        self.buckets = deque()   # [minute, amount]
+        self.total = 0.0
+
+    def add(self, minute, amount):
+        if self.buckets and self.buckets[-1][0] == minute:
+            self.buckets[-1][1] += amount
+        else:
+            self.buckets.append([minute, amount])
+        self.total += amount
+
+    def expire(self, now_minute):
+        """移出窗口外的分桶，返回窗口值是否变化"""
+        changed = False
+        while self.buckets and self.buckets[0][0] <= now_minute - self.window:
+            self.total -= self.buckets.popleft()[1]
+            changed = True
+        if not self.buckets:
+            self.total = 0.0
+        return changed
+
+
+class CollectionStats:
+    """单个合集的统计数据"""
+
+    def __init__(self):
+        self.volume_24h = RollingVolume(WINDOW_24H)
+        self.volume_7d = RollingVolume(WINDOW_7D)
+        self.volume_total = 0.0
+        self.sales = 0
+        self.items = 0
+        self.owners = Counter()   # 持有人 -> 持有数量
+        self.listings = {}        # nft_id -> 挂单价格
+        self.floor_heap = []      # (价格, nft_id)，过期条目在读取时丢弃
+
+    def floor_price(self):
+        heap = self.floor_heap
+        while heap and self.listings.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def snapshot(self):
+        floor = self.floor_price()
+        return {
+            'floor_price': round(floor, 2) if floor is not None else None,
+            'volume_24h': round(self.volume_24h.total, 2),
+            'volume_7d': round(self.volume_7d.total, 2),
+            'volume_total': round(self.volume_total, 2),
+            'items': self.items,
+            'owners': len(self.owners),
+            'listed': len(self.listings),
+            'sales': self.sales
+        }
+
+
+class CollectionStatsEngine:
+    """合集统计引擎，维护统计数据和排序索引"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._stats = {}        # collection_id -> CollectionStats
+        self._nfts = {}         # nft_id -> [collection_id, 持有人]
+        self._active = set()    # 滚动窗口非空的合集
+        self._advanced_minute = None
+        # 已登记的合集：collection_id -> (分类, 名称)
+        self._collections = {}
+        # (字段, 分类或None) -> 有序列表，元素为 (排序键..., collection_id)
+        self._index = {}
+        self._entries = {}      # collection_id -> {字段: 当前索引元素}
+        self._versions = Counter()  # collection_id -> 统计版本号
+
+    # ---- 事件 ----
+
+    def _get(self, collection_id):
+        if collection_id not in self._stats:
+            self._stats[collection_id] = CollectionStats()
+        return self._stats[collection_id]
+
+    def record_mint(self, nft_id, collection_id, owner):
+        with self._lock:
+            stats = self._get(collection_id)
+            self._nfts[nft_id] = [collection_id, owner]
+            stats.items += 1
+            stats.owners[owner] += 1
+            self._reindex(collection_id)
+
+    def record_listing(self, nft_id, price):
+        """挂单或改价"""
+        with self._lock:
+            if nft_id not in self._nfts:
+                return
+            stats = self._get(self._nfts[nft_id][0])
+            stats.listings[nft_id] = price
+            heapq.heappush(stats.floor_heap, (price, nft_id))
+            self._reindex(self._nfts[nft_id][0])
+
+    def record_delisting(self, nft_id):
+        with self._lock:
+            if nft_id not in self._nfts:
+                return
+            stats = self._get(self._nfts[nft_id][0])
+            stats.listings.pop(nft_id, None)
+            self._reindex(self._nfts[nft_id][0])
+
+    def record_transfer(self, nft_id, new_owner):
+        with self._lock:
+            if nft_id not in self._nfts:
+                return
+            collection_id, old_owner = self._nfts[nft_id]
+            stats = self._get(collection_id)
+            stats.owners[old_owner] -= 1
+            if stats.owners[old_owner] <= 0:
+                del stats.owners[old_owner]
+            stats.owners[new_owner] += 1
+            self._nfts[nft_id][1] = new_owner
+            self._reindex(collection_id)
+
+    def record_sale(self, nft_id, price, buyer=None, at=None):
+        """成交：计入成交量，下架该NFT，有买家时转移持有人"""
+        at = time.time() if at is None else at
+        with self._lock:
+            if nft_id not in self._nfts:
+                return
+            collection_id = self._nfts[nft_id][0]
+            stats = self._get(collection_id)
+            minute = int(at // 60)
+            stats.volume_24h.add(minute, price)
+            stats.volume_7d.add(minute, price)
+            stats.volume_total += price
+            stats.sales += 1
+            stats.listings.pop(nft_id, None)
+            self._active.add(collection_id)
+            if buyer is not None:
+                self.record_transfer(nft_id, buyer)
+            # 历史成交可能已在窗口之外
+            stats.volume_24h.expire(int(time.time() // 60))
+            stats.volume_7d.expire(int(time.time() // 60))
+            self._reindex(collection_id)
+
+    def advance(self, now=None):
+        """按当前时间滚动成交量窗口，每分钟最多处理一次"""
+        minute = int((time.time() if now is None else now) // 60)
+        with self._lock:
+            if minute == self._advanced_minute:
+                return
+            self._advanced_minute = minute
+            for collection_id in list(self._active):
+                stats = self._stats[collection_id]
+                changed = stats.volume_24h.expire(minute)
+                changed = stats.volume_7d.expire(minute) or changed
+                if not stats.volume_7d.buckets:
+                    self._active.discard(collection_id)
+                if changed:
+                    self._reindex(collection_id)
+
+    # ---- 索引 ----
+
+    def register_collection(self, collection_id, category, name):
+        """登记合集，使其出现在排序索引中"""
+        with self._lock:
+            self._collections[collection_id] = (category, name)
+            self._reindex(collection_id)
+
+    def _index_key(self, field, collection_id, snapshot):
+        if field == 'name':
+            return (self._collections[collection_id][1],)
+        if field == 'floor_price':
+            # 没有挂单的合集排在有地板价的合集之后
+            floor = snapshot['floor_price']
+            return (0, 0.0) if floor is None else (1, floor)
+        return (snapshot[field],)
+
+    def _reindex(self, collection_id):
+        # 所有统计变化（事件和滚动窗口过期）都会走到这里，顺带更新版本号
+        self._versions[collection_id] += 1
+        if collection_id not in self._collections:
+            return
+        category = self._collections[collection_id][0]
+        snapshot = self._get(collection_id).snapshot()
+        entries = self._entries.setdefault(collection_id, {})
+        for field in INDEXED_FIELDS:
+            entry = self._index_key(field, collection_id, snapshot) + (collection_id,)
+            old = entries.get(field)
+            if old == entry:
+                continue
+            for scope in (None, category):
+                index = self._index.setdefault((field, scope), [])
+                if old is not None:
+                    del index[bisect_left(index, old)]
+                insort(index, entry)
+            entries[field] = entry
+
+    def page(self, field, descending=True, category=None, offset=0, limit=20, after=None, predicate=None):
+        """从索引中读取一页，返回 (collection_id 列表, 下一页游标键)
+
+        after 为上一页最后一条的索引元素，传入时从该位置之后继续读取。
+        predicate 用于索引无法覆盖的筛选条件（如名称搜索），逐条检查。
+        """
+        self.advance()
+        with self._lock:
+            index = self._index.get((field, category), [])
+            if field == 'floor_price' and not descending:
+                # 升序时地板价从低到高，没有挂单的合集放在最后
+                split = bisect_left(index, (1,))
+                ordered = chain(index[split:], index[:split])
+                if after is not None:
+                    after = tuple(after)
+                    if after < (1,):
+                        ordered = iter(index[bisect_right(index, after):split])
+                    else:
+                        ordered = chain(index[bisect_right(index, after):], index[:split])
+            elif descending:
+                end = bisect_left(index, tuple(after)) if after is not None else len(index)
+                ordered = (index[i] for i in range(end - 1, -1, -1))
+            else:
+                start = bisect_right(index, tuple(after)) if after is not None else 0
+                ordered = (index[i] for i in range(start, len(index)))
+
+            picked = []
+            skipped = 0
+            for entry in ordered:
+                if predicate is not None and not predicate(entry[-1]):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                picked.append(entry)
+                if len(picked) > limit:
+                    break
+
+            next_key = list(picked[limit - 1]) if len(picked) > limit and limit > 0 else None
+            return [entry[-1] for entry in picked[:limit]], next_key
+
+    def count(self, category=None):
+        with self._lock:
+            return len(self._index.get(('items', category), []))
+
+    def snapshot(self, collection_id):
+        self.advance()
+        with self._lock:
+            return self._get(collection_id).snapshot()
+
+    def version(self, collection_id):
+        """合集统计的版本号，统计每变化一次加一"""
+        self.advance()
+        with self._lock:
+            return self._versions[collection_id]
+
+
+collection_stats = CollectionStatsEngine()
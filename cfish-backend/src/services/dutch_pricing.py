@@ -0,0 +1,109 @@
+"""
+荷兰式拍卖定价 (Dutch Auction Pricing)
+价格按固定步长阶梯下降，任意时刻的价格由闭式公式直接算出，不需要定时任务逐场更新：
+    price(t) = max(floor, start - decrement * floor((t - start_time) / step))
+
+"当前价格不高于 X 的荷兰式拍卖"按价格分桶建索引：对每个分桶边界 e，记录每场拍卖价格
+降到 e 及以下的时刻（价格单调不增，这个时刻是确定的），每个边界一份按时刻排序的列表。
+查询时取不超过 X 的最大边界 e：该边界列表中时刻已到的拍卖一定满足条件，直接二分取前缀；
+只有价格落在 (e, X] 之间的拍卖需要用公式逐个确认，它们来自上一个边界的前缀与 e 的前缀之差。
+"""
+
+import math
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+# 价格分桶边界（1-2-5 序列）
+PRICE_EDGES = [m * 10 ** p for p in range(0, 7) for m in (1, 2, 5)]
+
+
+def dutch_price(start_price, decrement, step, floor, start_ts, now):
+    """时刻 now 的价格，开始前为起拍价；底价高于起拍价时按起拍价处理"""
+    if now <= start_ts or not decrement:
+        return start_price
+    steps = int((now - start_ts) // step)
+    return max(min(floor, start_price), start_price - decrement * steps)
+
+
+def crossing_time(start_price, decrement, step, floor, start_ts, price):
+    """价格首次不高于 price 的时刻，永远达不到时返回 None"""
+    if price >= start_price:
+        return start_ts
+    if price < floor or not decrement:
+        return None
+    return start_ts + math.ceil((start_price - price) / decrement) * step
+
+
+class DutchPriceIndex:
+    """荷兰式拍卖的价格阈值索引"""
+
+    def __init__(self, edges=PRICE_EDGES):
+        self.edges = list(edges)
+        self._lock = threading.Lock()
+        self._params = {}                          # 拍卖ID -> (起拍价, 降价幅度, 步长秒数, 底价, 开始时间戳)
+        self._crossings = [[] for _ in self.edges]  # 每个边界: [(到达时刻, 拍卖ID)]，按时刻升序
+        self._entries = {}                         # 拍卖ID -> [(边界下标, 条目)]
+
+    def __len__(self):
+        return len(self._params)
+
+    def add(self, auction_id, start_price, decrement, step, floor, start_ts):
+        with self._lock:
+            self._remove(auction_id)
+            params = (start_price, decrement, step, floor, start_ts)
+            self._params[auction_id] = params
+            entries = []
+            for i, edge in enumerate(self.edges):
+                at = crossing_time(*params, edge)
+                if at is None:
+                    continue
+                entry = (at, auction_id)
+                insort(self._crossings[i], entry)
+                entries.append((i, entry))
+            self._entries[auction_id] = entries
+
+    def remove(self, auction_id):
+        with self._lock:
+            self._remove(auction_id)
+
+    def _remove(self, auction_id):
+        self._params.pop(auction_id, None)
+        for i, entry in self._entries.pop(auction_id, []):
+            crossings = self._crossings[i]
+            del crossings[bisect_left(crossings, entry)]
+
+    def price(self, auction_id, now):
+        with self._lock:
+            params = self._params.get(auction_id)
+        return dutch_price(*params, now) if params else None
+
+    @staticmethod
+    def _reached(crossings, now):
+        """列表中到达时刻不晚于 now 的条目数"""
+        return bisect_right(crossings, now, key=lambda entry: entry[0])
+
+    def at_or_below(self, max_price, now):
+        """返回已开始且当前价格不高于 max_price 的 [(拍卖ID, 当前价格)]，未排序"""
+        with self._lock:
+            lower = bisect_right(self.edges, max_price) - 1    # 不超过 max_price 的最大边界
+            sure = set()
+            if lower >= 0:
+                crossings = self._crossings[lower]
+                sure = {auction_id for _, auction_id in crossings[:self._reached(crossings, now)]}
+            if lower + 1 < len(self.edges):
+                crossings = self._crossings[lower + 1]
+                maybe = [auction_id for _, auction_id in crossings[:self._reached(crossings, now)]
+                         if auction_id not in sure]
+            else:
+                # max_price 超过最高边界，剩余拍卖都需要逐个计算
+                maybe = [auction_id for auction_id, params in self._params.items()
+                         if auction_id not in sure and params[4] <= now]
+            matched = [(auction_id, dutch_price(*self._params[auction_id], now)) for auction_id in sure]
+            for auction_id in maybe:
+                price = dutch_price(*self._params[auction_id], now)
+                if price <= max_price:
+                    matched.append((auction_id, price))
+            return matched
+
+
+dutch_index = DutchPriceIndex()
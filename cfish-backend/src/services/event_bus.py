@@ -0,0 +1,99 @@
+"""
+进程内事件总线 (Event Bus)
+按主题发布/订阅，供 SSE 推送使用。主题形如 auction:<拍卖ID>、notifications:<钱包地址>、job:<任务ID>。
+
+每个订阅者有一个有界队列，发布只做非阻塞的入队：队列已满说明客户端读得太慢，
+直接断开该订阅者，不会让发布方（出价、任务更新等请求）等待，也不影响其他订阅者。
+"""
+
+import itertools
+import queue
+import threading
+import time
+
+# 每个订阅者最多积压的事件数
+MAX_PENDING = 256
+
+
+class Subscriber:
+    """一个连接的订阅：主题集合和待发送的事件队列"""
+
+    def __init__(self, topics, max_pending=MAX_PENDING):
+        self.topics = frozenset(topics)
+        self.dropped = False
+        self._queue = queue.Queue(max_pending)
+
+    def offer(self, message):
+        """非阻塞入队，队列已满时返回 False"""
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout):
+        """等待下一条事件，超时返回 None"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """主题 -> 订阅者集合"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics = {}
+        self._ids = itertools.count(1)
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, topics, max_pending=MAX_PENDING):
+        subscriber = Subscriber(topics, max_pending)
+        with self._lock:
+            for topic in subscriber.topics:
+                self._topics.setdefault(topic, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            for topic in subscriber.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._topics[topic]
+
+    def publish(self, topic, event, data):
+        """向主题的所有订阅者投递事件，返回送达的订阅者数；没有订阅者时几乎没有开销"""
+        subscribers = self._topics.get(topic)
+        if not subscribers:
+            return 0
+        with self._lock:
+            subscribers = tuple(self._topics.get(topic, ()))
+            message = {'id': next(self._ids), 'topic': topic, 'event': event, 'data': data, 'time': time.time()}
+            self.published += 1
+        delivered = 0
+        for subscriber in subscribers:
+            if subscriber.offer(message):
+                delivered += 1
+            elif not subscriber.dropped:
+                # 慢消费者：断开并从所有主题中移除
+                subscriber.dropped = True
+                self.unsubscribe(subscriber)
+                with self._lock:
+                    self.dropped += 1
+        return delivered
+
+    def stats(self):
+        with self._lock:
+            return {
+                'topics': len(self._topics),
+                'subscriptions': sum(len(subscribers) for subscribers in self._topics.values()),
+                'published': self.published,
+                'dropped_subscribers': self.dropped
+            }
+
+
+event_bus = EventBus()
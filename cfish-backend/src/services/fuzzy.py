@@ -0,0 +1,88 @@
+"""
+容错匹配 (Fuzzy Matching)
+对索引词表建立三元组（trigram）倒排：查询词先按共有的三元组数量和长度差筛出候选词，
+只对候选词计算带上限的编辑距离，不需要扫描整个词表。
+
+一次编辑最多破坏 3 个三元组，所以编辑距离不超过 d 的词至少与查询词共有
+|查询三元组| - 3d 个三元组；允许的编辑次数按词长决定，保证这个下限至少为 1。
+"""
+
+import threading
+from collections import Counter
+
+
+def allowed_edits(term):
+    """按词长决定允许的编辑次数：短词必须精确匹配"""
+    if len(term) <= 3:
+        return 0
+    if len(term) <= 6:
+        return 1
+    return 2
+
+
+def trigrams(term):
+    padded = f'${term}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_levenshtein(a, b, max_distance):
+    """编辑距离，超过 max_distance 时提前返回 max_distance + 1"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            )
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous[-1], max_distance + 1)
+
+
+class TrigramIndex:
+    """词表的三元组倒排，用于查找编辑距离内的相近词"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._grams = {}    # 三元组 -> {词}
+
+    def add(self, term):
+        with self._lock:
+            for gram in trigrams(term):
+                self._grams.setdefault(gram, set()).add(term)
+
+    def remove(self, term):
+        with self._lock:
+            for gram in trigrams(term):
+                terms = self._grams.get(gram)
+                if terms is None:
+                    continue
+                terms.discard(term)
+                if not terms:
+                    del self._grams[gram]
+
+    def similar(self, term, max_distance=None):
+        """返回 [(词, 编辑距离)]，包含 term 本身（若在词表中）"""
+        if max_distance is None:
+            max_distance = allowed_edits(term)
+        grams = trigrams(term)
+        needed = len(grams) - 3 * max_distance
+        shared = Counter()
+        with self._lock:
+            for gram in grams:
+                shared.update(self._grams.get(gram, ()))
+        matches = []
+        for candidate, count in shared.items():
+            if count < needed or abs(len(candidate) - len(term)) > max_distance:
+                continue
+            distance = bounded_levenshtein(term, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((candidate, distance))
+        return matches
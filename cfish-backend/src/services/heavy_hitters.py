@@ -0,0 +1,137 @@
+"""
+热门搜索统计 (Heavy Hitters)
+用 Space-Saving 算法统计出现次数最多的查询：固定数量的计数器，新查询在计数器已满时
+替换计数最小的那个，并继承它的计数作为误差上界，内存与查询的种类数无关。
+
+"最近一小时""最近一天"使用指数衰减计数：与排行服务一样采用前向衰减，
+写入时加 exp(λ·(t - epoch))，读取时统一乘以 exp(-λ·(now - epoch))，λ = 1 / 窗口长度。
+"全部时间"即不衰减（λ = 0）。
+"""
+
+import heapq
+import math
+import threading
+import time
+
+# 窗口 -> 窗口长度（秒），None 表示不衰减
+WINDOWS = {
+    'hour': 3600,
+    'day': 24 * 3600,
+    'all': None,     # 放在最后，record() 返回它替换出去的查询
+}
+
+# 指数超过该值时重设基准时间，避免浮点溢出
+MAX_EXPONENT = 500.0
+
+
+class SpaceSaving:
+    """带前向衰减的 Space-Saving 计数器"""
+
+    def __init__(self, capacity=256, window=None, epoch=None):
+        self.capacity = capacity
+        self.rate = 1.0 / window if window else 0.0
+        self.epoch = time.time() if epoch is None else epoch
+        self._counts = {}    # 键 -> [计数, 误差上界]
+        self._heap = []      # (计数, 键) 小顶堆，计数变化后旧条目延迟删除
+
+    def _weight(self, at):
+        return math.exp(self.rate * (at - self.epoch)) if self.rate else 1.0
+
+    def scale(self, now):
+        return math.exp(-self.rate * (now - self.epoch)) if self.rate else 1.0
+
+    def _rebase(self, now):
+        if self.rate * (now - self.epoch) < MAX_EXPONENT:
+            return
+        factor = self.scale(now)
+        for counter in self._counts.values():
+            counter[0] *= factor
+            counter[1] *= factor
+        self.epoch = now
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self._heap = [(counter[0], key) for key, counter in self._counts.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        """弹出计数最小的键，跳过已过期的堆条目"""
+        while True:
+            count, key = heapq.heappop(self._heap)
+            counter = self._counts.get(key)
+            if counter is not None and counter[0] == count:
+                return key, counter
+
+    def add(self, key, at):
+        """记录一次出现，返回因此被替换出去的键（没有时为 None）"""
+        self._rebase(at)
+        weight = self._weight(at)
+        evicted = None
+        counter = self._counts.get(key)
+        if counter is None:
+            if len(self._counts) >= self.capacity:
+                evicted, smallest = self._pop_min()
+                del self._counts[evicted]
+                counter = self._counts[key] = [smallest[0], smallest[0]]
+            else:
+                counter = self._counts[key] = [0.0, 0.0]
+        counter[0] += weight
+        heapq.heappush(self._heap, (counter[0], key))
+        # 过期条目太多时重建堆，堆的大小保持在计数器数量的常数倍
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+        return evicted
+
+    def estimate(self, key, now):
+        counter = self._counts.get(key)
+        return counter[0] * self.scale(now) if counter else 0.0
+
+    def top(self, k, now):
+        """返回 [(键, 计数, 误差上界)]，按计数从高到低"""
+        scale = self.scale(now)
+        top = heapq.nlargest(k, self._counts.items(), key=lambda item: item[1][0])
+        return [(key, counter[0] * scale, counter[1] * scale) for key, counter in top]
+
+
+class TrendingQueries:
+    """按窗口统计热门搜索"""
+
+    def __init__(self, capacity=256):
+        self._lock = threading.Lock()
+        now = time.time()
+        self._sketches = {name: SpaceSaving(capacity, window, now) for name, window in WINDOWS.items()}
+
+    def record(self, query, at=None):
+        """记录一次搜索，返回 (全部时间的计数, 被全部时间窗口替换出去的查询或 None)"""
+        at = time.time() if at is None else at
+        with self._lock:
+            for name, sketch in self._sketches.items():
+                evicted = sketch.add(query, at)
+            return self._sketches['all'].estimate(query, at), evicted
+
+    def estimate(self, query, window):
+        """查询在某个窗口内的（衰减后的）计数"""
+        now = time.time()
+        with self._lock:
+            return self._sketches[window].estimate(query, now)
+
+    def top(self, window, k):
+        """返回 [(查询, 计数, 趋势)]；趋势比较最近一小时与最近一天的平均搜索频率"""
+        now = time.time()
+        with self._lock:
+            top = self._sketches[window].top(k, now)
+            results = []
+            for query, count, _ in top:
+                hourly = self._sketches['hour'].estimate(query, now) / WINDOWS['hour']
+                daily = self._sketches['day'].estimate(query, now) / WINDOWS['day']
+                if hourly > 1.5 * daily:
+                    trend = 'up'
+                elif hourly < 0.5 * daily:
+                    trend = 'down'
+                else:
+                    trend = 'stable'
+                results.append((query, count, trend))
+            return results
+
+
+trending_queries = TrendingQueries()
@@ -0,0 +1,348 @@
+"""
+列式挂单引擎 (Columnar Listing Engine)
+把市场列表页用到的热点字段按列存放在 NumPy 数组中：
+价格、佣金、点赞、浏览、创建时间为数值列，分类、货币、稀有度、是否在售为小整数编码列。
+筛选条件转换为布尔掩码，排序只对需要的前 k 条使用 argpartition，
+购买、点赞、改价等操作直接原地更新对应的列。
+"""
+
+import threading
+from datetime import datetime
+
+import numpy as np
+from numpy.dtypes import StringDType
+
+# 列表排序时CFISH付款的NFT始终排在前面
+CURRENCY_PRIORITY = ['CFISH', 'SOL']
+SORT_FIELDS = ['price', 'commission', 'likes', 'views', 'created_at']
+
+_NUMERIC_COLUMNS = {
+    'id': np.int64,
+    'price': np.float64,
+    'commission': np.float64,
+    'likes': np.int64,
+    'views': np.int64,
+    'created_at': np.float64,   # Unix 时间戳
+    'is_for_sale': np.bool_,
+}
+_CODED_COLUMNS = {
+    'category': np.int16,
+    'currency': np.int8,
+    'rarity': np.int8,
+}
+
+
+class ListingEngine:
+    """NFT挂单的列式内存索引"""
+
+    def __init__(self, capacity=1024):
+        self._lock = threading.RLock()
+        self._size = 0
+        self._positions = {}    # nft_id -> 行号
+        self._pos_by_id = np.full(capacity, -1, dtype=np.int64)   # 按ID下标的行号，-1 表示不在引擎中
+        self._labels = {name: [] for name in _CODED_COLUMNS}
+        self._codes = {name: {} for name in _CODED_COLUMNS}
+        self._columns = {}
+        self._allocate(capacity)
+        # 每次写入加一；增删行时 _row_version 加一，写入某列时该列的版本号加一，
+        # 查询结果缓存只用查询依赖的行和列的版本号判断数据是否变化
+        self.version = 0
+        self._row_version = 0
+        self._column_versions = {}
+        self._stats = None      # (版本号, {列: 各编码的行数}, 排序后的价格列)，供查询计划估算选择性
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, nft_id):
+        return nft_id in self._positions
+
+    # ---- 写入 ----
+
+    def _allocate(self, capacity):
+        columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in _NUMERIC_COLUMNS.items()}
+        columns.update({name: np.zeros(capacity, dtype=dtype) for name, dtype in _CODED_COLUMNS.items()})
+        columns['name'] = np.empty(capacity, dtype=StringDType())
+        for name, column in self._columns.items():
+            columns[name][:self._size] = column[:self._size]
+        self._columns = columns
+
+    def _encode(self, field, value):
+        codes = self._codes[field]
+        if value not in codes:
+            codes[value] = len(self._labels[field])
+            self._labels[field].append(value)
+        return codes[value]
+
+    def _set(self, pos, field, value):
+        if field in _CODED_COLUMNS:
+            value = self._encode(field, value)
+        elif field == 'created_at' and isinstance(value, (str, datetime)):
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            value = value.timestamp()
+        elif field == 'name':
+            value = value.lower()
+        self._columns[field][pos] = value
+
+    def upsert(self, nft):
+        """写入或覆盖一条挂单（nft 为 to_dict() 格式的字典）"""
+        with self._lock:
+            pos = self._positions.get(nft['id'])
+            if pos is None:
+                if self._size == len(self._columns['id']):
+                    self._allocate(len(self._columns['id']) * 2)
+                pos = self._size
+                self._size += 1
+                self._row_version += 1
+                self._positions[nft['id']] = pos
+                if nft['id'] >= len(self._pos_by_id):
+                    grown = np.full(max(nft['id'] + 1, len(self._pos_by_id) * 2), -1, dtype=np.int64)
+                    grown[:len(self._pos_by_id)] = self._pos_by_id
+                    self._pos_by_id = grown
+                self._pos_by_id[nft['id']] = pos
+            for field in self._columns:
+                if field in nft:
+                    self._set(pos, field, nft[field])
+                    self._bump(field)
+            self.version += 1
+
+    def _bump(self, field):
+        self._column_versions[field] = self._column_versions.get(field, 0) + 1
+
+    def version_of(self, fields):
+        """行集合和给定各列的版本号，任一发生写入时返回值变化"""
+        with self._lock:
+            return (self._row_version,) + tuple(self._column_versions.get(field, 0) for field in sorted(fields))
+
+    def load(self, nfts):
+        """批量加载挂单，替换现有数据"""
+        with self._lock:
+            self._size = 0
+            self._row_version += 1
+            self._positions = {}
+            self._pos_by_id[:] = -1
+            for nft in nfts:
+                self.upsert(nft)
+
+    def update(self, nft_id, **fields):
+        """原地更新一条挂单的若干列，不在引擎中的ID忽略"""
+        with self._lock:
+            pos = self._positions.get(nft_id)
+            if pos is None:
+                return False
+            for field, value in fields.items():
+                if field in self._columns:
+                    self._set(pos, field, value)
+                    self._bump(field)
+            self.version += 1
+            return True
+
+    def increment(self, nft_id, field, delta=1):
+        """原地增减计数列（点赞、浏览）"""
+        with self._lock:
+            pos = self._positions.get(nft_id)
+            if pos is None:
+                return None
+            column = self._columns[field]
+            column[pos] = max(0, column[pos] + delta)
+            self._bump(field)
+            self.version += 1
+            return int(column[pos])
+
+    # ---- 查询 ----
+
+    def _column(self, field, positions=None):
+        column = self._columns[field][:self._size]
+        return column if positions is None else column[positions]
+
+    def _coded_mask(self, field, value, n, positions=None):
+        code = self._codes[field].get(value)
+        if code is None:
+            # 编码中没有的值不会命中任何行
+            return np.zeros(n, dtype=bool)
+        return self._column(field, positions) == code
+
+    def select(self, category=None, currency=None, rarity=None, is_for_sale=None,
+               min_price=None, max_price=None, search=None, ids=None, positions=None):
+        """把筛选条件组合成布尔掩码
+
+        传入 positions 时只对这些行求值，返回与 positions 等长的掩码。
+        """
+        n = self._size if positions is None else len(positions)
+        mask = np.ones(n, dtype=bool)
+        if category:
+            mask &= self._coded_mask('category', category, n, positions)
+        if currency:
+            mask &= self._coded_mask('currency', currency, n, positions)
+        if rarity:
+            mask &= self._coded_mask('rarity', rarity, n, positions)
+        if is_for_sale is not None:
+            mask &= self._column('is_for_sale', positions) == bool(is_for_sale)
+        if min_price is not None:
+            mask &= self._column('price', positions) >= min_price
+        if max_price is not None:
+            mask &= self._column('price', positions) <= max_price
+        if search:
+            mask &= np.strings.find(self._column('name', positions), search.lower()) >= 0
+        if ids is not None:
+            restrict = np.zeros(self._size, dtype=bool)
+            found = self.lookup(list(ids))
+            restrict[found[found >= 0]] = True
+            mask &= restrict if positions is None else restrict[positions]
+        return mask
+
+    def lookup(self, ids):
+        """把 nft_id 数组转换成行号数组，不在引擎中的ID为 -1"""
+        ids = np.asarray(ids, dtype=np.int64)
+        positions = np.full(len(ids), -1, dtype=np.int64)
+        known = (ids >= 0) & (ids < len(self._pos_by_id))
+        positions[known] = self._pos_by_id[ids[known]]
+        return positions
+
+    def values(self, field, positions):
+        """读取若干行的某一列，编码列返回原始取值"""
+        with self._lock:
+            column = self._column(field, positions)
+            if field in _CODED_COLUMNS:
+                return np.array(self._labels[field], dtype=object)[column]
+            return column
+
+    def facets(self, positions, fields, price_edges=None):
+        """统计若干行在各分面上的数量
+
+        编码列直接对编码做 bincount，price_edges 为价格分桶的边界（升序），
+        返回 {字段: {取值: 数量}}，价格分桶返回各桶数量的列表。
+        """
+        with self._lock:
+            counts = {}
+            for field in fields:
+                if field in _CODED_COLUMNS:
+                    labels = self._labels[field]
+                    tally = np.bincount(self._column(field, positions), minlength=len(labels))
+                    counts[field] = {label: int(n) for label, n in zip(labels, tally) if n}
+                elif field == 'is_for_sale':
+                    on_sale = int(np.count_nonzero(self._column(field, positions)))
+                    counts[field] = {'true': on_sale, 'false': len(positions) - on_sale}
+            if price_edges is not None:
+                buckets = np.searchsorted(price_edges, self._column('price', positions), side='right')
+                counts['price'] = np.bincount(buckets, minlength=len(price_edges) + 1).tolist()
+            return counts
+
+    def labels(self, field):
+        """编码列中出现过的全部取值"""
+        with self._lock:
+            return list(self._labels[field])
+
+    def _column_stats(self):
+        # 估算不要求精确：写入次数超过行数的 1%（至少 1000 次）才重新统计
+        if self._stats is None or self.version - self._stats[0] > max(1000, self._size // 100):
+            counts = {field: np.bincount(self._column(field), minlength=len(self._labels[field]))
+                      for field in _CODED_COLUMNS}
+            counts['is_for_sale'] = np.bincount(self._column('is_for_sale'), minlength=2)
+            self._stats = (self.version, counts, np.sort(self._column('price')))
+        return self._stats
+
+    def cardinality(self, field, value=None, min_value=None, max_value=None):
+        """估算满足单个筛选条件的行数：编码列和是否在售按取值计数，价格按区间计数（闭区间）
+
+        统计信息缓存复用，少量写入后不需要重新扫描，估算值可能略有偏差。
+        """
+        with self._lock:
+            _, counts, prices = self._column_stats()
+            if field in _CODED_COLUMNS:
+                code = self._codes[field].get(value)
+                return int(counts[field][code]) if code is not None and code < len(counts[field]) else 0
+            if field == 'is_for_sale':
+                return int(counts[field][int(bool(value))])
+            if field == 'price':
+                low = 0 if min_value is None else np.searchsorted(prices, min_value, side='left')
+                high = len(prices) if max_value is None else np.searchsorted(prices, max_value, side='right')
+                return int(max(0, high - low))
+            return self._size
+
+    def select_ids(self, **filters):
+        """返回满足筛选条件的 nft_id 列表"""
+        with self._lock:
+            mask = self.select(**filters)
+            return self._columns['id'][:self._size][mask].tolist()
+
+    def _top_k(self, positions, keys, tiebreak, k):
+        """在 positions 中取排序键最小的 k 行，键相同时按 tiebreak 排序"""
+        if k < len(positions):
+            # argpartition 找到第 k 小的键值，再把与之相等的行一起带上以保证结果精确
+            kth = keys[np.argpartition(keys, k - 1)[k - 1]]
+            keep = keys <= kth
+            positions, keys, tiebreak = positions[keep], keys[keep], tiebreak[keep]
+        order = np.lexsort((tiebreak, keys))[:k]
+        return positions[order]
+
+    def query(self, filters=None, sort_by='created_at', order='desc', limit=20, offset=0,
+              after=None, cfish_first=True):
+        """查询一页挂单，返回 (nft_id 列表, 总数, 下一页游标键)
+
+        cfish_first 为 True 时按货币优先级分段，CFISH 段排在最前。
+        after 为上一页返回的游标键 [货币, 排序值, ID]，传入时忽略 offset。
+        """
+        if sort_by not in SORT_FIELDS:
+            sort_by, order = 'created_at', 'desc'
+        descending = order == 'desc'
+
+        with self._lock:
+            n = self._size
+            mask = self.select(**(filters or {}))
+            total = int(mask.sum())
+
+            if cfish_first:
+                segments = [(c, self._coded_mask('currency', c, n)) for c in CURRENCY_PRIORITY]
+                other = ~np.logical_or.reduce([m for _, m in segments])
+                segments.append(('*', other))
+            else:
+                segments = [('*', np.ones(n, dtype=bool))]
+
+            column = self._columns[sort_by][:n]
+            id_column = self._columns['id'][:n]
+            if after is not None:
+                last_segment, last_value, last_id = after
+                labels = [label for label, _ in segments]
+                if last_segment not in labels:
+                    raise ValueError('Invalid cursor')
+                segments = segments[labels.index(last_segment):]
+
+            wanted = limit + 1
+            picked = []
+            for label, segment_mask in segments:
+                segment_mask = segment_mask & mask
+                if after is not None and label == last_segment:
+                    if descending:
+                        seek = (column < last_value) | ((column == last_value) & (id_column < last_id))
+                    else:
+                        seek = (column > last_value) | ((column == last_value) & (id_column > last_id))
+                    segment_mask &= seek
+                positions = np.flatnonzero(segment_mask)
+                if after is None and offset >= len(positions):
+                    offset -= len(positions)
+                    continue
+                k = min(len(positions), offset + wanted - len(picked))
+                if k > 0:
+                    keys = column[positions].astype(np.float64)
+                    ids = id_column[positions]
+                    if descending:
+                        # 降序时排序值相同的行按ID倒序
+                        keys, ids = -keys, -ids
+                    top = self._top_k(positions, keys, ids, k)
+                    picked.extend((label, int(p)) for p in top[offset:])
+                offset = 0
+                if len(picked) >= wanted:
+                    break
+
+            next_key = None
+            if len(picked) > limit:
+                label, pos = picked[limit - 1]
+                value = column[pos].item()
+                next_key = [label, value, int(id_column[pos])]
+            page_ids = [int(id_column[pos]) for _, pos in picked[:limit]]
+            return page_ids, total, next_key
+
+
+listing_engine = ListingEngine()
@@ -0,0 +1,146 @@
+"""
+游标分页 (Keyset Pagination) 工具
+游标编码上一页最后一条记录的排序键和ID，下一页从该位置继续查找，
+翻到深页不再需要跳过前面的所有记录，浏览期间插入新数据也不会让结果错位
+
+排序键写入后不再变化的存储可以维护一个 KeysetIndex，没有筛选条件时
+直接在有序的排序键中二分定位到游标位置，只读取一页的记录
+"""
+
+import base64
+import binascii
+import heapq
+import json
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+# KeysetIndex 顺序读取时每次在锁内取出的排序键个数
+SCAN_CHUNK = 64
+
+
+def encode_cursor(sort_by, key):
+    """把排序方式和排序键编码成不透明的游标字符串"""
+    payload = json.dumps({'s': sort_by, 'k': list(key)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort_by):
+    """解析游标，游标无效或与当前排序方式不一致时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+    if not isinstance(payload, dict) or not isinstance(payload.get('k'), list):
+        raise ValueError('Invalid cursor')
+    if payload.get('s') != sort_by:
+        raise ValueError('Cursor does not match sort_by')
+    return payload['k']
+
+
+def _kind(value):
+    # 整数和浮点数可以互相比较，布尔值单独一类
+    if isinstance(value, bool):
+        return bool
+    if isinstance(value, (int, float)):
+        return float
+    return type(value)
+
+
+def check_key(values, template):
+    """游标中的排序键与 template（当前排序方式下某条记录的排序键）的长度和各位置类型不一致时抛出 ValueError"""
+    if len(values) != len(template) or any(_kind(value) is not _kind(expected)
+                                           for value, expected in zip(values, template)):
+        raise ValueError('Invalid cursor')
+    return tuple(values)
+
+
+class KeysetIndex:
+    """按排序键有序维护一个存储（记录ID -> 记录）的全部记录
+
+    key 与传给 paginate 的相同，返回的元组以记录ID结尾；记录写入存储后排序键不能再变化。
+    """
+
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+        self._lock = threading.Lock()
+        self._keys = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, item):
+        with self._lock:
+            insort(self._keys, self.key(item))
+
+    def scan(self, after=None, reverse=False):
+        """按顺序逐个返回排在 after 之后的排序键（reverse 时从大到小）
+
+        每次在锁内按上一次读到的键重新二分，并发写入不会让读取错位。
+        """
+        while True:
+            with self._lock:
+                if reverse:
+                    end = len(self._keys) if after is None else bisect_left(self._keys, after)
+                    chunk = self._keys[max(0, end - SCAN_CHUNK):end][::-1]
+                else:
+                    start = 0 if after is None else bisect_right(self._keys, after)
+                    chunk = self._keys[start:start + SCAN_CHUNK]
+            if not chunk:
+                return
+            yield from chunk
+            after = chunk[-1]
+
+    def template(self):
+        with self._lock:
+            return self._keys[0] if self._keys else None
+
+
+def _seek(index, count, after, reverse):
+    """从索引中按顺序读出排在 after 之后的前 count 条记录"""
+    window = []
+    for item_key in index.scan(after, reverse):
+        window.append(index.store[item_key[-1]])
+        if len(window) == count:
+            break
+    return window
+
+
+def paginate(items, key, limit, offset=0, cursor=None, sort_by='default', reverse=False, index=None):
+    """对内存中的记录分页，返回 (当前页, next_cursor)
+
+    key 返回的元组必须以记录ID结尾，保证排序键唯一。
+    传入 cursor 时只保留排在游标之后的记录，再用堆取出 limit 条，
+    不需要对全部结果排序；否则按 offset 分页，同样只取前 offset + limit 条。
+    index 为按同一 key 维护的 KeysetIndex 且 items 就是其中的全部记录（没有被筛选掉的）时，
+    直接在索引中二分定位，只读取 offset + limit + 1 条。
+    """
+    pick = heapq.nlargest if reverse else heapq.nsmallest
+    seekable = index is not None and len(items) == len(index) == len(index.store)
+
+    last_key = None
+    if cursor:
+        values = decode_cursor(cursor, sort_by)
+        template = index.template() if seekable else (key(items[0]) if items else None)
+        if template is None:
+            return [], None
+        last_key = check_key(values, template)
+        offset = 0
+
+    if seekable:
+        window = _seek(index, offset + limit + 1, last_key, reverse)
+    else:
+        if last_key is not None:
+            if reverse:
+                items = [item for item in items if key(item) < last_key]
+            else:
+                items = [item for item in items if key(item) > last_key]
+        window = pick(offset + limit + 1, items, key=key)
+    page = window[offset:offset + limit]
+
+    next_cursor = None
+    if page and len(window) > offset + limit:
+        next_cursor = encode_cursor(sort_by, key(page[-1]))
+    return page, next_cursor
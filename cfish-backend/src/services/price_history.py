@@ -0,0 +1,134 @@
+"""
+合集价格历史 (Price History Store)
+每个合集按 1分钟 / 1小时 / 1天 三种精度保存地板价 OHLC 和成交额，
+数据放在定长的 array 环形缓冲区中，写入时同时更新三种精度（自动降采样），
+查询直接读取对应精度的预聚合桶，不需要重新扫描原始成交记录。
+"""
+
+import math
+import threading
+import time
+from array import array
+from datetime import datetime
+
+# 精度 -> (桶长度秒数, 环形缓冲区容量)
+RESOLUTIONS = {
+    '1m': (60, 60),              # 最近 1 小时
+    '1h': (3600, 30 * 24),       # 最近 30 天
+    '1d': (86400, 5 * 365),      # 最近 5 年
+}
+# 查询范围 -> (精度, 桶数量，None 表示缓冲区中的全部数据)
+RANGES = {
+    '1h': ('1m', 60),
+    '24h': ('1h', 24),
+    '7d': ('1h', 7 * 24),
+    '30d': ('1d', 30),
+    'all': ('1d', None),
+}
+
+NAN = float('nan')
+
+
+class RingSeries:
+    """单一精度的环形缓冲区，槽位由桶序号对容量取模得到"""
+
+    def __init__(self, step, capacity):
+        self.step = step
+        self.capacity = capacity
+        self.buckets = array('q', [-1]) * capacity
+        self.open = array('d', [NAN]) * capacity
+        self.high = array('d', [NAN]) * capacity
+        self.low = array('d', [NAN]) * capacity
+        self.close = array('d', [NAN]) * capacity
+        self.volume = array('d', [0.0]) * capacity
+        self.first_bucket = None
+
+    def record(self, at, floor=None, volume=0.0):
+        bucket = int(at // self.step)
+        slot = bucket % self.capacity
+        stored = self.buckets[slot]
+        if stored > bucket:
+            # 比缓冲区中最旧的数据还早，已经超出保存范围
+            return
+        if stored < bucket:
+            self.buckets[slot] = bucket
+            self.open[slot] = self.high[slot] = self.low[slot] = self.close[slot] = NAN
+            self.volume[slot] = 0.0
+            if self.first_bucket is None or bucket < self.first_bucket:
+                self.first_bucket = bucket
+
+        if floor is not None:
+            if math.isnan(self.open[slot]):
+                self.open[slot] = self.high[slot] = self.low[slot] = floor
+            else:
+                self.high[slot] = max(self.high[slot], floor)
+                self.low[slot] = min(self.low[slot], floor)
+            self.close[slot] = floor
+        self.volume[slot] += volume
+
+    def read(self, start_bucket, end_bucket):
+        """读取 [start_bucket, end_bucket] 的桶，空桶沿用上一个收盘地板价"""
+        start_bucket = max(start_bucket, end_bucket - self.capacity + 1)
+        if self.first_bucket is not None:
+            start_bucket = max(start_bucket, self.first_bucket)
+        points = []
+        last_close = None
+        for bucket in range(start_bucket, end_bucket + 1):
+            slot = bucket % self.capacity
+            if self.buckets[slot] == bucket and not math.isnan(self.open[slot]):
+                ohlc = [self.open[slot], self.high[slot], self.low[slot], self.close[slot]]
+                last_close = self.close[slot]
+            else:
+                ohlc = [last_close] * 4
+            volume = self.volume[slot] if self.buckets[slot] == bucket else 0.0
+            points.append({
+                'timestamp': datetime.fromtimestamp(bucket * self.step).isoformat(),
+                'open': round(ohlc[0], 2) if ohlc[0] is not None else None,
+                'high': round(ohlc[1], 2) if ohlc[1] is not None else None,
+                'low': round(ohlc[2], 2) if ohlc[2] is not None else None,
+                'close': round(ohlc[3], 2) if ohlc[3] is not None else None,
+                'volume': round(volume, 2)
+            })
+        return points
+
+
+class PriceHistoryStore:
+    """所有合集的价格历史"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}   # collection_id -> {精度: RingSeries}
+
+    def record(self, collection_id, floor=None, volume=0.0, at=None):
+        """写入一个观测点：当前地板价（可为空）和这一时刻的成交额"""
+        at = time.time() if at is None else at
+        with self._lock:
+            series = self._series.get(collection_id)
+            if series is None:
+                series = {name: RingSeries(step, capacity) for name, (step, capacity) in RESOLUTIONS.items()}
+                self._series[collection_id] = series
+            for ring in series.values():
+                ring.record(at, floor, volume)
+
+    def bucket(self, range_name, now=None):
+        """范围所用精度的当前桶序号，桶滚动时查询结果的时间窗口随之移动"""
+        step = RESOLUTIONS[RANGES[range_name][0]][0]
+        return int((time.time() if now is None else now) // step)
+
+    def query(self, collection_id, range_name='30d', now=None):
+        """按范围返回 OHLC 桶列表，范围无效时抛出 ValueError"""
+        if range_name not in RANGES:
+            raise ValueError('Invalid range')
+        resolution, count = RANGES[range_name]
+        now = time.time() if now is None else now
+        with self._lock:
+            series = self._series.get(collection_id)
+            if series is None:
+                return []
+            ring = series[resolution]
+            end_bucket = int(now // ring.step)
+            start_bucket = end_bucket - count + 1 if count else end_bucket - ring.capacity + 1
+            return ring.read(start_bucket, end_bucket)
+
+
+price_history = PriceHistoryStore()
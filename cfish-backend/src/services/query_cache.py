@@ -0,0 +1,137 @@
+"""
+查询结果缓存 (Query Result Cache)
+以规范化后的查询（小写、去除多余空白、筛选条件排序、价格区间量化）为键缓存搜索结果，
+LRU 淘汰并带过期时间。每条缓存记录写入时的目录版本号，目录发生写入后版本号变化，
+旧缓存在下次读取时视为失效，不需要逐条清理。
+
+同一个键同时有多个请求未命中时只有第一个请求执行计算，其余请求等待并共享它的结果。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# 价格筛选条件量化到分
+PRICE_QUANTUM = 0.01
+
+
+def normalize_query(query):
+    return ' '.join((query or '').lower().split())
+
+
+def quantize_price(value):
+    """把价格筛选值量化到 PRICE_QUANTUM，空值返回 None"""
+    if value is None or value == '':
+        return None
+    return round(round(float(value) / PRICE_QUANTUM) * PRICE_QUANTUM, 2)
+
+
+def canonical_filters(filters):
+    """去掉空值、量化价格区间，返回规范化后的筛选条件字典"""
+    canonical = {}
+    for name, value in (filters or {}).items():
+        if value is None or value == '':
+            continue
+        if name in ('min_price', 'max_price'):
+            value = quantize_price(value)
+        elif isinstance(value, str):
+            value = value.strip()
+        canonical[name] = value
+    return canonical
+
+
+def cache_key(namespace, query, filters, **params):
+    """由规范化的查询、筛选条件和其余参数组成缓存键"""
+    return (
+        namespace,
+        normalize_query(query),
+        tuple(sorted((name, str(value)) for name, value in canonical_filters(filters).items())),
+        tuple(sorted((name, str(value)) for name, value in params.items()))
+    )
+
+
+class _Flight:
+    """一次正在进行的计算，等待者共享它的结果"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class QueryCache:
+    """带过期时间和目录版本号的 LRU 查询缓存"""
+
+    def __init__(self, max_entries=1024, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # 键 -> (目录版本号, 过期时间, 结果)
+        self._flights = {}              # (键, 目录版本号) -> _Flight
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.expired = 0
+
+    def get_or_compute(self, key, compute, version=0, cache_if=None):
+        """返回键对应的结果，缓存失效时调用 compute() 计算
+
+        cache_if 为可选的判断函数，返回 False 的结果只返回给本次的请求和等待者，不写入缓存。
+        返回的结果会被多个请求共享，调用方不能修改。
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                del self._entries[key]
+                self.expired += 1
+            flight = self._flights.get((key, version))
+            leader = flight is None
+            if leader:
+                flight = self._flights[(key, version)] = _Flight()
+                self.misses += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[(key, version)]
+                if flight.error is None and (cache_if is None or cache_if(flight.value)):
+                    self._entries[key] = (version, time.monotonic() + self.ttl, flight.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.collapsed
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'collapsed': self.collapsed,
+                'expired': self.expired,
+                'hit_rate': round((self.hits + self.collapsed) / lookups, 4) if lookups else 0.0
+            }
+
+
+search_cache = QueryCache()
@@ -0,0 +1,209 @@
+"""
+搜索查询语言 (Query Language)
+支持在搜索框中混合字段条件和关键词，例如：
+    category:Art rarity:Epic price:<5 currency:CFISH dragon
+    price:1..10 sale:true "golden dragon"
+
+字段条件：category / rarity / currency 精确匹配（不区分大小写），
+price 支持 <、<=、>、>=、= 和 a..b 区间，sale（for_sale）为 true/false。
+未知字段按普通关键词处理。
+
+解析结果编译成执行计划：用列式索引的取值计数和倒排表长度估算每个条件命中的行数，
+从最有选择性的条件出发得到候选集，再按估算行数从小到大依次用其余筛选条件缩小候选集，
+最后才在剩下的候选集上对关键词求交集并计算相关度。
+"""
+
+import re
+
+import numpy as np
+
+from src.services.listing_engine import listing_engine
+from src.services.search_index import nft_index, tokenize
+
+# 查询中的字段名 -> 列式索引中的字段
+FIELD_ALIASES = {
+    'category': 'category',
+    'rarity': 'rarity',
+    'currency': 'currency',
+    'price': 'price',
+    'sale': 'is_for_sale',
+    'for_sale': 'is_for_sale',
+}
+
+_TOKEN = re.compile(r'(\w+):("[^"]*"|\S+)|"([^"]*)"|(\S+)')
+_PRICE = re.compile(r'^(<=|>=|<|>|=)?\s*(\d+(?:\.\d+)?)$')
+_PRICE_RANGE = re.compile(r'^(\d+(?:\.\d+)?)\.\.(\d+(?:\.\d+)?)$')
+
+
+class Predicate:
+    """一个列条件：等值（category / rarity / currency / is_for_sale）或价格闭区间"""
+
+    def __init__(self, field, value=None, min_value=None, max_value=None):
+        self.field = field
+        self.value = value
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def select_args(self):
+        """转换成 listing_engine.select() 的参数"""
+        if self.field == 'price':
+            return {'min_price': self.min_value, 'max_price': self.max_value}
+        return {self.field: self.value}
+
+    def estimate(self):
+        return listing_engine.cardinality(self.field, self.value, self.min_value, self.max_value)
+
+    def describe(self):
+        if self.field != 'price':
+            return f'{self.field}={self.value}'
+        low = '' if self.min_value is None else self.min_value
+        high = '' if self.max_value is None else self.max_value
+        return f'price in [{low}, {high}]'
+
+
+class ParsedQuery:
+    """解析结果：去掉字段条件后的关键词文本和列条件列表"""
+
+    def __init__(self, text, predicates):
+        self.text = text
+        self.predicates = predicates
+
+
+def _canonical(field, value):
+    """把取值规范成列式索引中的写法（不区分大小写）"""
+    for label in listing_engine.labels(field):
+        if isinstance(label, str) and label.lower() == value.lower():
+            return label
+    return value
+
+
+def parse_price(raw):
+    """解析价格条件，返回 (下限, 上限)；严格不等号转换成相邻的浮点数"""
+    match = _PRICE_RANGE.match(raw)
+    if match:
+        low, high = float(match.group(1)), float(match.group(2))
+        if low > high:
+            raise ValueError(f'Invalid price range: {raw}')
+        return low, high
+    match = _PRICE.match(raw)
+    if not match:
+        raise ValueError(f'Invalid price condition: {raw}')
+    op, value = match.group(1) or '=', float(match.group(2))
+    if op == '<':
+        return None, float(np.nextafter(value, -np.inf))
+    if op == '<=':
+        return None, value
+    if op == '>':
+        return float(np.nextafter(value, np.inf)), None
+    if op == '>=':
+        return value, None
+    return value, value
+
+
+def parse_query(query):
+    """把查询字符串拆成字段条件和剩余的关键词文本，格式错误时抛出 ValueError"""
+    predicates = []
+    words = []
+    for match in _TOKEN.finditer(query or ''):
+        name, raw, quoted, word = match.groups()
+        field = FIELD_ALIASES.get((name or '').lower())
+        if field is None:
+            words.append(match.group(0).strip('"') if name else (quoted if quoted is not None else word))
+            continue
+        raw = raw.strip('"')
+        if field == 'price':
+            low, high = parse_price(raw)
+            predicates.append(Predicate('price', min_value=low, max_value=high))
+        elif field == 'is_for_sale':
+            if raw.lower() not in ('true', 'false', '1', '0', 'yes', 'no'):
+                raise ValueError(f'Invalid sale condition: {raw}')
+            predicates.append(Predicate('is_for_sale', raw.lower() in ('true', '1', 'yes')))
+        else:
+            predicates.append(Predicate(field, _canonical(field, raw)))
+    return ParsedQuery(' '.join(words), predicates)
+
+
+def filter_predicates(category=None, currency=None, rarity=None, is_for_sale=None,
+                      min_price=None, max_price=None):
+    """把 listing_engine.select() 形式的筛选参数转换成列条件"""
+    predicates = [Predicate(field, value) for field, value in
+                  (('category', category), ('currency', currency), ('rarity', rarity)) if value]
+    if is_for_sale is not None:
+        predicates.append(Predicate('is_for_sale', bool(is_for_sale)))
+    if min_price is not None or max_price is not None:
+        predicates.append(Predicate('price', min_value=min_price, max_value=max_price))
+    return predicates
+
+
+class QueryPlan:
+    """按估算行数排好序的执行步骤"""
+
+    def __init__(self, text, predicates, fuzzy=False):
+        self.text = text
+        self.fuzzy = fuzzy
+        tokens = tokenize(text)
+        self.terms = list(dict.fromkeys(tokens))
+        # 最后一个词可能还没输入完，同时按前缀匹配
+        self.prefix_term = tokens[-1] if tokens else None
+        # 有关键词文本但分词后没有可检索的词（只有标点、停用词）时不命中任何文档，
+        # 只有纯字段条件的查询才扫描整个目录
+        self.no_terms = bool(text.strip()) and not self.terms
+        self.predicates = sorted(predicates, key=lambda predicate: predicate.estimate())
+        # 关键词中最稀有的一个比所有列条件都更有选择性时，从倒排表出发
+        self.term_estimate = min((nft_index.doc_freq(term, fuzzy, prefix=term == self.prefix_term)
+                                  for term in self.terms), default=None)
+        self.start_from_text = self.term_estimate is not None and (
+            not self.predicates or self.term_estimate < self.predicates[0].estimate()
+        )
+
+    def explain(self):
+        steps = [{'step': 'filter', 'condition': predicate.describe(), 'estimated_rows': predicate.estimate()}
+                 for predicate in self.predicates]
+        if self.terms:
+            text_step = {'step': 'text', 'terms': self.terms, 'prefix': self.prefix_term, 'fuzzy': self.fuzzy,
+                         'estimated_rows': self.term_estimate}
+            if self.start_from_text:
+                steps.insert(0, dict(text_step, step='text_candidates'))
+            else:
+                steps.append(text_step)
+        elif self.no_terms:
+            steps.append({'step': 'text', 'terms': [], 'estimated_rows': 0})
+        return steps
+
+    def execute(self):
+        """返回 (nft_id 数组, 相关度数组, 列式索引行号数组)，nft_id 升序"""
+        if self.no_terms:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64)
+
+        if self.start_from_text:
+            # 关键词最稀有：全文检索得到候选集后依次应用列条件
+            nft_ids, scores = nft_index.match(self.text, self.fuzzy, prefix=True)
+            positions = listing_engine.lookup(nft_ids)
+            keep = positions >= 0
+            nft_ids, scores, positions = nft_ids[keep], scores[keep], positions[keep]
+            for predicate in self.predicates:
+                if not len(positions):
+                    break
+                keep = listing_engine.select(positions=positions, **predicate.select_args())
+                nft_ids, scores, positions = nft_ids[keep], scores[keep], positions[keep]
+            return nft_ids, scores, positions
+
+        # 列条件最有选择性：先用第一个条件扫描整列，其余条件只在候选行上求值
+        if self.predicates:
+            positions = np.flatnonzero(listing_engine.select(**self.predicates[0].select_args()))
+        else:
+            positions = np.flatnonzero(listing_engine.select())
+        for predicate in self.predicates[1:]:
+            if not len(positions):
+                break
+            positions = positions[listing_engine.select(positions=positions, **predicate.select_args())]
+        nft_ids = listing_engine.values('id', positions)
+        order = np.argsort(nft_ids, kind='stable')
+        nft_ids, positions = nft_ids[order], positions[order]
+        if not self.terms:
+            return nft_ids, np.zeros(len(nft_ids)), positions
+
+        # 最后在候选集上对关键词求交集，只为留下的文档计算相关度
+        matched, scores = nft_index.match(self.text, self.fuzzy, candidates=nft_ids, prefix=True)
+        keep = np.searchsorted(nft_ids, matched)
+        return matched, scores, positions[keep]
@@ -0,0 +1,132 @@
+"""
+热门/精选排行服务 (Ranking Service)
+根据点赞、浏览、出价、成交等真实信号维护随时间衰减的分数，
+后台线程按固定间隔把每个榜单的前 N 名物化，请求只读取物化好的列表。
+
+衰减采用前向衰减：信号写入时乘以 exp(λ·(t - epoch))，读取时统一除以 exp(λ·(now - epoch))，
+所以记录一个信号是 O(1)，不需要定期更新所有条目的分数。
+"""
+
+import heapq
+import math
+import threading
+import time
+
+# 榜单 -> (半衰期秒数, 各信号权重)
+BOARDS = {
+    'trending': (6 * 3600, {'like': 3.0, 'view': 0.2, 'bid': 5.0, 'sale': 10.0}),
+    'featured': (7 * 24 * 3600, {'like': 1.0, 'view': 0.05, 'bid': 3.0, 'sale': 8.0}),
+    'likes': (24 * 3600, {'like': 1.0}),
+    'collections': (24 * 3600, {'like': 1.0, 'view': 0.1, 'bid': 3.0, 'sale': 8.0}),
+}
+# 合集榜单以合集ID为键，其余榜单以NFT ID为键
+COLLECTION_BOARDS = {'collections'}
+# 只统计近期信号的榜单，启动时不用目录中的累计点赞、浏览初始化
+RECENT_ONLY_BOARDS = {'likes'}
+
+# 指数超过该值时重设基准时间，避免浮点溢出
+MAX_EXPONENT = 500.0
+
+
+class DecayedScores:
+    """一个榜单的前向衰减分数表"""
+
+    def __init__(self, half_life, weights, epoch):
+        self.rate = math.log(2) / half_life
+        self.weights = weights
+        self.epoch = epoch
+        self.values = {}
+
+    def add(self, key, signal, amount, at):
+        weight = self.weights.get(signal)
+        if not weight:
+            return
+        self.values[key] = self.values.get(key, 0.0) + weight * amount * math.exp(self.rate * (at - self.epoch))
+
+    def scale(self, now):
+        """当前时刻的衰减系数"""
+        return math.exp(-self.rate * (now - self.epoch))
+
+    def rebase(self, now):
+        if self.rate * (now - self.epoch) < MAX_EXPONENT:
+            return
+        factor = self.scale(now)
+        self.values = {key: value * factor for key, value in self.values.items()}
+        self.epoch = now
+
+
+class RankingService:
+    """维护各榜单的衰减分数，并由后台线程物化前 N 名"""
+
+    def __init__(self, top_n=200, refresh_interval=30):
+        self.top_n = top_n
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        now = time.time()
+        self._boards = {name: DecayedScores(half_life, weights, now) for name, (half_life, weights) in BOARDS.items()}
+        self._collection_of = {}   # nft_id -> collection_id
+        self._materialized = {name: [] for name in BOARDS}
+        self._refreshed_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, nft_id, collection_id):
+        """登记NFT所属的合集，用于把NFT信号汇总到合集榜单"""
+        self._collection_of[nft_id] = collection_id
+
+    def record(self, signal, nft_id, amount=1, at=None, seed=False):
+        """记录一个信号：like / view / bid / sale；seed 为 True 时是启动时的累计值，不计入只统计近期信号的榜单"""
+        at = time.time() if at is None else at
+        collection_id = self._collection_of.get(nft_id)
+        with self._lock:
+            for name, board in self._boards.items():
+                if seed and name in RECENT_ONLY_BOARDS:
+                    continue
+                if name in COLLECTION_BOARDS:
+                    if collection_id is not None:
+                        board.add(collection_id, signal, amount, at)
+                else:
+                    board.add(nft_id, signal, amount, at)
+
+    def refresh(self):
+        """物化每个榜单的前 N 名"""
+        now = time.time()
+        with self._lock:
+            snapshots = {}
+            for name, board in self._boards.items():
+                board.rebase(now)
+                snapshots[name] = (dict(board.values), board.scale(now))
+
+        materialized = {}
+        for name, (values, scale) in snapshots.items():
+            top = heapq.nlargest(self.top_n, values.items(), key=lambda item: item[1])
+            materialized[name] = [(key, value * scale) for key, value in top]
+        # 整体替换引用，读取方不会看到更新了一半的列表
+        self._materialized = materialized
+        self._refreshed_at = now
+
+    def top(self, board, limit):
+        """读取物化好的榜单，返回 [(键, 分数)]"""
+        return self._materialized[board][:limit]
+
+    @property
+    def refreshed_at(self):
+        return self._refreshed_at
+
+    def start(self):
+        """启动后台刷新线程"""
+        if self._thread is not None:
+            return
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name='ranking-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+
+ranking_service = RankingService()
@@ -0,0 +1,87 @@
+"""
+详情响应缓存 (Detail Response Cache)
+每个实体（NFT、合集）维护一个版本号，修改实体的接口调用 invalidate() 使版本号加一。
+详情接口返回由版本号生成的强 ETag，客户端带 If-None-Match 且版本未变时直接返回 304；
+序列化好的响应体按版本缓存在 LRU 中，版本未变时不需要重新组装和序列化。
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+
+from flask import Response, jsonify, request
+
+
+class DetailCache:
+    """实体版本号 + 序列化响应体的 LRU 缓存"""
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # 进程启动标识，重启后旧的 ETag 全部失效
+        self._boot = uuid.uuid4().hex[:8]
+        self._versions = {}           # (类型, ID) -> 版本号
+        self._bodies = OrderedDict()  # (类型, ID, 变体) -> (版本号, 响应体)
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, kind, entity_id):
+        return self._versions.get((kind, entity_id), 0)
+
+    def invalidate(self, kind, entity_id):
+        """实体被修改，版本号加一"""
+        with self._lock:
+            key = (kind, entity_id)
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def etag(self, kind, entity_id, variant='', version=None):
+        if version is None:
+            version = self.version(kind, entity_id)
+        return f'{kind}-{entity_id}-{variant}-{self._boot}-{version}'
+
+    def get(self, kind, entity_id, variant=''):
+        key = (kind, entity_id, variant)
+        with self._lock:
+            entry = self._bodies.get(key)
+            if entry is None or entry[0] != self._versions.get((kind, entity_id), 0):
+                self.misses += 1
+                return None
+            self._bodies.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, kind, entity_id, version, body, variant=''):
+        key = (kind, entity_id, variant)
+        with self._lock:
+            self._bodies[key] = (version, body)
+            self._bodies.move_to_end(key)
+            while len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+
+    def respond(self, kind, entity_id, build, variant=''):
+        """返回详情响应：版本未变时 304，缓存命中时直接返回缓存的响应体
+
+        build() 返回要放在 data 中的字典，只在缓存未命中时调用。
+        """
+        version = self.version(kind, entity_id)
+        etag = self.etag(kind, entity_id, variant, version)
+        if etag in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        body = self.get(kind, entity_id, variant)
+        if body is None:
+            body = jsonify({
+                'success': True,
+                'data': build()
+            }).get_data()
+            # 用组装前读取的版本号入缓存，组装期间发生的修改会让这条缓存直接失效
+            self.put(kind, entity_id, version, body, variant)
+
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response
+
+
+detail_cache = DetailCache()
@@ -0,0 +1,317 @@
+"""
+倒排索引全文搜索 (Inverted Index Search)
+对各字段分词后建立倒排表，每个词的倒排表是按文档ID升序排列的两个紧凑数组：
+文档ID和该词在文档中的加权 BM25 词项得分（各字段得分乘以字段权重后相加）。
+查询时所有查询词都必须命中（AND），从最短的倒排表出发用 searchsorted 求交集，
+文档得分 = Σ idf(词) × 词项得分，再用堆取前 k 条。
+
+文档写入、删除都是对相关词的倒排表做有序插入/删除，不需要重建索引。
+词项得分使用写入时的字段平均长度计算。
+
+容错模式下每个查询词先通过词表的三元组索引找出编辑距离内的近似词，
+各近似词的倒排表合并（同一文档取最高分）后再参与求交集。
+
+前缀模式下最后一个查询词还匹配以它开头的词（用户可能还没输入完，"amaz" 能搜到 "amazing"），
+补全词从有序词表中二分查找，按文档频率取最常见的若干个，与近似词一样合并倒排表。
+"""
+
+import heapq
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+from src.services.fuzzy import TrigramIndex
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 容错匹配时近似词的得分按 1 / (1 + 编辑距离 × 该系数) 打折
+FUZZY_PENALTY = 1.0
+
+# 前缀补全：补全词的得分系数（完整命中的词排在前面）、最短前缀、每次最多扩展和检查的词数
+PREFIX_FACTOR = 0.5
+MIN_PREFIX_LENGTH = 2
+MAX_COMPLETIONS = 50
+PREFIX_SCAN_LIMIT = 2000
+
+# 英文停用词，不进入倒排表
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it',
+    'of', 'on', 'or', 'the', 'this', 'to', 'with'
+}
+
+# 驼峰拆分：CryptoArtist -> Crypto, Artist；连续大写、数字、中文单字各自成词
+_WORD = re.compile(r'[A-Za-z0-9]+|[一-鿿]')
+_CAMEL = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+
+
+def tokenize(text):
+    """分词并转为小写；驼峰词同时保留整词和拆开后的各部分"""
+    if isinstance(text, (list, tuple)):
+        text = ' '.join(str(part) for part in text)
+    tokens = []
+    for word in _WORD.findall(text or ''):
+        parts = _CAMEL.findall(word)
+        lowered = word.lower()
+        if lowered not in STOPWORDS:
+            tokens.append(lowered)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts if part.lower() not in STOPWORDS)
+    return tokens
+
+
+class InvertedIndex:
+    """按字段加权的 BM25 倒排索引，文档ID为整数"""
+
+    def __init__(self, field_weights):
+        self.field_weights = dict(field_weights)
+        self._lock = threading.RLock()
+        self._postings = {}   # 词 -> (文档ID数组, 词项得分数组)
+        self._terms = TrigramIndex()
+        self._sorted_terms = []   # 有序词表，前缀补全时二分查找；已删除的词在查找时跳过
+        self._new_terms = []      # 尚未并入有序词表的新词
+        self._doc_count = 0
+        self._field_lengths = {field: 0 for field in self.field_weights}
+
+    def __len__(self):
+        return self._doc_count
+
+    def vocabulary(self):
+        """返回 {词: 文档频率}，供联想词、模糊搜索等构建辅助索引"""
+        with self._lock:
+            return {term: len(ids) for term, (ids, _) in self._postings.items()}
+
+    def _analyze(self, fields):
+        """返回 ({词: {字段: 词频}}, {字段: 长度})"""
+        term_freqs = {}
+        lengths = {}
+        for field in self.field_weights:
+            tokens = tokenize(fields.get(field))
+            lengths[field] = len(tokens)
+            for token in tokens:
+                per_field = term_freqs.setdefault(token, {})
+                per_field[field] = per_field.get(field, 0) + 1
+        return term_freqs, lengths
+
+    def _impact(self, per_field, lengths):
+        docs = max(1, self._doc_count)
+        impact = 0.0
+        for field, tf in per_field.items():
+            average = self._field_lengths[field] / docs or 1.0
+            norm = 1 - BM25_B + BM25_B * lengths[field] / average
+            impact += self.field_weights[field] * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+        return impact
+
+    def add(self, doc_id, fields):
+        """写入一个新文档，fields 为 {字段: 文本或文本列表}"""
+        term_freqs, lengths = self._analyze(fields)
+        with self._lock:
+            self._doc_count += 1
+            for field, length in lengths.items():
+                self._field_lengths[field] += length
+            for term, per_field in term_freqs.items():
+                if term not in self._postings:
+                    self._postings[term] = (array('i'), array('f'))
+                    self._terms.add(term)
+                    self._new_terms.append(term)
+                ids, impacts = self._postings[term]
+                impact = self._impact(per_field, lengths)
+                if not ids or ids[-1] < doc_id:
+                    ids.append(doc_id)
+                    impacts.append(impact)
+                else:
+                    pos = int(np.searchsorted(np.frombuffer(ids, dtype=np.int32), doc_id))
+                    ids.insert(pos, doc_id)
+                    impacts.insert(pos, impact)
+
+    def remove(self, doc_id, fields):
+        """删除文档，fields 为写入时的字段内容"""
+        term_freqs, lengths = self._analyze(fields)
+        with self._lock:
+            removed = False
+            for term in term_freqs:
+                entry = self._postings.get(term)
+                if entry is None:
+                    continue
+                ids, impacts = entry
+                pos = int(np.searchsorted(np.frombuffer(ids, dtype=np.int32), doc_id))
+                if pos < len(ids) and ids[pos] == doc_id:
+                    del ids[pos]
+                    del impacts[pos]
+                    removed = True
+                if not ids:
+                    del self._postings[term]
+                    self._terms.remove(term)
+            if removed:
+                self._doc_count -= 1
+                for field, length in lengths.items():
+                    self._field_lengths[field] -= length
+
+    def update(self, doc_id, old_fields, new_fields):
+        self.remove(doc_id, old_fields)
+        self.add(doc_id, new_fields)
+
+    def _idf(self, doc_freq):
+        return math.log(1 + (self._doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def _completions(self, prefix):
+        """词表中以 prefix 开头的其他词，按文档频率取前 MAX_COMPLETIONS 个；在锁内调用"""
+        if len(prefix) < MIN_PREFIX_LENGTH:
+            return []
+        if self._new_terms:
+            # 删除后又重新写入的词已在有序词表中，合并时去重
+            self._sorted_terms = sorted(set(self._sorted_terms).union(self._new_terms))
+            self._new_terms = []
+        terms = self._sorted_terms
+        start = bisect_left(terms, prefix)
+        frequencies = {}
+        for i in range(start, min(len(terms), start + PREFIX_SCAN_LIMIT)):
+            term = terms[i]
+            if not term.startswith(prefix):
+                break
+            if term != prefix and term in self._postings:
+                frequencies[term] = len(self._postings[term][0])
+        return heapq.nlargest(MAX_COMPLETIONS, frequencies, key=frequencies.get)
+
+    def _term_hits(self, term, fuzzy, prefix=False):
+        """单个查询词命中的 (文档ID数组, 词项得分数组, 系数)，文档ID升序，得分 = 系数 × 词项得分
+
+        没有命中时返回 None。精确匹配时直接返回倒排表的视图，得分留到求交集后再计算。
+        prefix 为 True 时同时合并以该词开头的补全词。
+        """
+        if not fuzzy and not prefix:
+            entry = self._postings.get(term)
+            if entry is None:
+                return None
+            ids, impacts = entry
+            return np.frombuffer(ids, dtype=np.int32), np.frombuffer(impacts, dtype=np.float32), self._idf(len(ids))
+        
+        # 词 -> 得分系数：近似词按编辑距离打折，补全词按 PREFIX_FACTOR 打折
+        if fuzzy:
+            factors = {similar: 1 / (1 + distance * FUZZY_PENALTY) for similar, distance in self._terms.similar(term)}
+        else:
+            factors = {term: 1.0} if term in self._postings else {}
+        if prefix:
+            for completion in self._completions(term):
+                factors.setdefault(completion, PREFIX_FACTOR)
+        if not factors:
+            return None
+        variants = [(self._postings[variant], factor) for variant, factor in factors.items()]
+        doc_ids = np.concatenate([np.frombuffer(ids, dtype=np.int32) for (ids, _), _ in variants])
+        scores = np.concatenate([
+            self._idf(len(ids)) * factor * np.frombuffer(impacts, dtype=np.float32)
+            for (ids, impacts), factor in variants
+        ])
+        if len(variants) > 1:
+            # 同一文档命中多个近似词时取最高分
+            order = np.lexsort((-scores, doc_ids))
+            doc_ids, scores = doc_ids[order], scores[order]
+            first = np.ones(len(doc_ids), dtype=bool)
+            first[1:] = doc_ids[1:] != doc_ids[:-1]
+            doc_ids, scores = doc_ids[first], scores[first]
+        return doc_ids, scores, 1.0
+
+    def _match(self, terms, fuzzy, candidates, prefix_term=None):
+        # 在锁内调用：倒排表的数组视图随本函数返回一起释放，避免写入时无法扩容
+        hits = []
+        for term in terms:
+            term_hits = self._term_hits(term, fuzzy, prefix=term == prefix_term)
+            if term_hits is None:
+                return None
+            hits.append(term_hits)
+        # 从最短的倒排表（或给定的候选集）出发求交集，只对交集中的文档计算得分
+        hits.sort(key=lambda term_hits: len(term_hits[0]))
+        if candidates is None:
+            doc_ids, weights, factor = hits.pop(0)
+            scores = factor * weights.astype(np.float64)
+        else:
+            doc_ids, scores = candidates, np.zeros(len(candidates))
+        for ids, weights, factor in hits:
+            if not len(doc_ids):
+                break
+            pos = np.searchsorted(ids, doc_ids)
+            pos[pos == len(ids)] = 0
+            hit = ids[pos] == doc_ids
+            doc_ids, pos = doc_ids[hit], pos[hit]
+            scores = scores[hit] + factor * weights[pos]
+        return doc_ids.astype(np.int64), scores.astype(np.float64)
+
+    def match(self, query, fuzzy=False, candidates=None, prefix=False):
+        """返回同时命中所有查询词的 (文档ID数组, 得分数组)，均为 numpy 数组
+
+        fuzzy 为 True 时每个查询词也匹配编辑距离内的近似词。
+        candidates 为升序的文档ID数组时只在这些文档中匹配。
+        prefix 为 True 时最后一个查询词也匹配以它开头的词。
+        """
+        tokens = tokenize(query)
+        terms = list(dict.fromkeys(tokens))
+        with self._lock:
+            result = self._match(terms, fuzzy, candidates, tokens[-1] if prefix and tokens else None) if terms else None
+        if result is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        return result
+
+    def doc_freq(self, term, fuzzy=False, prefix=False):
+        """查询词命中的文档数（容错、前缀模式下为各变体文档数之和，是上界），用于估算选择性"""
+        with self._lock:
+            if fuzzy:
+                variants = {similar for similar, _ in self._terms.similar(term)}
+            else:
+                variants = {term} if term in self._postings else set()
+            if prefix:
+                variants.update(self._completions(term))
+            return sum(len(self._postings[variant][0]) for variant in variants)
+
+    def top_k(self, query, k, offset=0, fuzzy=False, prefix=False):
+        """返回 ([(文档ID, 得分)], 命中总数)，得分最高的在前，得分相同时ID小的在前"""
+        doc_ids, scores = self.match(query, fuzzy, prefix=prefix)
+        top = heapq.nsmallest(offset + k, zip((-scores).tolist(), doc_ids.tolist()))
+        return [(doc_id, -score) for score, doc_id in top[offset:]], len(doc_ids)
+
+
+def top_k_indices(primary, secondary, k):
+    """按 (primary, secondary) 升序返回前 k 个下标
+
+    primary 为浮点主键，secondary 为整数次键（需唯一，如以ID结尾）。
+    先用 argpartition 选出主键前 k 名，主键与第 k 名相同的并列项再按次键选取，
+    只对最终的 k 条排序。
+    """
+    n = len(primary)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        kth = np.partition(primary, k - 1)[k - 1]
+        chosen = np.flatnonzero(primary < kth)
+        ties = np.flatnonzero(primary == kth)
+        need = k - len(chosen)
+        if need < len(ties):
+            ties = ties[np.argpartition(secondary[ties], need - 1)[:need]]
+        chosen = np.concatenate([chosen, ties])
+    else:
+        chosen = np.arange(n)
+    return chosen[np.lexsort((secondary[chosen], primary[chosen]))]
+
+
+# 各搜索对象的字段权重
+NFT_FIELD_WEIGHTS = {'name': 10, 'category': 8, 'creator': 7, 'tags': 6, 'description': 5}
+COLLECTION_FIELD_WEIGHTS = {'name': 10, 'creator': 7, 'description': 5}
+USER_FIELD_WEIGHTS = {'username': 10}
+
+nft_index = InvertedIndex(NFT_FIELD_WEIGHTS)
+collection_index = InvertedIndex(COLLECTION_FIELD_WEIGHTS)
+user_index = InvertedIndex(USER_FIELD_WEIGHTS)
+
+
+def nft_fields(nft):
+    """NFT字典中参与全文检索的字段"""
+    return {
+        'name': nft['name'],
+        'category': nft['category'],
+        'creator': nft['creator']['name'],
+        'tags': nft['tags'],
+        'description': nft['description']
+    }
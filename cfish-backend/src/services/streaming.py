@@ -0,0 +1,60 @@
+"""
+流式响应 (Streaming Responses)
+大结果集和导出接口在请求 format=ndjson 时返回 NDJSON：每行一个 JSON 对象，
+由生成器逐行产生并编码，攒够一个块就发送，服务端内存不随结果行数增长，
+客户端也可以边接收边处理。
+
+实时推送使用 Server-Sent Events（text/event-stream），每个事件立即发送，不攒块。
+"""
+
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+SSE_MIMETYPE = 'text/event-stream'
+# 每个发送块的大致字节数
+CHUNK_SIZE = 64 * 1024
+
+
+def wants_ndjson(body=None):
+    """查询参数或请求体中 format=ndjson 时返回 True"""
+    fmt = request.args.get('format') or (body or {}).get('format')
+    return fmt == 'ndjson'
+
+
+def ndjson_response(rows, headers=None):
+    """把行生成器包装成流式 NDJSON 响应；rows 在发送时才被迭代"""
+    def generate():
+        dumps = current_app.json.dumps
+        chunk = []
+        size = 0
+        for row in rows:
+            line = dumps(row) + '\n'
+            chunk.append(line)
+            size += len(line)
+            if size >= CHUNK_SIZE:
+                yield ''.join(chunk)
+                chunk = []
+                size = 0
+        if chunk:
+            yield ''.join(chunk)
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE, headers=headers)
+
+
+def sse_event(data, event=None, event_id=None):
+    """编码一条 SSE 事件，data 为可 JSON 序列化的对象"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    lines.append(f'data: {current_app.json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def sse_response(events):
+    """把已编码的 SSE 事件生成器包装成流式响应，禁止代理缓冲"""
+    return Response(stream_with_context(events), mimetype=SSE_MIMETYPE, headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -0,0 +1,241 @@
+"""
+特征位图索引 (Trait Bitmap Index)
+每个合集（或拍卖列表）一份索引：每个条目分配一个位，每个 (trait_type, value) 对应一个
+Python 整数位图。同一特征类型内的多个取值取并集，不同特征类型之间取交集，
+筛选只是几次整数位运算。
+
+稀有度采用统计稀有度：条目的分数为其各个特征取值出现频率倒数之和
+（缺少某个特征类型也视为一种取值），分数越高越稀有。
+分数记为 条目数 * sum(1 / 取值的条目数)，只维护求和部分：加入或修改条目时只调整受影响取值的
+其他持有者的分数，排名在下一次读取时按已更新的分数重新排序。
+数值型特征（如 1-100 的 Rarity Score）几乎每个条目取值都不同，会主导统计稀有度，
+因此只用于筛选，不参与稀有度计算。
+"""
+
+import threading
+from bisect import insort
+
+import numpy as np
+
+# 条目缺少某个特征类型时使用的取值
+MISSING_VALUE = '__none__'
+
+
+def iter_bits(bitmap):
+    """按从低到高的顺序遍历位图中被置位的位置"""
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+
+def parse_trait_filters(raw):
+    """解析 "Background:Blue,Background:Red,Eyes:Laser" 格式的筛选参数，返回 {trait_type: [value]}"""
+    filters = {}
+    for part in (raw or '').split(','):
+        if ':' not in part:
+            continue
+        trait_type, value = part.split(':', 1)
+        trait_type, value = trait_type.strip(), value.strip()
+        if trait_type and value:
+            filters.setdefault(trait_type, []).append(value)
+    return filters
+
+
+class TraitIndex:
+    """单个作用域内的特征位图索引"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._slots = {}       # 条目ID -> 位
+        self._ids = []         # 位 -> 条目ID
+        self._by_id = []       # 按条目ID排序的位，稀有度相同时按ID排名
+        self._traits = []      # 位 -> {trait_type: value}
+        self._bitmaps = {}     # (trait_type, value) -> 位图
+        self._by_type = {}     # trait_type -> 拥有该特征类型的条目位图
+        self.all = 0
+        self._scored = {}      # 参与稀有度计算的特征类型（按出现顺序）
+        self._numeric = set()  # 数值型特征类型，不参与稀有度计算
+        self._raw = np.zeros(64)  # 位 -> sum(1 / 取值的条目数)
+        self._ranked = None    # 按稀有度从高到低排列的位，None 表示需要重新排序
+        self._ranks = None     # 位 -> 排名
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, item_id):
+        return item_id in self._slots
+
+    def add(self, item_id, traits):
+        """加入或更新一个条目，traits 为 [{'trait_type': ..., 'value': ...}]"""
+        with self._lock:
+            traits = traits or []
+            for trait in traits:
+                value = trait['value']
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self._demote(trait['trait_type'])
+            values = {trait['trait_type']: str(trait['value']) for trait in traits}
+
+            existing = item_id in self._slots
+            bit = self._slots[item_id] if existing else len(self._ids)
+            mask = 1 << bit
+            # 受影响的取值：条目在每个计分特征类型上的旧取值和新取值，记下变化前的条目数
+            keys = set()
+            for trait_type in self._scored:
+                if existing:
+                    keys.add(self._key(bit, trait_type))
+                keys.add((trait_type, values.get(trait_type, MISSING_VALUE)))
+            before = {key: self._holders(key).bit_count() for key in keys}
+
+            if existing:
+                self._clear(bit)
+            else:
+                self._slots[item_id] = bit
+                self._ids.append(item_id)
+                self._traits.append({})
+                insort(self._by_id, bit, key=self._ids.__getitem__)
+                if bit >= len(self._raw):
+                    self._raw = np.concatenate([self._raw, np.zeros(len(self._raw))])
+            for trait_type, value in values.items():
+                key = (trait_type, value)
+                self._bitmaps[key] = self._bitmaps.get(key, 0) | mask
+                self._by_type[trait_type] = self._by_type.get(trait_type, 0) | mask
+            self._traits[bit] = values
+            self.all |= mask
+
+            for key in keys:
+                self._shift(key, before[key], self._holders(key).bit_count(), mask)
+            # 新出现的特征类型：其他条目都按"无"这一取值计分
+            for trait_type in values:
+                if trait_type not in self._scored and trait_type not in self._numeric:
+                    self._scored[trait_type] = None
+                    missing = (trait_type, MISSING_VALUE)
+                    self._shift(missing, 0, self._holders(missing).bit_count(), mask)
+            self._raw[bit] = sum(1 / self._holders(self._key(bit, trait_type)).bit_count()
+                                 for trait_type in self._scored)
+            self._ranked = None
+
+    def _clear(self, bit):
+        mask = ~(1 << bit)
+        for trait_type, value in self._traits[bit].items():
+            self._bitmaps[(trait_type, value)] &= mask
+            self._by_type[trait_type] &= mask
+
+    def _key(self, bit, trait_type):
+        return trait_type, self._traits[bit].get(trait_type, MISSING_VALUE)
+
+    def _holders(self, key):
+        """拥有某个取值的条目位图，取值为 MISSING_VALUE 时是缺少该特征类型的条目"""
+        trait_type, value = key
+        if value == MISSING_VALUE:
+            return self.all & ~self._by_type.get(trait_type, 0)
+        return self._bitmaps.get(key, 0)
+
+    def _mask(self, bitmap):
+        """位图转换为按位下标的布尔数组"""
+        size = len(self._ids)
+        data = np.frombuffer(bitmap.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(data, count=size, bitorder='little').view(bool)
+
+    def _shift(self, key, before, after, skip):
+        """取值的条目数从 before 变为 after 时调整其他持有者的分数，条目数为 0 表示不计分"""
+        delta = (1 / after if after else 0.0) - (1 / before if before else 0.0)
+        if delta:
+            self._raw[:len(self._ids)][self._mask(self._holders(key) & ~skip)] += delta
+
+    def _demote(self, trait_type):
+        """把特征类型标记为数值型，并从已有条目的分数中减去它的贡献"""
+        if trait_type in self._numeric:
+            return
+        self._numeric.add(trait_type)
+        if trait_type in self._scored:
+            del self._scored[trait_type]
+            keys = [key for key in self._bitmaps if key[0] == trait_type] + [(trait_type, MISSING_VALUE)]
+            for key in keys:
+                self._shift(key, self._holders(key).bit_count(), 0, 0)
+            self._ranked = None
+
+    def match(self, filters):
+        """同一特征类型内取并集，不同特征类型之间取交集，返回位图"""
+        with self._lock:
+            result = self.all
+            for trait_type, values in filters.items():
+                union = 0
+                for value in values:
+                    if value == MISSING_VALUE:
+                        union |= self.all & ~self._by_type.get(trait_type, 0)
+                    else:
+                        union |= self._bitmaps.get((trait_type, str(value)), 0)
+                result &= union
+                if not result:
+                    break
+            return result
+
+    def ids(self, bitmap):
+        return [self._ids[bit] for bit in iter_bits(bitmap)]
+
+    def counts(self, bitmap=None):
+        """各特征取值在位图（默认全部条目）中的数量，用于筛选面板"""
+        with self._lock:
+            scope = self.all if bitmap is None else bitmap
+            counts = {}
+            for (trait_type, value), trait_bitmap in self._bitmaps.items():
+                count = (trait_bitmap & scope).bit_count()
+                if count:
+                    counts.setdefault(trait_type, {})[value] = count
+            return counts
+
+    # ---- 稀有度 ----
+
+    def _rank(self):
+        """按已维护的分数重新排序；增量调整会带来微小的浮点误差，比较前先舍入"""
+        if self._ranked is not None:
+            return
+        by_id = np.array(self._by_id, dtype=np.int64)
+        raw = np.round(self._raw[by_id], 9)
+        ranked = by_id[np.argsort(-raw, kind='stable')]
+        ranks = np.empty(len(ranked), dtype=np.int64)
+        ranks[ranked] = np.arange(1, len(ranked) + 1)
+        self._ranked = ranked.tolist()
+        self._ranks = ranks.tolist()
+
+    def rarity(self, item_id):
+        """返回 (稀有度分数, 排名)，排名 1 为最稀有；不在索引中时返回 None"""
+        with self._lock:
+            bit = self._slots.get(item_id)
+            if bit is None:
+                return None
+            self._rank()
+            return round(float(len(self._ids) * self._raw[bit]), 2), self._ranks[bit]
+
+    def ranked(self, bitmap, offset=0, limit=20, rarest_first=True):
+        """按稀有度排名读取位图中的一页条目ID"""
+        with self._lock:
+            self._rank()
+            order = self._ranked if rarest_first else reversed(self._ranked)
+            members = None if bitmap == self.all else set(iter_bits(bitmap))
+            page = []
+            skipped = 0
+            for bit in order:
+                if members is not None and bit not in members:
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                page.append(self._ids[bit])
+                if len(page) >= limit:
+                    break
+            return page
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def trait_index(scope, create=True):
+    """获取作用域（如 ('collection', 1)、'auctions'）对应的特征索引"""
+    with _indexes_lock:
+        index = _indexes.get(scope)
+        if index is None and create:
+            index = _indexes[scope] = TraitIndex()
+        return index
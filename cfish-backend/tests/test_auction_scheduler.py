@@ -0,0 +1,95 @@
+from src.services.auction_scheduler import AuctionScheduler
+
+
+def make_scheduler():
+    scheduler = AuctionScheduler()
+    calls = []
+    for event in ('start', 'end'):
+        scheduler.on(event, lambda auction_id, event=event: calls.append((auction_id, event)))
+    return scheduler, calls
+
+
+def test_runs_due_events_in_time_order():
+    scheduler, calls = make_scheduler()
+    scheduler.schedule('a', 'end', 300)
+    scheduler.schedule('b', 'start', 100)
+    scheduler.schedule('a', 'start', 200)
+
+    assert scheduler.run_due(now=50) == 0
+    assert scheduler.run_due(now=200) == 2
+    assert calls == [('b', 'start'), ('a', 'start')]
+    assert scheduler.pending() == 1
+
+    assert scheduler.run_due(now=1000) == 1
+    assert calls[-1] == ('a', 'end')
+    assert scheduler.pending() == 0
+
+
+def test_reschedule_later_drops_the_old_entry():
+    scheduler, calls = make_scheduler()
+    scheduler.schedule('a', 'end', 100)
+    scheduler.schedule('a', 'end', 500)
+
+    assert scheduler.pending() == 1
+    assert scheduler.run_due(now=100) == 0
+    assert calls == []
+    assert scheduler.run_due(now=500) == 1
+    assert calls == [('a', 'end')]
+    # 旧条目已出堆，不会再次触发
+    assert scheduler.run_due(now=10_000) == 0
+
+
+def test_reschedule_earlier_fires_once():
+    scheduler, calls = make_scheduler()
+    scheduler.schedule('a', 'end', 500)
+    scheduler.schedule('a', 'end', 100)
+
+    assert scheduler.run_due(now=100) == 1
+    assert scheduler.run_due(now=500) == 0
+    assert calls == [('a', 'end')]
+
+
+def test_cancel_skips_only_the_cancelled_events():
+    scheduler, calls = make_scheduler()
+    scheduler.schedule('a', 'start', 100)
+    scheduler.schedule('a', 'end', 200)
+    scheduler.schedule('b', 'end', 200)
+
+    scheduler.cancel('a', 'start', 'end')
+    assert scheduler.pending() == 1
+    assert scheduler.run_due(now=1000) == 1
+    assert calls == [('b', 'end')]
+
+
+def test_schedule_after_cancel_is_live_again():
+    scheduler, calls = make_scheduler()
+    scheduler.schedule('a', 'end', 100)
+    scheduler.cancel('a', 'end')
+    scheduler.schedule('a', 'end', 300)
+
+    assert scheduler.run_due(now=100) == 0
+    assert scheduler.run_due(now=300) == 1
+    assert calls == [('a', 'end')]
+
+
+def test_failing_handler_does_not_block_other_events():
+    scheduler, calls = make_scheduler()
+
+    def explode(auction_id):
+        raise RuntimeError('settlement failed')
+
+    scheduler.on('settle', explode)
+    scheduler.schedule('a', 'settle', 100)
+    scheduler.schedule('b', 'end', 100)
+
+    assert scheduler.run_due(now=100) == 2
+    assert calls == [('b', 'end')]
+
+
+def test_event_without_handler_is_consumed():
+    scheduler, calls = make_scheduler()
+    scheduler.schedule('a', 'unknown', 100)
+
+    assert scheduler.run_due(now=100) == 1
+    assert scheduler.pending() == 0
+    assert calls == []
@@ -0,0 +1,97 @@
+import pytest
+
+from src.services.bid_book import BidBook, BidError
+
+
+def make_bid(address, amount, timestamp='2026-01-01T00:00:00'):
+    return {'bidder_address': address, 'bid_amount': amount, 'timestamp': timestamp}
+
+
+def test_first_bid_sets_leader_without_second_price():
+    book = BidBook(current_bid=100, min_increment=10)
+
+    assert book.place(make_bid('alice', 110), 'Alice') is True
+    assert book.leader == 'alice'
+    assert book.current_bid == 110
+    assert book.second_price is None
+    assert book.participants['alice']['is_leading'] is True
+    assert book.participants['alice']['username'] == 'Alice'
+
+
+def test_leader_change_moves_previous_bid_to_second_price():
+    book = BidBook(current_bid=100, min_increment=10)
+    book.place(make_bid('alice', 110))
+
+    assert book.place(make_bid('bob', 130)) is True
+    assert book.leader == 'bob'
+    assert book.second_price == 110
+    assert book.participants['alice']['is_leading'] is False
+    assert book.participants['bob']['is_leading'] is True
+
+    # 原领先者再次出价夺回领先，次高价变为 bob 的出价
+    assert book.place(make_bid('alice', 150)) is False
+    assert book.leader == 'alice'
+    assert book.second_price == 130
+    assert book.participants['bob']['is_leading'] is False
+    assert book.participants['alice']['total_bids'] == 2
+    assert book.participants['alice']['highest_bid'] == 150
+
+
+def test_leader_raising_own_bid_keeps_second_price():
+    book = BidBook(current_bid=100, min_increment=10)
+    book.place(make_bid('alice', 110))
+    book.place(make_bid('bob', 120))
+
+    book.place(make_bid('bob', 140))
+    assert book.leader == 'bob'
+    assert book.second_price == 110
+    assert book.current_bid == 140
+
+
+def test_accepted_bids_get_sequence_and_increment():
+    book = BidBook(current_bid=100, min_increment=10)
+    first = make_bid('alice', 110)
+    second = make_bid('bob', 125)
+    book.place(first)
+    book.place(second)
+
+    assert (first['sequence'], first['increment']) == (1, 10)
+    assert (second['sequence'], second['increment']) == (2, 15)
+    assert book.sequence == 2
+    assert book.average_increment() == 12.5
+    assert book.latest(1) == [second]
+    assert book.latest(5, offset=1) == [first]
+
+
+@pytest.mark.parametrize('amount, message', [
+    (100, 'higher than current bid'),
+    (90, 'higher than current bid'),
+    (105, 'Minimum bid increment is 10'),
+])
+def test_invalid_bid_is_rejected_without_changes(amount, message):
+    book = BidBook(current_bid=100, min_increment=10)
+
+    with pytest.raises(BidError, match=message):
+        book.place(make_bid('alice', amount))
+    assert book.bids == []
+    assert book.participants == {}
+    assert book.leader is None
+    assert book.sequence == 0
+
+
+def test_bid_error_is_a_value_error():
+    assert issubclass(BidError, ValueError)
+
+
+def test_minimum_replaces_increment_rule():
+    # 荷兰式拍卖：只要求不低于当前价格，不受最小加价幅度约束
+    book = BidBook(current_bid=500, min_increment=50)
+
+    with pytest.raises(BidError, match='at least the current price 300'):
+        book.place(make_bid('alice', 299), minimum=300)
+    assert book.bids == []
+
+    assert book.place(make_bid('alice', 300), minimum=300) is True
+    assert book.leader == 'alice'
+    assert book.current_bid == 300
+    assert book.bids[0]['increment'] == -200
@@ -0,0 +1,81 @@
+import random
+import sys
+import threading
+
+import pytest
+
+from src.services.bid_book import BidBook, BidError, LockStripes
+
+AUCTIONS = 3
+THREADS = 16
+BIDS_PER_THREAD = 1000
+MIN_INCREMENT = 1
+
+
+@pytest.fixture(autouse=True)
+def frequent_switches():
+    # 缩短线程切换间隔，让"读取当前出价 - 校验 - 写入"尽可能交错
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_concurrent_bids_never_move_current_bid_backwards():
+    books = {auction_id: BidBook(100, MIN_INCREMENT) for auction_id in range(AUCTIONS)}
+    locks = LockStripes(count=2)    # 少于拍卖数，部分拍卖共用一把锁
+    observed = {auction_id: [] for auction_id in books}
+    stop = threading.Event()
+    errors = []
+
+    def bidder(worker):
+        rng = random.Random(worker)
+        for n in range(BIDS_PER_THREAD):
+            auction_id = rng.randrange(AUCTIONS)
+            book = books[auction_id]
+            # 不持锁读取当前出价后加价：多个线程经常基于同一个出价竞争
+            amount = book.current_bid + rng.randint(MIN_INCREMENT, 3)
+            bid = {'bidder_address': f'bidder_{worker}', 'bid_amount': amount, 'timestamp': str(n)}
+            with locks(auction_id):
+                try:
+                    book.place(bid)
+                except BidError:
+                    pass
+                except Exception as error:
+                    errors.append(error)
+
+    def observer():
+        while not stop.is_set():
+            for auction_id, book in books.items():
+                with locks(auction_id):
+                    observed[auction_id].append(book.current_bid)
+
+    watcher = threading.Thread(target=observer)
+    watcher.start()
+    workers = [threading.Thread(target=bidder, args=(worker,)) for worker in range(THREADS)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stop.set()
+    watcher.join()
+
+    assert errors == []
+    accepted = 0
+    for auction_id, book in books.items():
+        seen = observed[auction_id]
+        assert all(later >= earlier for earlier, later in zip(seen, seen[1:]))
+
+        # 序号从 1 连续递增，金额随序号严格递增且满足最小加价
+        assert [bid['sequence'] for bid in book.bids] == list(range(1, len(book.bids) + 1))
+        amounts = [100] + [bid['bid_amount'] for bid in book.bids]
+        assert all(later - earlier >= MIN_INCREMENT for earlier, later in zip(amounts, amounts[1:]))
+
+        assert book.sequence == len(book.bids)
+        if book.bids:
+            assert book.current_bid == book.bids[-1]['bid_amount']
+            assert book.leader == book.bids[-1]['bidder_address']
+        accepted += len(book.bids)
+
+    # 竞争下仍有相当一部分出价被接受，否则测试没有覆盖到并发写入
+    assert accepted > AUCTIONS * 10
@@ -0,0 +1,39 @@
+from src.services import collection_stats as stats_module
+from src.services.collection_stats import CollectionStatsEngine
+
+
+def make_engine(monkeypatch, now):
+    clock = {'now': now}
+    monkeypatch.setattr(stats_module.time, 'time', lambda: clock['now'])
+    engine = CollectionStatsEngine()
+    engine.register_collection(1, 'Art', 'First')
+    engine.register_collection(2, 'Art', 'Second')
+    engine.record_mint(10, 1, 'alice')
+    engine.record_mint(20, 2, 'bob')
+    return engine, clock
+
+
+def test_version_changes_only_with_the_collection(monkeypatch):
+    engine, _ = make_engine(monkeypatch, 1_000_000.0)
+    first, second = engine.version(1), engine.version(2)
+
+    assert engine.version(1) == first     # 读取不改变版本
+    engine.record_listing(10, 5.0)
+    assert engine.version(1) > first
+    assert engine.version(2) == second
+    assert engine.snapshot(1)['floor_price'] == 5.0
+
+
+def test_window_expiry_changes_version(monkeypatch):
+    engine, clock = make_engine(monkeypatch, 1_000_000.0)
+    engine.record_sale(10, 3.0, buyer='carol')
+    version = engine.version(1)
+    assert engine.snapshot(1)['volume_24h'] == 3.0
+
+    clock['now'] += 3600                  # 仍在窗口内
+    assert engine.version(1) == version
+
+    clock['now'] += 24 * 3600             # 成交移出 24 小时窗口
+    assert engine.version(1) > version
+    snapshot = engine.snapshot(1)
+    assert (snapshot['volume_24h'], snapshot['volume_7d'], snapshot['owners']) == (0.0, 3.0, 1)
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from src.services.dutch_pricing import DutchPriceIndex, crossing_time, dutch_price
+
+
+def brute_force(auctions, max_price, now):
+    """逐场用公式计算：已开始且当前价格不高于 max_price 的拍卖"""
+    return sorted(
+        (auction_id, dutch_price(*params, now))
+        for auction_id, params in auctions.items()
+        if params[4] <= now and dutch_price(*params, now) <= max_price
+    )
+
+
+def test_price_steps_down_to_floor():
+    # 起拍 100，每 60 秒降 15，底价 40
+    params = (100, 15, 60, 40, 1000)
+    assert dutch_price(*params, 900) == 100
+    assert dutch_price(*params, 1059) == 100
+    assert dutch_price(*params, 1060) == 85
+    assert dutch_price(*params, 1179) == 70
+    assert dutch_price(*params, 1000 + 60 * 4) == 40
+    assert dutch_price(*params, 10 ** 9) == 40
+
+
+def test_floor_above_start_price_keeps_start_price():
+    assert dutch_price(100, 10, 60, 500, 0, 10_000) == 100
+
+
+def test_crossing_time_matches_price():
+    params = (100, 15, 60, 40, 1000)
+    for price in (100, 99, 85, 84, 41, 40):
+        at = crossing_time(*params, price)
+        assert dutch_price(*params, at) <= price
+        assert at == 1000 or dutch_price(*params, at - 1) > price
+    assert crossing_time(*params, 39) is None
+    assert crossing_time(100, 0, 60, 0, 1000, 50) is None
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_at_or_below_matches_brute_force(seed):
+    rng = random.Random(seed)
+    index = DutchPriceIndex(edges=[1, 2, 5, 10, 20, 50, 100, 200, 500])
+    auctions = {}
+    for auction_id in range(300):
+        start_price = rng.choice([rng.randint(1, 1000), rng.choice([5, 10, 50, 100, 500])])
+        params = (
+            start_price,
+            rng.choice([0, 1, rng.randint(1, 100)]),
+            rng.choice([30, 60, 300]),
+            rng.choice([0, rng.randint(0, start_price), start_price + 10]),
+            rng.randint(0, 10_000),
+        )
+        auctions[auction_id] = params
+        index.add(auction_id, *params)
+
+    # 改价（重新加入）与移除之后索引仍与逐场计算一致
+    for auction_id in rng.sample(sorted(auctions), 40):
+        params = (rng.randint(1, 1000), rng.randint(1, 50), 60, 0, rng.randint(0, 10_000))
+        auctions[auction_id] = params
+        index.add(auction_id, *params)
+    for auction_id in rng.sample(sorted(auctions), 40):
+        del auctions[auction_id]
+        index.remove(auction_id)
+    assert len(index) == len(auctions)
+
+    for _ in range(200):
+        now = rng.randint(-100, 200_000)
+        max_price = rng.choice([0, 0.5, 1, 5, 20, 499.5, 500, 750, 5000, rng.uniform(0, 1200)])
+        assert sorted(index.at_or_below(max_price, now)) == brute_force(auctions, max_price, now)
+
+
+def test_price_of_unknown_auction_is_none():
+    index = DutchPriceIndex()
+    index.add('a', 100, 10, 60, 0, 0)
+    index.remove('a')
+    assert index.price('a', 1000) is None
+    assert index.at_or_below(10 ** 9, 10 ** 9) == []
@@ -0,0 +1,50 @@
+from src.services.event_bus import EventBus
+
+
+def test_publish_reaches_only_subscribed_topics():
+    bus = EventBus()
+    auction = bus.subscribe(['auction:1'])
+    both = bus.subscribe(['auction:1', 'job:7'])
+
+    assert bus.publish('auction:1', 'bid', {'amount': 5}) == 2
+    assert bus.publish('job:7', 'progress', {}) == 1
+    assert bus.publish('auction:2', 'bid', {}) == 0
+
+    message = auction.get(timeout=0)
+    assert (message['topic'], message['event'], message['data']) == ('auction:1', 'bid', {'amount': 5})
+    assert auction.get(timeout=0) is None
+    assert [both.get(timeout=0)['event'], both.get(timeout=0)['event']] == ['bid', 'progress']
+
+
+def test_message_ids_increase():
+    bus = EventBus()
+    subscriber = bus.subscribe(['t'])
+    for _ in range(3):
+        bus.publish('t', 'e', None)
+    assert [subscriber.get(timeout=0)['id'] for _ in range(3)] == [1, 2, 3]
+
+
+def test_full_queue_drops_only_the_slow_subscriber():
+    bus = EventBus()
+    slow = bus.subscribe(['auction:1', 'job:1'], max_pending=3)
+    fast = bus.subscribe(['auction:1'], max_pending=100)
+
+    for i in range(3):
+        assert bus.publish('auction:1', 'bid', i) == 2
+    # 第 4 条时慢订阅者的队列已满：不阻塞发布方，断开慢订阅者，其他订阅者照常收到
+    assert bus.publish('auction:1', 'bid', 3) == 1
+    assert slow.dropped
+    assert not fast.dropped
+    assert bus.publish('job:1', 'progress', None) == 0     # 已从所有主题移除
+
+    assert [slow.get(timeout=0)['data'] for _ in range(3)] == [0, 1, 2]
+    assert [fast.get(timeout=0)['data'] for _ in range(4)] == [0, 1, 2, 3]
+    assert bus.stats() == {'topics': 1, 'subscriptions': 1, 'published': 4, 'dropped_subscribers': 1}
+
+
+def test_unsubscribe_removes_empty_topics():
+    bus = EventBus()
+    subscriber = bus.subscribe(['a', 'b'])
+    bus.unsubscribe(subscriber)
+    assert bus.stats()['topics'] == 0
+    assert bus.publish('a', 'e', None) == 0
@@ -0,0 +1,72 @@
+import itertools
+import random
+
+import pytest
+
+from src.services.fuzzy import TrigramIndex, allowed_edits, bounded_levenshtein
+
+
+def levenshtein(a, b):
+    """不带上限的编辑距离，作为对照"""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+@pytest.mark.parametrize('a, b, distance', [
+    ('dragon', 'dragon', 0),
+    ('dragon', 'dragn', 1),
+    ('dragon', 'drgaon', 2),
+    ('kitten', 'sitting', 3),
+    ('', 'abc', 3),
+])
+def test_distance_within_bound_is_exact(a, b, distance):
+    assert bounded_levenshtein(a, b, 3) == distance
+
+
+def test_distance_beyond_bound_is_capped():
+    assert bounded_levenshtein('kitten', 'sitting', 2) == 3
+    assert bounded_levenshtein('abc', 'abcdefgh', 1) == 2     # 长度差直接超出上限
+    assert bounded_levenshtein('abcdef', 'uvwxyz', 0) == 1
+
+
+def test_bounded_distance_matches_full_distance():
+    rng = random.Random(7)
+    for _ in range(500):
+        a = ''.join(rng.choice('abc') for _ in range(rng.randint(0, 7)))
+        b = ''.join(rng.choice('abc') for _ in range(rng.randint(0, 7)))
+        for bound in range(4):
+            full = levenshtein(a, b)
+            assert bounded_levenshtein(a, b, bound) == (full if full <= bound else bound + 1)
+
+
+def test_allowed_edits_by_length():
+    assert [allowed_edits('a' * n) for n in (1, 3, 4, 6, 7, 12)] == [0, 0, 1, 1, 2, 2]
+
+
+def test_similar_finds_every_term_within_allowed_edits():
+    rng = random.Random(3)
+    vocabulary = {''.join(rng.choice('abcde') for _ in range(rng.randint(2, 9))) for _ in range(400)}
+    index = TrigramIndex()
+    for term in vocabulary:
+        index.add(term)
+
+    queries = list(itertools.islice(vocabulary, 40)) + ['abcde', 'eeeeeee', 'abd', 'cabbage']
+    for query in queries:
+        limit = allowed_edits(query)
+        expected = sorted((term, levenshtein(query, term)) for term in vocabulary
+                          if levenshtein(query, term) <= limit)
+        assert sorted(index.similar(query)) == expected
+
+
+def test_removed_terms_are_not_returned():
+    index = TrigramIndex()
+    index.add('dragon')
+    index.add('wagon')
+    index.remove('dragon')
+    assert index.similar('dragon') == []
+    assert index.similar('dragon', max_distance=2) == [('wagon', 2)]
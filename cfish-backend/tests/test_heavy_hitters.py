@@ -0,0 +1,90 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from src.services import heavy_hitters
+from src.services.heavy_hitters import SpaceSaving, TrendingQueries
+
+
+def test_counts_are_exact_below_capacity():
+    sketch = SpaceSaving(capacity=10, epoch=0)
+    for key in 'aabbbc':
+        sketch.add(key, 0)
+    assert sketch.top(3, 0) == [('b', 3.0, 0.0), ('a', 2.0, 0.0), ('c', 1.0, 0.0)]
+
+
+def test_new_key_replaces_the_smallest_counter():
+    sketch = SpaceSaving(capacity=2, epoch=0)
+    for key in 'aaab':
+        assert sketch.add(key, 0) is None
+    assert sketch.add('c', 0) == 'b'
+    # 新键继承被替换计数器的计数作为误差上界
+    assert sketch.estimate('c', 0) == 2.0
+    assert dict((key, error) for key, _, error in sketch.top(2, 0)) == {'a': 0.0, 'c': 1.0}
+    assert sketch.estimate('b', 0) == 0.0
+
+
+def test_space_saving_guarantees_on_a_skewed_stream():
+    rng = random.Random(11)
+    stream = [min(int(rng.paretovariate(1.2)), 500) for _ in range(20_000)]
+    truth = Counter(stream)
+    sketch = SpaceSaving(capacity=50, epoch=0)
+    for key in stream:
+        sketch.add(key, 0)
+
+    for key, count, error in sketch.top(50, 0):
+        # 估计值不低于真实值，且最多高出误差上界
+        assert truth[key] <= count <= truth[key] + error
+    # 真实计数超过 N / 容量 的键一定被保留
+    kept = {key for key, _, _ in sketch.top(50, 0)}
+    assert {key for key, count in truth.items() if count > len(stream) / 50} <= kept
+
+
+def test_counts_decay_with_the_window():
+    sketch = SpaceSaving(capacity=4, window=3600, epoch=0)
+    sketch.add('q', 0)
+    assert sketch.estimate('q', 3600) == pytest.approx(math.exp(-1))
+    sketch.add('q', 3600)
+    assert sketch.estimate('q', 3600) == pytest.approx(1 + math.exp(-1))
+
+
+def test_recent_key_outranks_an_older_heavier_one():
+    sketch = SpaceSaving(capacity=4, window=3600, epoch=0)
+    for _ in range(3):
+        sketch.add('old', 0)
+    sketch.add('new', 3 * 3600)
+    assert [key for key, _, _ in sketch.top(2, 3 * 3600)] == ['new', 'old']
+
+
+def test_rebase_keeps_estimates():
+    sketch = SpaceSaving(capacity=4, window=1, epoch=0)
+    sketch.add('q', 0)
+    sketch.add('q', 10)
+    later = heavy_hitters.MAX_EXPONENT + 100    # 触发重设基准时间
+    sketch.add('q', later)
+    assert sketch.epoch == later
+    assert sketch.estimate('q', later) == pytest.approx(1.0)
+    assert all(math.isfinite(count) for _, count, _ in sketch.top(1, later))
+
+
+def test_trending_reports_direction(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(heavy_hitters.time, 'time', lambda: now[0])
+    trending = TrendingQueries(capacity=8)
+    for _ in range(5):
+        trending.record('steady', at=now[0] - 20 * 3600)
+    for _ in range(5):
+        trending.record('rising', at=now[0])
+
+    trends = {query: trend for query, _, trend in trending.top('day', 5)}
+    assert trends == {'rising': 'up', 'steady': 'down'}
+    assert trending.estimate('rising', 'all') == 5
+    assert trending.estimate('steady', 'hour') < 1e-6
+
+
+def test_record_returns_the_all_time_count_and_eviction():
+    trending = TrendingQueries(capacity=1)
+    assert trending.record('a', at=0) == (1.0, None)
+    assert trending.record('b', at=0) == (2.0, 'a')
@@ -0,0 +1,119 @@
+import random
+
+import pytest
+
+from src.services.listing_engine import CURRENCY_PRIORITY, ListingEngine
+
+CATEGORIES = ['Art', 'Gaming', 'Music']
+CURRENCIES = ['CFISH', 'SOL', 'ETH']
+
+
+def make_nfts(count, seed=0):
+    rng = random.Random(seed)
+    return [{
+        'id': nft_id,
+        'name': f'NFT {nft_id}',
+        'category': rng.choice(CATEGORIES),
+        'currency': rng.choice(CURRENCIES),
+        'rarity': rng.choice(['Common', 'Rare', 'Epic']),
+        'price': float(rng.randint(1, 30)),     # 大量相同价格，检查按ID排序
+        'commission': 2.5,
+        'likes': rng.randint(0, 10),
+        'views': rng.randint(0, 100),
+        'created_at': 1_700_000_000 + rng.randint(0, 50),
+        'is_for_sale': rng.random() < 0.7,
+    } for nft_id in rng.sample(range(1, 5000), count)]
+
+
+@pytest.fixture
+def nfts():
+    return make_nfts(400)
+
+
+@pytest.fixture
+def engine(nfts):
+    # 初始容量很小，同时覆盖扩容
+    engine = ListingEngine(capacity=8)
+    engine.load(nfts)
+    return engine
+
+
+def oracle(nfts, sort_by, descending, cfish_first, **filters):
+    def keep(nft):
+        return all(nft[field] == value for field, value in filters.items())
+
+    def segment(nft):
+        if not cfish_first:
+            return 0
+        return CURRENCY_PRIORITY.index(nft['currency']) if nft['currency'] in CURRENCY_PRIORITY else len(CURRENCY_PRIORITY)
+
+    sign = -1 if descending else 1
+    ordered = sorted((nft for nft in nfts if keep(nft)),
+                     key=lambda nft: (segment(nft), sign * nft[sort_by], sign * nft['id']))
+    return [nft['id'] for nft in ordered]
+
+
+@pytest.mark.parametrize('sort_by', ['price', 'likes', 'created_at'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+@pytest.mark.parametrize('cfish_first', [True, False])
+def test_offset_pages_match_full_sort(engine, nfts, sort_by, order, cfish_first):
+    expected = oracle(nfts, sort_by, order == 'desc', cfish_first)
+    for offset in (0, 19, 150, 390, 400):
+        page, total, _ = engine.query(sort_by=sort_by, order=order, limit=20, offset=offset, cfish_first=cfish_first)
+        assert total == len(nfts)
+        assert page == expected[offset:offset + 20]
+
+
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_cursor_pages_walk_every_segment_once(engine, nfts, order):
+    filters = {'category': 'Art', 'is_for_sale': True}
+    expected = oracle(nfts, 'price', order == 'desc', True, **filters)
+    seen = []
+    after = None
+    while True:
+        page, total, after = engine.query(filters, sort_by='price', order=order, limit=13, after=after)
+        assert total == len(expected)
+        seen.extend(page)
+        if after is None:
+            break
+    assert seen == expected
+
+
+def test_unknown_cursor_segment_is_rejected(engine):
+    with pytest.raises(ValueError):
+        engine.query(sort_by='price', after=['DOGE', 1.0, 1])
+
+
+def test_unknown_sort_falls_back_to_newest(engine, nfts):
+    page, _, _ = engine.query(sort_by='owner', order='asc', limit=10)
+    assert page == oracle(nfts, 'created_at', True, True)[:10]
+
+
+def test_select_combines_filters(engine, nfts):
+    ids = engine.select_ids(category='Music', currency='SOL', min_price=5, max_price=20)
+    expected = [nft['id'] for nft in nfts
+                if nft['category'] == 'Music' and nft['currency'] == 'SOL' and 5 <= nft['price'] <= 20]
+    assert sorted(ids) == sorted(expected)
+    assert engine.select_ids(category='Unknown') == []
+
+
+def test_in_place_updates_are_visible_to_queries(engine, nfts):
+    target = nfts[0]['id']
+    assert engine.update(target, price=0.01, currency='CFISH', is_for_sale=True)
+    page, _, _ = engine.query({'is_for_sale': True}, sort_by='price', order='asc', limit=1)
+    assert page == [target]
+
+    assert engine.increment(target, 'likes', 1000) == nfts[0]['likes'] + 1000
+    assert engine.increment(target, 'likes', -10 ** 6) == 0    # 计数不会小于 0
+    assert engine.update(-1, price=1) is False
+    assert engine.increment(-1, 'likes') is None
+
+
+def test_lookup_and_values(engine, nfts):
+    ids = [nfts[5]['id'], 999_999, nfts[7]['id']]
+    positions = engine.lookup(ids)
+    assert positions[1] == -1
+    found = positions[positions >= 0]
+    assert engine.values('id', found).tolist() == [nfts[5]['id'], nfts[7]['id']]
+    assert engine.values('currency', found).tolist() == [nfts[5]['currency'], nfts[7]['currency']]
+
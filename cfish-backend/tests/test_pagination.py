@@ -0,0 +1,130 @@
+import base64
+import random
+
+import pytest
+
+from src.services.pagination import KeysetIndex, check_key, decode_cursor, encode_cursor, paginate
+
+
+def sort_key(item):
+    return (item['score'], item['id'])
+
+
+def make_store(count, seed=0):
+    rng = random.Random(seed)
+    store = {}
+    index = KeysetIndex(store, sort_key)
+    for i in range(count):
+        item = {'id': f'item_{i:04d}', 'score': rng.randint(0, 20)}
+        store[item['id']] = item
+        index.add(item)
+    return store, index
+
+
+def walk(items, limit, reverse=False, index=None):
+    """沿 next_cursor 翻完所有页"""
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = paginate(items, sort_key, limit, cursor=cursor, sort_by='score',
+                                reverse=reverse, index=index)
+        assert len(page) <= limit
+        seen.extend(page)
+        if cursor is None:
+            return seen
+
+
+def walk_from(items, cursor, index):
+    seen = []
+    while cursor is not None:
+        page, cursor = paginate(items, sort_key, 10, cursor=cursor, sort_by='score', index=index)
+        seen.extend(page)
+    return seen
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor('score', (3, 'item_0001'))
+    assert '=' not in cursor
+    assert decode_cursor(cursor, 'score') == [3, 'item_0001']
+
+
+@pytest.mark.parametrize('cursor', ['!!!', 'bm90IGpzb24', base64.urlsafe_b64encode(b'[1, 2]').decode(),
+                                    base64.urlsafe_b64encode(b'{"s": "score", "k": 5}').decode()])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(cursor, 'score')
+
+
+def test_cursor_from_another_sort_is_rejected():
+    with pytest.raises(ValueError, match='does not match sort_by'):
+        decode_cursor(encode_cursor('created_at', ['2026-01-01', 'x']), 'score')
+
+
+@pytest.mark.parametrize('values', [
+    [1],                        # 长度不一致
+    [1, 2, 3],
+    ['1', 'item_0001'],         # 数字位置是字符串
+    [1, 2],                     # 字符串位置是数字
+    [True, 'item_0001'],        # 布尔值不能当数字
+    [None, 'item_0001'],
+])
+def test_check_key_rejects_wrong_shape_or_types(values):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        check_key(values, (3, 'item_0001'))
+
+
+def test_check_key_accepts_int_for_float():
+    assert check_key([2, 'a'], (2.5, 'b')) == (2, 'a')
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+@pytest.mark.parametrize('limit', [1, 7, 50, 500])
+def test_cursor_pages_cover_sorted_items_once(reverse, limit):
+    store, _ = make_store(200)
+    items = list(store.values())
+    assert walk(items, limit, reverse) == sorted(items, key=sort_key, reverse=reverse)
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+@pytest.mark.parametrize('limit', [1, 7, 64, 65, 500])
+def test_index_seek_matches_heap_path(reverse, limit):
+    store, index = make_store(300, seed=1)
+    items = list(store.values())
+    assert walk(items, limit, reverse, index=index) == walk(items, limit, reverse)
+    for offset in (0, 5, 63, 64, 299, 300):
+        assert (paginate(items, sort_key, limit, offset=offset, reverse=reverse, index=index)
+                == paginate(items, sort_key, limit, offset=offset, reverse=reverse))
+
+
+def test_filtered_items_ignore_the_index():
+    store, index = make_store(100, seed=2)
+    items = [item for item in store.values() if item['score'] % 2 == 0]
+    pages = walk(items, 10, index=index)
+    assert pages == sorted(items, key=sort_key)
+
+
+def test_items_inserted_while_scrolling_do_not_shift_pages():
+    store, index = make_store(50, seed=3)
+    page, cursor = paginate(list(store.values()), sort_key, 10, sort_by='score', index=index)
+    # 在已翻过的位置之前插入新记录，下一页仍从游标之后继续
+    early = {'id': 'item_early', 'score': -1}
+    store[early['id']] = early
+    index.add(early)
+    rest = walk_from(list(store.values()), cursor, index)
+    assert early not in rest
+    assert page + rest == sorted([item for item in store.values() if item is not early], key=sort_key)
+
+
+def test_cursor_with_wrong_types_raises_value_error_on_both_paths():
+    store, index = make_store(20)
+    items = list(store.values())
+    cursor = encode_cursor('score', ['high', 5])
+    with pytest.raises(ValueError):
+        paginate(items, sort_key, 5, cursor=cursor, sort_by='score')
+    with pytest.raises(ValueError):
+        paginate(items, sort_key, 5, cursor=cursor, sort_by='score', index=index)
+
+
+def test_empty_items_return_no_cursor():
+    assert paginate([], sort_key, 5) == ([], None)
+    assert paginate([], sort_key, 5, cursor=encode_cursor('score', [1, 'a']), sort_by='score') == ([], None)
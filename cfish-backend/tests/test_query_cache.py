@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from src.routes.search import parse_price_filters
+from src.services.listing_engine import ListingEngine
+from src.services.query_cache import QueryCache, cache_key
+
+
+def test_equivalent_queries_share_a_key():
+    first = cache_key('universal', '  Golden   DRAGON ', {'min_price': 1.004, 'category': ' Art ', 'rarity': ''}, page=1)
+    second = cache_key('universal', 'golden dragon', {'category': 'Art', 'min_price': 1.0}, page=1)
+    assert first == second
+    assert cache_key('universal', 'golden dragon', {}, page=2) != cache_key('universal', 'golden dragon', {}, page=1)
+
+
+def test_hit_until_version_changes():
+    cache = QueryCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute('k', compute, version=(1, 0)) == 1
+    assert cache.get_or_compute('k', compute, version=(1, 0)) == 1
+    assert cache.get_or_compute('k', compute, version=(1, 1)) == 2
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expired']) == (1, 2, 1)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    cache = QueryCache(ttl=30)
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    assert cache.get_or_compute('k', lambda: 'old') == 'old'
+    now[0] += 31
+    assert cache.get_or_compute('k', lambda: 'new') == 'new'
+
+
+def test_lru_eviction():
+    cache = QueryCache(max_entries=2)
+    for key in 'abc':
+        cache.get_or_compute(key, lambda key=key: key)
+    assert cache.stats()['entries'] == 2
+    assert cache.get_or_compute('a', lambda: 'recomputed') == 'recomputed'
+
+
+def test_cache_if_false_is_not_stored():
+    cache = QueryCache()
+    assert cache.get_or_compute('k', lambda: 'partial', cache_if=lambda value: False) == 'partial'
+    assert cache.get_or_compute('k', lambda: 'full') == 'full'
+
+
+def test_concurrent_misses_collapse_into_one_computation():
+    cache = QueryCache()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()['misses'] + cache.stats()['collapsed'] < 8:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == ['value'] * 8
+
+
+def test_failed_computation_is_raised_and_not_cached():
+    cache = QueryCache()
+
+    def fail():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('k', fail)
+    assert cache.get_or_compute('k', lambda: 'ok') == 'ok'
+
+
+@pytest.mark.parametrize('value', ['abc', 'nan', 'inf', [1], True])
+def test_invalid_price_filters_raise_value_error(value):
+    with pytest.raises(ValueError, match='min_price must be a number'):
+        parse_price_filters({'min_price': value})
+
+
+def test_price_filters_are_parsed():
+    assert parse_price_filters({'min_price': '2', 'max_price': 10, 'category': 'Art'}) == {
+        'min_price': 2.0, 'max_price': 10.0, 'category': 'Art'
+    }
+    assert parse_price_filters({'min_price': '', 'max_price': None}) == {'min_price': '', 'max_price': None}
+
+
+@pytest.fixture
+def engine():
+    engine = ListingEngine()
+    for nft_id in range(1, 4):
+        engine.upsert({'id': nft_id, 'name': f'NFT {nft_id}', 'category': 'Art', 'currency': 'SOL',
+                       'rarity': 'Common', 'price': float(nft_id), 'likes': 0, 'views': 0,
+                       'commission': 0, 'created_at': 1_700_000_000, 'is_for_sale': True})
+    return engine
+
+
+def test_column_versions_track_only_written_columns(engine):
+    prices = engine.version_of({'price'})
+    likes = engine.version_of({'likes'})
+    engine.increment(1, 'likes')
+    assert engine.version_of({'price'}) == prices
+    assert engine.version_of({'likes'}) != likes
+
+    engine.upsert({'id': 10, 'price': 5.0})
+    assert engine.version_of({'price'}) != prices    # 新增行使所有查询失效
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from src.services import query_language
+from src.services.listing_engine import ListingEngine
+from src.services.query_language import QueryPlan, filter_predicates, parse_query
+from src.services.search_index import NFT_FIELD_WEIGHTS, InvertedIndex
+
+NFTS = [
+    # (id, 名称, 分类, 货币, 稀有度, 价格, 是否在售)
+    (1, 'Golden Dragon', 'Art', 'CFISH', 'Epic', 4.0, True),
+    (2, 'Silver Dragon', 'Art', 'SOL', 'Rare', 12.0, True),
+    (3, 'Golden Sword', 'Gaming', 'CFISH', 'Epic', 2.5, False),
+    (4, 'Pixel Cat', 'Art', 'SOL', 'Common', 0.5, True),
+    (5, 'Dragon Egg', 'Gaming', 'SOL', 'Legendary', 50.0, True),
+]
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    """用独立的列式索引和倒排索引替换模块中的单例"""
+    engine = ListingEngine()
+    index = InvertedIndex(NFT_FIELD_WEIGHTS)
+    for nft_id, name, category, currency, rarity, price, for_sale in NFTS:
+        engine.upsert({
+            'id': nft_id, 'name': name, 'category': category, 'currency': currency,
+            'rarity': rarity, 'price': price, 'is_for_sale': for_sale,
+            'created_at': 1_700_000_000 + nft_id, 'likes': 0, 'views': 0, 'commission': 0
+        })
+        index.add(nft_id, {'name': name, 'category': category, 'creator': 'maker',
+                           'tags': [], 'description': ''})
+    monkeypatch.setattr(query_language, 'listing_engine', engine)
+    monkeypatch.setattr(query_language, 'nft_index', index)
+    return engine
+
+
+def execute(query, **filters):
+    parsed = parse_query(query)
+    ids, scores, positions = QueryPlan(parsed.text, parsed.predicates + filter_predicates(**filters)).execute()
+    assert len(ids) == len(scores) == len(positions)
+    return ids.tolist()
+
+
+def test_parse_query_splits_fields_from_text(catalog):
+    parsed = parse_query('category:art rarity:EPIC "golden dragon" sale:yes owner:bob')
+
+    assert parsed.text == 'golden dragon owner:bob'
+    described = sorted(predicate.describe() for predicate in parsed.predicates)
+    # 取值按列式索引中的写法规范化，不区分大小写
+    assert described == ['category=Art', 'is_for_sale=True', 'rarity=Epic']
+
+
+@pytest.mark.parametrize('raw, low, high', [
+    ('price:1..10', 1.0, 10.0),
+    ('price:<=5', None, 5.0),
+    ('price:>=5', 5.0, None),
+    ('price:=3', 3.0, 3.0),
+    ('price:7', 7.0, 7.0),
+])
+def test_parse_price_conditions(raw, low, high):
+    (predicate,) = parse_query(raw).predicates
+    assert (predicate.min_value, predicate.max_value) == (low, high)
+
+
+def test_strict_price_bounds_exclude_the_value():
+    (below,) = parse_query('price:<5').predicates
+    (above,) = parse_query('price:>5').predicates
+    assert below.min_value is None and below.max_value < 5
+    assert above.max_value is None and above.min_value > 5
+
+
+@pytest.mark.parametrize('query', ['price:abc', 'price:10..1', 'sale:maybe'])
+def test_invalid_field_values_raise_value_error(query):
+    with pytest.raises(ValueError):
+        parse_query(query)
+
+
+def test_plan_combines_text_and_predicates(catalog):
+    assert execute('dragon') == [1, 2, 5]
+    assert execute('dragon category:Art') == [1, 2]
+    assert execute('dragon price:<10') == [1]
+    assert execute('golden', currency='CFISH', is_for_sale=True) == [1]
+    assert execute('gold') == [1, 3]    # 最后一个词按前缀匹配
+
+
+def test_predicate_only_query_scans_catalog(catalog):
+    assert execute('category:Gaming') == [3, 5]
+    assert execute('', min_price=1, max_price=20) == [1, 2, 3]
+
+
+@pytest.mark.parametrize('query', ['!!', 'the', 'the category:Art'])
+def test_text_without_terms_matches_nothing(catalog, query):
+    assert execute(query) == []
+
+
+def test_plan_starts_from_the_most_selective_step(catalog):
+    parsed = parse_query('egg category:Art')
+    plan = QueryPlan(parsed.text, parsed.predicates)
+    steps = plan.explain()
+    # 只有一个文档含 egg，比 category=Art（3 行）更有选择性
+    assert steps[0]['step'] == 'text_candidates'
+    assert plan.start_from_text
+
+    parsed = parse_query('dragon rarity:Legendary')
+    plan = QueryPlan(parsed.text, parsed.predicates)
+    assert [step['step'] for step in plan.explain()] == ['filter', 'text']
+    assert execute('dragon rarity:Legendary') == [5]
+
+
+def test_scores_follow_matched_ids(catalog):
+    parsed = parse_query('dragon')
+    ids, scores, positions = QueryPlan(parsed.text, []).execute()
+    assert np.all(np.diff(ids) > 0)
+    assert np.all(scores > 0)
+    assert catalog.values('id', positions).tolist() == ids.tolist()